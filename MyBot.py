@@ -7,20 +7,50 @@ from math import ceil, floor
 
 import hlt
 from hlt.task import Task
+from hlt.assignment import Assignment, greedy_assignment
 from hlt import constants
 from hlt.positionals import Direction, Position
 from hlt.utils import save_data, collect_data
 
-game = hlt.Game()  # This game object contains the initial game state.
-
 ###################################
 #                                 #
 #       Pre-processing area       #
 #                                 #
 ###################################
 
-# At this point "game" variable is populated with initial map data.
-# This is a good place to do computationally expensive start-up pre-processing.
+def setup(new_game):
+    """
+    Runs once the "game" variable is populated with initial map data.
+    This is a good place to do computationally expensive start-up pre-processing.
+    :param new_game: The hlt.Game holding the initial game state
+    """
+    global game, first_mover_assignment, gather_assignment, swarm_targets, long_haul_targets
+    game = new_game
+
+    # Target assignments are warm started from the previous turn, one solver per group of ships
+    first_mover_assignment = Assignment()
+    gather_assignment = Assignment()
+
+    # The cell next to an enemy dropoff each hunting ship swarms to, kept so its path can be reused across turns
+    swarm_targets = dict()
+
+    # The target of each ship sent at least half the map, kept until it arrives so its plan_move cost to go is
+    # repaired rather than rebuilt for a new target every turn
+    long_haul_targets = dict()
+
+    # Expensive planners fall back to cheap moves once the turn deadline nears
+    game.scheduler.register(
+        "navigate",
+        game.profiler.wrap("navigate", lambda ship, target, **kwargs: game.game_map.plan_move(ship, target, **kwargs)),
+        lambda ship, target, **kwargs: game.game_map.safe_greedy_move(ship.position, target))
+    game.scheduler.register(
+        "hunt",
+        game.profiler.wrap("hunt", lambda source, target, **kwargs: game.game_map.navigate(source, target, **kwargs)),
+        lambda source, target, **kwargs: game.game_map.safe_greedy_move(source, target))
+    game.scheduler.register(
+        "assignment",
+        lambda solver, cost, row_keys, column_keys: solver.solve(cost, row_keys, column_keys),
+        lambda solver, cost, row_keys, column_keys: greedy_assignment(cost))
 
 
 ##########################################
@@ -29,86 +59,64 @@ game = hlt.Game()  # This game object contains the initial game state.
 #                                        #
 ##########################################
 
-game.ready("DEV")  # Starts the 2 second per turn timer
-
 
 def swarm_closest_enemy_dropoff(ships):
     matches = dict()
 
     for ship in ships:
-        closest_enemy_dropoff = sorted(game_map.enemy_dropoffs, key=lambda d, ship=ship, game_map=game_map: game_map.calculate_distance(d, ship.position))[0]
+        closest_enemy_dropoff = game_map.enemy_field.nearest(ship.position)
         ring_positions = closest_enemy_dropoff.get_offset_ring(offset=2)
-        matches[ship] = random.choice(ring_positions)
+        target = swarm_targets.get(ship.id)
+        if target is None or target not in ring_positions:
+            target = swarm_targets[ship.id] = random.choice(ring_positions)
+        matches[ship] = target
 
     return matches
 
 
-def hunt_close_enemy2(ships):
-    global game_map
-    matches = dict()
-
-    # Search with an expanding ring
-    targets = []
-
-    for y in range(game_map.height):
-        for x in range(game_map.width):
-
-            pos = Position(x, y)
-            cell = game_map[pos]
-            if cell.is_occupied and cell.ship.owner != me.id and cell.ship.halite_amount > 200:
-                targets.append(cell)
-
-    # Match all ships with all targets
-    for ship in ships:
-        best_target = (None, constants.INF)  # For now best => closest
-        for cell in targets:
-            distance = game_map.calculate_distance(ship.position, cell.position)
-            if distance < best_target[1]:
-                best_target = (cell, distance)
-
-        if best_target[0] is not None:
-            matches[ship] = best_target[0].position
-            targets.pop(targets.index(best_target[0]))
-        else:
-            matches[ship] = None
-
-    return matches
-
-
-def weighted_cleanup2(ships):
+def weighted_cleanup2(ships, solver):
     global game_map
     global me
     matches = dict()
 
-    targets = []
-    for y in range(game_map.height):
-        for x in range(game_map.width):
-            pos = Position(x, y)
-            cell = game_map[pos]
-            # if cell.halite_amount >= minimum and not cell.is_occupied:
-            if not cell.is_occupied and not cell.is_claimed:
-                cell_distance = max(1, game_map.calculate_distance(me.shipyard.position, pos))
-                targets.append(
-                    (cell, cell.halite_amount * (1 / cell_distance))
-                )
-
-    targets = sorted(targets, key=lambda t: t[1], reverse=True)[0: len(ships) * 2]
-    # Match all ships with all targets
+    # Ships on a long haul keep their target while it is still free
+    free = (game_map.ship_owner == -1) & ~game_map.hostile & ~game_map.claimed
+    assigned = []
     for ship in ships:
-        best_target = (None, constants.INF)  # For now best => closest
-        for target in targets:
-            cell, _ = target
-            distance = game_map.calculate_distance(ship.position, cell.position)
-            if distance < best_target[1]:
-                best_target = (cell, distance)
-
-        if best_target[0] is not None:
-            matches[ship] = best_target[0].position
-            targets.pop(targets.index(target))
-            if best_target[1] >= game_map.width / 2:
-                logging.debug(f"Traveling at least half the map: {best_target[1]}")
+        target = long_haul_targets.get(ship.id)
+        if target is not None and target != ship.position and free[target.y, target.x]:
+            matches[ship] = target
+            free[target.y, target.x] = False
         else:
-            matches[ship] = None
+            long_haul_targets.pop(ship.id, None)
+            assigned.append(ship)
+    ships = assigned
+
+    # Score every free cell at once by what a ship would mine there, inspiration included, and keep the best two
+    # targets per ship
+    cell_distance = np.maximum(1, game_map.friendly_field.distances)
+    scores = np.where(free, game_map.effective_extraction * (1 / cell_distance), -np.inf).ravel()
+
+    k = min(len(ships) * 2, int(np.count_nonzero(free)))
+    best = np.argpartition(-scores, k - 1)[:k] if k else np.empty(0, dtype=np.int64)
+    best = best[np.lexsort((best, -scores[best]))]
+    target_ys, target_xs = np.divmod(best, game_map.width)
+
+    # Match all ships with all targets: minimize the total distance, the score breaks ties. Each ship's score is
+    # scaled below 1 / (ships + 1), so summed over the whole assignment it stays below one distance step
+    distances = game_map.pairwise_distances([ship.position for ship in ships], (target_ys, target_xs))
+    value = scores[best] / scores[best].max() / (len(ships) + 1) if k and scores[best].max() > 0 else np.zeros(k)
+    assignment = game.scheduler.run("assignment", solver, distances - value[None, :],
+                                    [ship.id for ship in ships], best.tolist())
+
+    for i, target in enumerate(assignment):
+        if target >= 0:
+            matches[ships[i]] = Position(int(target_xs[target]), int(target_ys[target]))
+            if distances[i, target] >= game_map.width / 2:
+                logging.debug("Traveling at least half the map: %s", distances[i, target])
+                long_haul_targets[ships[i].id] = matches[ships[i]]
+        else:
+            matches[ships[i]] = None
 
     return matches
 
@@ -151,7 +159,7 @@ def evaluate_other(ships):
 
     first_mover_targets = []
     if first_movers:
-        first_mover_targets = weighted_cleanup2(first_movers)
+        first_mover_targets = weighted_cleanup2(first_movers, first_mover_assignment)
     for ship in first_movers:
       # logging.debug(f"# {ship.id} ---------------- first movers")
         target = first_mover_targets[ship]
@@ -159,27 +167,27 @@ def evaluate_other(ships):
         if target is None:
             direction = Direction.Still
         else:
-            direction = game_map.navigate(ship.position, target, offset=0, cheapest=False)
+            # Ships sent at least half the map keep their cost to go across turns
+            direction = game.scheduler.run("navigate", ship, target, offset=0, cheapest=False,
+                                           long_haul=game_map.width // 2)
         # direction = game_map.safe_adjacent_move(ship.position)
 
       # logging.debug(f"DIRECTION FIRST MOVER: {direction}")
         game_map.register_move(ship, direction)
 
     for ship in sorted(deposit_ships,
-                       key=lambda ship: game_map.calculate_distance(me.shipyard.position, ship.position),
+                       key=lambda ship: game_map.friendly_field.distance(ship.position),
                        reverse=False):
       # logging.debug(f"# {ship.id} ---------------- deposit ")
-        target = me.shipyard.position
-        direction = game_map.navigate(ship.position, target, offset=0)
+        direction = game_map.navigate_home(ship.position)
         game_map.register_move(ship, direction)
 
     for ship in sorted(suicide_ships,
-                       key=lambda ship: game_map.calculate_distance(me.shipyard.position, ship.position),
+                       key=lambda ship: game_map.friendly_field.distance(ship.position),
                        reverse=False):
       # logging.debug(f"# {ship.id} ---------------- suicide ")
 
-        target = me.shipyard.position
-        direction = game_map.navigate(ship.position, target, offset=1, ignore_dropoff=True)
+        direction = game_map.navigate_home(ship.position, ignore_dropoff=True)
         game_map.register_move(ship, direction)
 
     attack_targets = dict()
@@ -187,7 +195,7 @@ def evaluate_other(ships):
         attack_targets = swarm_closest_enemy_dropoff(hunting_ships)
 
     for ship in sorted(hunting_ships,
-                       key=lambda ship: game_map.calculate_distance(me.shipyard.position, ship.position),
+                       key=lambda ship: game_map.friendly_field.distance(ship.position),
                        reverse=False):
       # logging.debug(f"# {ship.id} ---------------- hunting ")
 
@@ -196,14 +204,15 @@ def evaluate_other(ships):
         if target is None:
             direction = Direction.Still
         else:
-            direction = game_map.navigate(ship.position, target, offset=1, ignore_enemies=True)
+            direction = game.scheduler.run("hunt", ship.position, target, offset=1, ignore_enemies=True)
         game_map.register_move(ship, direction)
 
     targets = []
     if gather_ships:
-        targets = weighted_cleanup2(gather_ships)
+        targets = weighted_cleanup2(gather_ships, gather_assignment)
+    # Ships carrying the most halite are planned first, so they keep the full planner when time runs short
     for ship in sorted(gather_ships,
-                       key=lambda ship: game_map.calculate_distance(me.shipyard.position, ship.position),
+                       key=lambda ship: (ship.halite_amount, game_map.friendly_field.distance(ship.position)),
                        reverse=True):
         # target = ship.position + Position(5, 5)  # Target to the north
         target = targets[ship]
@@ -211,7 +220,9 @@ def evaluate_other(ships):
         if target is None:
             direction = Direction.Still
         else:
-            direction = game_map.navigate(ship.position, target, offset=1, cheapest=False)
+            # Ships sent at least half the map keep their cost to go across turns
+            direction = game.scheduler.run("navigate", ship, target, offset=1, cheapest=False,
+                                           long_haul=game_map.width // 2)
         game_map.register_move(ship, direction)
 
 
@@ -220,11 +231,10 @@ def is_in_endgame(ship, cutoff):
         return True
 
     turns_remaining = constants.MAX_TURNS - game.turn_number
-    homing_dist = game_map.calculate_distance(me.shipyard.position, ship.position)
+    homing_dist = game_map.friendly_field.distance(ship.position)
     estimated_homing_time = homing_dist + 6 + ceil(len(me.get_ships()) / 9)
 
-    closest_enemy_dropoff = sorted(game_map.enemy_dropoffs, key=lambda d, ship=ship, game_map=game_map: game_map.calculate_distance(d, ship.position))[0]
-    attack_dist = game_map.calculate_distance(closest_enemy_dropoff, ship.position)
+    attack_dist = game_map.enemy_field.distance(ship.position)
     estimated_attacking_time = attack_dist + 4 + ceil(len(me.get_ships()) / 9)
 
     if estimated_attacking_time >= turns_remaining and ship.halite_amount <= cutoff:
@@ -280,11 +290,14 @@ def execute_moves(ships):
 
     return command_queue
 
-""" <<<Game Loop>>> """
-while True:
-    start = time.time()  # For timing the loop
-
-    game.update_frame()
+def play_turn(current_game):
+    """
+    Decides the commands for the turn that was just read into the game.
+    :param current_game: The hlt.Game, updated for this turn
+    :return: The list of commands to send
+    """
+    global game, me, game_map
+    game = current_game
     me = game.me
     game_map = game.game_map
 
@@ -292,7 +305,7 @@ while True:
 
     command_queue = []
     ships = me.get_ships()
-    logging.debug(f"Number of ships: {len(ships)}")
+    logging.debug("Number of ships: %d", len(ships))
     # if game.turn_number == 6:
     #     time.sleep(3)
     ######################################
@@ -300,24 +313,37 @@ while True:
     ######################################
     claimed_by_four = sum([game_map[p].is_claimed for p in me.shipyard.position.get_surrounding_cardinals()]) == 4
     if claimed_by_four:
-        logging.debug(f"Claimed by four!")
+        logging.debug("Claimed by four!")
 
     if not claimed_by_four and game_map.total_halite / max(len(me.get_ships()), 1) > 4000 and me.halite_amount >= constants.SHIP_COST and game.turn_number <= ceil(0.66 * constants.MAX_TURNS):
         command_queue.append(me.shipyard.spawn())
         game_map[me.shipyard].claim = True
 
     ships = me.get_ships()
-    ships = evaluate_can_move(ships)
-    ships = evaluate_should_move(ships)
+    with game.profiler.span("can_move"):
+        ships = evaluate_can_move(ships)
+    with game.profiler.span("should_move"):
+        ships = evaluate_should_move(ships)
     evaluate_other(ships)
 
-    # Send your moves back to the game environment, ending this turn.
     command_queue.extend(execute_moves(me.get_ships()))
-    game.end_turn(command_queue)
-    logging.debug(f"{time.time() - start} seconds")
-
-
-
-
+    return command_queue
 
 
+""" <<<Game Loop>>> """
+if __name__ == "__main__":
+    setup(hlt.Game())  # This game object contains the initial game state.
+    game.ready("DEV")  # Starts the 2 second per turn timer
+
+    while True:
+        start = time.time()  # For timing the loop
+
+        game.update_frame()
+        command_queue = play_turn(game)
+
+        # Send your moves back to the game environment, ending this turn.
+        game.end_turn(command_queue)
+        degraded = game.scheduler.degraded_stages()
+        if degraded:
+            logging.debug("Deadline fallbacks: %s", degraded)
+        logging.debug("%s seconds, of which %s reading the frame", time.time() - start, game.ingest_time)
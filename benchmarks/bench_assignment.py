@@ -0,0 +1,72 @@
+"""
+Latency of hlt.assignment at 150 ships x 300 targets, cold and warm started.
+
+Costs are wrapped distances between random ships and targets on a 64x64 map. The warm runs move every
+ship one step between solves, as consecutive turns would.
+
+    python3 benchmarks/bench_assignment.py [--ships 150] [--targets 300] [--turns 20] [--budget-ms 20]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import report
+
+from hlt.assignment import Assignment, linear_assignment
+
+
+def wrapped_distances(ships, targets, size):
+    delta = np.abs(ships[:, None, :] - targets[None, :, :])
+    return np.minimum(delta, size - delta).sum(axis=2).astype(float)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ships", type=int, default=150)
+    parser.add_argument("--targets", type=int, default=300)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--size", type=int, default=64)
+    parser.add_argument("--budget-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ships = rng.integers(0, args.size, (args.ships, 2))
+    targets = rng.integers(0, args.size, (args.targets, 2))
+    ship_keys = list(range(args.ships))
+    target_keys = [tuple(target) for target in targets]
+
+    cold, warm, costs = [], [], []
+    solver = Assignment()
+    for turn in range(args.turns):
+        cost = wrapped_distances(ships, targets, args.size)
+
+        start = time.perf_counter()
+        cold_assignment = linear_assignment(cost)
+        cold.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        warm_assignment = solver.solve(cost, ship_keys, target_keys)
+        warm.append((time.perf_counter() - start) * 1000)
+
+        rows = np.arange(args.ships)
+        costs.append(cost[rows, warm_assignment].sum() - cost[rows, cold_assignment].sum())
+
+        # Every ship takes one step towards its target
+        chosen = targets[warm_assignment]
+        axis = rng.integers(0, 2, args.ships)
+        step = np.sign(chosen[rows, axis] - ships[rows, axis])
+        ships[rows, axis] = (ships[rows, axis] + step) % args.size
+
+    rows = []
+    for name, timings in (("cold", cold), ("warm", warm[1:])):
+        timings = np.array(timings)
+        rows.append((name, float(np.median(timings)), float(np.percentile(timings, 95)), float(timings.max()),
+                     "yes" if timings.max() <= args.budget_ms else "NO"))
+    report(f"{args.ships} ships x {args.targets} targets, {args.turns} turns, budget {args.budget_ms} ms", rows,
+           ("start", "p50 ms", "p95 ms", "max ms", "in budget"))
+    print(f"warm - cold total cost (should be 0): {max(abs(c) for c in costs)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-call latency and expanded cells of pathfinding.astar_search against pathfinding.dijkstra on 32, 48 and 64
+sized maps.
+
+Both search the same box; dijkstra settles all of it, the A* stops once the target is settled. Checks that both
+find equally cheap paths, ties may be broken differently.
+
+    python3 benchmarks/bench_astar.py [--calls 200] [--max-distance 16]
+"""
+import argparse
+import time
+
+from common import make_game_map, random_queries, report
+
+from hlt import pathfinding
+
+
+def path_cost(weight, previous, source_index, target_index):
+    cost = 0
+    node = target_index
+    while node != source_index:
+        cost += weight[node]
+        node = previous[node]
+    return cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--max-distance", type=int, default=16)
+    args = parser.parse_args()
+
+    rows = []
+    for size in (32, 48, 64):
+        game_map = make_game_map(size, seed=size)
+        queries = random_queries(game_map, args.calls, seed=size, max_distance=args.max_distance)
+
+        for cheapest in (True, False):
+            dijkstra_ms = astar_ms = 0.0
+            dijkstra_expanded = astar_expanded = mismatches = 0
+            weight = game_map.travel_costs(cheapest).ravel().tolist()
+            for source, target in queries:
+                source_index = source.y * size + source.x
+                target_index = target.y * size + target.x
+
+                start = time.perf_counter()
+                previous = pathfinding._search(game_map, source, target, 1, cheapest, False)
+                dijkstra_ms += (time.perf_counter() - start) * 1000
+                # Dijkstra expands every cell it reaches, the source included
+                dijkstra_expanded += sum(node != -1 for node in previous) + 1
+
+                start = time.perf_counter()
+                astar_previous, expanded = pathfinding.astar_search(game_map, source, target, 1, cheapest, False)
+                astar_ms += (time.perf_counter() - start) * 1000
+                astar_expanded += expanded
+
+                mismatches += path_cost(weight, previous, source_index, target_index) != \
+                    path_cost(weight, astar_previous, source_index, target_index)
+
+            calls = len(queries)
+            rows.append((f"{size}x{size}", str(cheapest), dijkstra_expanded / calls, astar_expanded / calls,
+                         dijkstra_ms / calls, astar_ms / calls, dijkstra_ms / astar_ms, mismatches))
+
+    report(f"astar against dijkstra, offset=1, max distance {args.max_distance}", rows,
+           ("map", "cheapest", "dijkstra cells", "astar cells", "dijkstra ms", "astar ms", "speedup",
+            "cost mismatches"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Per-call latency of GameMap.dijkstra_a_to_b on 32, 48 and 64 sized maps.
+
+Compares the heap based search against the previous sorted-list implementation
+and checks that both pick the same direction.
+
+    python3 benchmarks/bench_dijkstra.py [--calls 200] [--legacy-calls 20]
+"""
+import argparse
+import time
+
+from common import make_game_map, random_queries, report
+
+from hlt import constants
+from hlt.positionals import Direction, Position
+
+
+def legacy_dijkstra_a_to_b(game_map, source, target, offset=1, cheapest=True, ignore_enemies=False):
+    """The sorted-list implementation that pathfinding.dijkstra replaced, kept for reference."""
+    if source == target:
+        return Direction.Still
+
+    min_x, max_x = min(source.x, target.x), max(source.x, target.x)
+    min_y, max_y = min(source.y, target.y), max(source.y, target.y)
+    dx, dy = max_x - min_x, max_y - min_y
+
+    if dx < game_map.width - dx:
+        rx = range(min_x - offset, max_x + offset + 1)
+    else:
+        rx = range(max_x - offset, min_x + game_map.width + offset + 1)
+    if dy < game_map.height - dy:
+        ry = range(min_y - offset, max_y + offset + 1)
+    else:
+        ry = range(max_y - offset, min_y + game_map.height + offset + 1)
+    rx = [x % game_map.width for x in rx]
+    ry = [y % game_map.height for y in ry]
+
+    distance_map = {source: {"distance": 0, "previous": None}}
+    queue = [source]
+    for x in rx:
+        for y in ry:
+            pos = Position(x, y)
+            if pos == source:
+                continue
+            distance_map[pos] = {"distance": constants.INF * 32, "previous": None}
+            queue.append(pos)
+
+    while len(queue):
+        node = sorted(queue, key=lambda position: distance_map[position]["distance"])[0]
+        queue.pop(queue.index(node))
+        for pos in node.get_surrounding_cardinals():
+            if pos.x in rx and pos.y in ry:
+                neighbour_weight = game_map.travel_cost(game_map[pos], cheapest, ignore_enemies)
+                dist_to_neighbour = distance_map[node]["distance"] + neighbour_weight
+                if dist_to_neighbour < distance_map[pos]["distance"]:
+                    distance_map[pos]["distance"] = dist_to_neighbour
+                    distance_map[pos]["previous"] = node
+
+    path_node = target
+    while path_node != source:
+        prev_path_node = distance_map[path_node]["previous"]
+        if prev_path_node == source:
+            for d in Direction.get_all_cardinals():
+                if source.directional_offset(d) == path_node:
+                    return d
+        path_node = prev_path_node
+
+
+def time_calls(search, game_map, queries):
+    results = []
+    start = time.perf_counter()
+    for source, target in queries:
+        results.append(search(game_map, source, target, offset=1, cheapest=False))
+    elapsed = time.perf_counter() - start
+    return elapsed / len(queries) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--legacy-calls", type=int, default=20)
+    parser.add_argument("--max-distance", type=int, default=16)
+    args = parser.parse_args()
+
+    rows = []
+    for size in (32, 48, 64):
+        game_map = make_game_map(size, seed=size)
+        queries = random_queries(game_map, args.calls, seed=size, max_distance=args.max_distance)
+
+        heap_ms, heap_results = time_calls(lambda m, s, t, **kw: m.dijkstra_a_to_b(s, t, **kw), game_map, queries)
+        legacy_ms, legacy_results = time_calls(legacy_dijkstra_a_to_b, game_map, queries[:args.legacy_calls])
+
+        mismatches = sum(a != b for a, b in zip(heap_results, legacy_results))
+        rows.append((f"{size}x{size}", heap_ms, legacy_ms, legacy_ms / heap_ms, mismatches))
+
+    report(f"dijkstra_a_to_b, offset=1, max distance {args.max_distance}", rows,
+           ("map", "heap ms/call", "legacy ms/call", "speedup", "mismatches"))
+
+
+if __name__ == "__main__":
+    main()
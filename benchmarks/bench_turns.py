@@ -0,0 +1,188 @@
+"""
+Per-turn latency of the full bot, replayed from recorded engine input.
+
+Recordings are the raw byte stream player 0 reads during a game. They are made once with the in-process engine
+(--record), or with the halite binary by running a bot with HLT_RECORD=<file>, and then replayed into hlt.Game
+and MyBot.play_turn without an engine, so every run sees exactly the same frames. They are not committed: the first
+replay records them when benchmarks/frames is empty, and a baseline is only comparable on the same recordings.
+
+    python3 benchmarks/bench_turns.py --record                 # 32..64 maps, 2 and 4 players
+    python3 benchmarks/bench_turns.py                          # replay all recordings, recording them first if none
+    python3 benchmarks/bench_turns.py --phases --allocations   # plus per-phase times and allocations
+    python3 benchmarks/bench_turns.py --save base.json         # keep the results as a baseline
+    python3 benchmarks/bench_turns.py --compare base.json      # exit 1 if p50 or p95 regressed
+"""
+import argparse
+import gc
+import glob
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from common import report
+
+from hlt import constants
+from hlt.common import FrameReader
+from hlt.networking import Game
+from hlt.profiler import Profiler
+from sim import ModuleBot, play_game
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRAMES = os.path.join(ROOT, "benchmarks", "frames")
+BOT = os.path.join(ROOT, "MyBot.py")
+SIZES = (32, 40, 48, 56, 64)
+PLAYERS = (2, 4)
+
+
+def record(sizes, players, seed, directory):
+    """
+    Plays a game for every map size and player count and records player 0's input, gzipped.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for size in sizes:
+        for count in players:
+            path = os.path.join(directory, "{}x{}-{}p.frames.gz".format(size, size, count))
+            start = time.perf_counter()
+            with gzip.open(path, "wb") as f:
+                result = play_game([BOT] * count, size, seed=seed, record=f)
+            print("Recorded {} turns to {} in {:.1f} s".format(result.turns, path, time.perf_counter() - start))
+
+
+def replay(path, phases=False, allocations=False):
+    """
+    Replays a recording into a fresh Game and MyBot.
+    :param path: The recording
+    :param phases: Also time the phases of each turn through the hlt profiler
+    :param allocations: Trace memory allocations, which slows the turns down; latencies are then not comparable
+    :return: A dict of per-turn arrays: latency in ms, and with allocations the peak KiB and net allocated blocks
+    """
+    with gzip.open(path, "rb") as f:
+        stream = io.BytesIO(f.read())
+
+    with tempfile.TemporaryDirectory() as profile_dir:
+        game = Game(FrameReader(stream))
+        if phases:
+            game.profiler = game.game_map.profiler = Profiler(os.path.join(profile_dir, "bot.npz"))
+        bot = ModuleBot(BOT)
+        bot.setup(game)
+
+        latencies, peaks, blocks = [], [], []
+        collections = sum(stat["collections"] for stat in gc.get_stats())
+        if allocations:
+            tracemalloc.start()
+        stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+        try:
+            while game.turn_number < constants.MAX_TURNS:
+                allocated = sys.getallocatedblocks()
+                if allocations:
+                    tracemalloc.reset_peak()
+                start = time.perf_counter_ns()
+                try:
+                    game.update_frame()
+                except SystemExit:
+                    # The recording ended early, everyone was out of ships
+                    break
+                game.end_turn(bot.play_turn(game))
+                latencies.append((time.perf_counter_ns() - start) / 1e6)
+                if allocations:
+                    peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+                    blocks.append(sys.getallocatedblocks() - allocated)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+            if allocations:
+                tracemalloc.stop()
+
+        result = {"latency": np.array(latencies),
+                  "collections": sum(stat["collections"] for stat in gc.get_stats()) - collections}
+        if allocations:
+            result["peak_kib"] = np.array(peaks)
+            result["blocks"] = np.array(blocks)
+        if phases:
+            spans = game.profiler.spans()
+            result["phases"] = {name: spans[spans[:, 0] == code, 3] / 1e6 for code, name in enumerate(game.profiler.names)}
+    return result
+
+
+def summary(latency):
+    p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+    return {"turns": len(latency), "p50": p50, "p95": p95, "p99": p99, "max": latency.max(), "total": latency.sum() / 1e3}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", action="store_true", help="Record new games instead of replaying")
+    parser.add_argument("--sizes", type=int, nargs="*", default=SIZES)
+    parser.add_argument("--players", type=int, nargs="*", default=PLAYERS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--frames", default=FRAMES, help="Directory of the recordings")
+    parser.add_argument("--phases", action="store_true", help="Also report the p50 and p95 of each turn phase")
+    parser.add_argument("--allocations", action="store_true", help="Trace allocations in a separate pass")
+    parser.add_argument("--save", default="", help="Write the latency summaries to this JSON file")
+    parser.add_argument("--compare", default="", help="Compare with a JSON file written by --save")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative p50/p95 regression")
+    args = parser.parse_args()
+
+    os.environ.setdefault("HLT_LOG_LEVEL", "OFF")
+    if args.record:
+        record(args.sizes, args.players, args.seed, args.frames)
+        return
+
+    paths = sorted(glob.glob(os.path.join(args.frames, "*.frames.gz")))
+    if not paths:
+        print("No recordings in {}, recording them first".format(args.frames))
+        record(args.sizes, args.players, args.seed, args.frames)
+        paths = sorted(glob.glob(os.path.join(args.frames, "*.frames.gz")))
+
+    results, rows, phase_rows, allocation_rows = {}, [], [], []
+    for path in paths:
+        name = os.path.basename(path)[:-len(".frames.gz")]
+        measured = replay(path, phases=args.phases)
+        results[name] = summary(measured["latency"])
+        s = results[name]
+        rows.append((name, s["turns"], s["p50"], s["p95"], s["p99"], s["max"], s["total"], measured["collections"]))
+        if args.phases:
+            for phase, durations in measured["phases"].items():
+                phase_rows.append((name, phase, len(durations), float(np.percentile(durations, 50)),
+                                   float(np.percentile(durations, 95)), float(durations.sum() / 1e3)))
+        if args.allocations:
+            traced = replay(path, allocations=True)
+            allocation_rows.append((name, float(np.median(traced["peak_kib"])), float(traced["peak_kib"].max()),
+                                    float(np.median(traced["blocks"])), int(traced["blocks"].sum())))
+
+    report("Turn latency (ms), replayed from {}".format(args.frames), rows,
+           ("game", "turns", "p50", "p95", "p99", "max", "total s", "gc runs"))
+    if phase_rows:
+        report("Phases (ms)", phase_rows, ("game", "phase", "calls", "p50", "p95", "total s"))
+    if allocation_rows:
+        report("Allocations per turn", allocation_rows,
+               ("game", "peak KiB p50", "peak KiB max", "net blocks p50", "net blocks"))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = []
+        for name, s in results.items():
+            for key in ("p50", "p95"):
+                if name in baseline and s[key] > baseline[name][key] * (1 + args.tolerance):
+                    regressions.append("{} {}: {:.3f} ms, was {:.3f} ms".format(name, key, s[key], baseline[name][key]))
+        if regressions:
+            print("Regressions beyond {:.0%}:".format(args.tolerance))
+            print("\n".join(regressions))
+            sys.exit(1)
+        print("No regressions beyond {:.0%}".format(args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Checks that the DStarLite fields plan_move keeps for long-haul ships always equal a fresh backward search.
+
+Plays games of MyBot against itself in the in-process engine and, after every repair, compares the field with
+pathfinding._cost_to_go over the field's box and this turn's travel costs. Exits with 1 on any mismatch.
+
+    python3 benchmarks/check_dstar.py [--games 2] [--turns 300]
+"""
+import argparse
+import os
+import sys
+
+import common  # noqa: F401, puts the repository on the path
+
+from hlt import pathfinding
+from hlt.game_map import GameMap
+from hlt.positionals import get_position_table
+from sim import play_game
+
+BOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MyBot.py")
+
+
+def check_games(games, turns, size):
+    original = GameMap._long_haul_cost_to_go
+    counts = {"builds": 0, "repairs": 0, "cells": 0, "expanded": 0, "mismatches": 0}
+
+    def checked(game_map, ship, target, offset, cheapest, ignore_enemies):
+        previous = ship.cost_to_go
+        expanded = previous.expanded if previous is not None else 0
+        field = original(game_map, ship, target, offset, cheapest, ignore_enemies)
+        if field is not previous:
+            counts["builds"] += 1
+            return field
+
+        counts["repairs"] += 1
+        counts["expanded"] += field.expanded - expanded
+        counts["cells"] += len(field.inside)
+        weight = game_map.travel_weights(cheapest, ignore_enemies, include_claims=False)
+        neighbours = get_position_table(game_map.width, game_map.height).cardinal_indices
+        fresh = pathfinding._cost_to_go(neighbours, weight, field.inside, field.target)
+        counts["mismatches"] += any(field[cell] != cost for cell, cost in fresh.items())
+        return field
+
+    GameMap._long_haul_cost_to_go = checked
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        for seed in range(games):
+            play_game([BOT] * 2, size, seed=seed, turn_limit=turns)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        GameMap._long_haul_cost_to_go = original
+
+    repairs = max(counts["repairs"], 1)
+    print("{} games on {}x{}: {} builds, {} repairs expanding {:.0f} of {:.0f} box cells on average, {} mismatches"
+          .format(games, size, size, counts["builds"], counts["repairs"], counts["expanded"] / repairs,
+                  counts["cells"] / repairs, counts["mismatches"]))
+    return not counts["mismatches"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=2, help="Games of MyBot against itself")
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--size", type=int, default=48)
+    args = parser.parse_args()
+
+    os.environ.setdefault("HLT_LOG_LEVEL", "OFF")
+    if not check_games(args.games, args.turns, args.size):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Checks that GameMap.travel_weights, which is cached across calls, always equals a fresh GameMap.travel_costs.
+
+First on a synthetic map through random claims, ship moves, halite and structure updates and opponent turns,
+with the cache warm before every change, then on every call the bot makes during games in the in-process engine.
+Exits with 1 on the first mismatch.
+
+    python3 benchmarks/check_travel_weights.py [--steps 2000] [--games 2]
+"""
+import argparse
+import os
+import random
+import sys
+
+import numpy as np
+
+from common import make_game_map
+
+from hlt import constants
+from hlt.entity import Dropoff, Ship
+from hlt.game_map import GameMap
+from hlt.positionals import Position
+from sim import play_game
+
+BOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MyBot.py")
+MODES = [(cheapest, ignore_enemies, include_claims)
+         for cheapest in (True, False) for ignore_enemies in (True, False) for include_claims in (True, False)]
+
+
+def mismatches(game_map):
+    """
+    :return: The modes in which travel_weights differs from travel_costs
+    """
+    return [mode for mode in MODES if game_map.travel_weights(*mode) != game_map.travel_costs(*mode).ravel().tolist()]
+
+
+def random_change(game_map, rng, ship_ids):
+    """
+    Applies one random change that can affect travel costs.
+    :return: A description of the change
+    """
+    size = game_map.width
+    position = Position(rng.randrange(size), rng.randrange(size))
+    cell = game_map[position]
+    kind = rng.choice(("claim", "release", "reset claims", "own ship", "opponent ship", "clear ship", "halite",
+                       "halite cells", "opponent turn", "structure"))
+    if kind == "claim":
+        cell.mark_claimed(Ship(game_map.me, next(ship_ids), position, 0))
+    elif kind == "release":
+        cell.release_claim()
+    elif kind == "reset claims":
+        game_map.reset_claims()
+    elif kind in ("own ship", "opponent ship"):
+        owner = game_map.me if kind == "own ship" else 1 - game_map.me
+        cell.mark_unsafe(Ship(owner, next(ship_ids), position, rng.randrange(constants.MAX_HALITE)))
+    elif kind == "clear ship":
+        cell.mark_safe()
+    elif kind == "halite":
+        cell.halite_amount = rng.randrange(constants.MAX_HALITE)
+    elif kind == "halite cells":
+        cells = rng.sample(range(size * size), 20)
+        game_map._set_halite_cells(np.array([c // size for c in cells]), np.array([c % size for c in cells]),
+                                   np.array([rng.randrange(constants.MAX_HALITE) for _ in cells]))
+    elif kind == "opponent turn":
+        rows = np.array([(next(ship_ids), rng.randrange(size), rng.randrange(size), rng.randrange(constants.MAX_HALITE))
+                         for _ in range(rng.randrange(1, 30))])
+        game_map._set_enemy_ships([rows])
+    else:
+        cell.structure = Dropoff(rng.choice((game_map.me, 1 - game_map.me)), next(ship_ids), position)
+    return "{} at {}".format(kind, position)
+
+
+def check_changes(steps, seed):
+    rng = random.Random(seed)
+    ship_ids = iter(range(10000, 10000 + 10 * steps))
+    for size in (32, 48, 64):
+        game_map = make_game_map(size, seed=seed + size)
+        for step in range(steps):
+            # Warm the cache, so the change has to keep it up to date
+            game_map.travel_weights(True, False)
+            game_map.travel_weights(False, True)
+            change = random_change(game_map, rng, ship_ids)
+            wrong = mismatches(game_map)
+            if wrong:
+                print("{}x{} step {}: after {} travel_weights is stale for {}".format(size, size, step, change, wrong))
+                return False
+        print("{}x{}: {} changes, no mismatches".format(size, size, steps))
+    return True
+
+
+def check_games(games, turns):
+    original = GameMap.travel_weights
+    calls, wrong = [0], []
+
+    def checked(game_map, cheapest=True, ignore_enemies=False, include_claims=True):
+        weights = original(game_map, cheapest, ignore_enemies, include_claims)
+        calls[0] += 1
+        if weights != game_map.travel_costs(cheapest, ignore_enemies, include_claims).ravel().tolist():
+            wrong.append((cheapest, ignore_enemies, include_claims))
+        return weights
+
+    GameMap.travel_weights = checked
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        for seed in range(games):
+            play_game([BOT] * 2, 32, seed=seed, turn_limit=turns)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        GameMap.travel_weights = original
+    print("{} games: {} calls, {} mismatches".format(games, calls[0], len(wrong)))
+    return not wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=2000, help="Random changes per map size")
+    parser.add_argument("--games", type=int, default=2, help="Games of MyBot against itself")
+    parser.add_argument("--turns", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("HLT_LOG_LEVEL", "OFF")
+    if not check_changes(args.steps, args.seed) or not check_games(args.games, args.turns):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
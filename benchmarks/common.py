@@ -0,0 +1,93 @@
+"""
+Helpers shared by the benchmark scripts: builds synthetic game states without the halite binary.
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hlt import constants
+from hlt.entity import Ship, Shipyard
+from hlt.game_map import GameMap
+from hlt.positionals import Position
+
+DEFAULT_CONSTANTS = {
+    'NEW_ENTITY_ENERGY_COST': 1000,
+    'DROPOFF_COST': 4000,
+    'MAX_ENERGY': 1000,
+    'MAX_TURNS': 400,
+    'EXTRACT_RATIO': 4,
+    'MOVE_COST_RATIO': 10,
+    'INSPIRATION_ENABLED': True,
+    'INSPIRATION_RADIUS': 4,
+    'INSPIRATION_SHIP_COUNT': 2,
+    'INSPIRED_EXTRACT_RATIO': 4,
+    'INSPIRED_BONUS_MULTIPLIER': 2.0,
+    'INSPIRED_MOVE_COST_RATIO': 10,
+}
+
+
+def make_game_map(size, seed=0, num_ships=60, enemy_ratio=0.5, my_id=0):
+    """
+    Builds a square map with random halite and randomly placed ships.
+    :param size: Width and height of the map
+    :param seed: Seed for the random generator
+    :param num_ships: How many ships to scatter over the map
+    :param enemy_ratio: Fraction of those ships owned by the opponent
+    :param my_id: The player id the map is seen from
+    :return: The GameMap
+    """
+    rng = random.Random(seed)
+    constants.load_constants(dict(DEFAULT_CONSTANTS, map_width=size, map_height=size))
+    constants.set_dimensions(size, size)
+
+    halite = [[rng.randint(0, 1000) for _ in range(size)] for _ in range(size)]
+    game_map = GameMap(halite, size, size, my_id)
+
+    shipyard = Shipyard(my_id, -1, Position(size // 4, size // 4))
+    game_map[shipyard.position].structure = shipyard
+
+    for ship_id in range(num_ships):
+        owner = 1 - my_id if rng.random() < enemy_ratio else my_id
+        position = Position(rng.randrange(size), rng.randrange(size))
+        if not game_map[position].is_occupied and not game_map[position].has_structure:
+            game_map[position].mark_unsafe(Ship(owner, ship_id, position, rng.randint(0, 1000)))
+    return game_map
+
+
+def random_queries(game_map, count, seed=0, max_distance=None):
+    """
+    Draws random (source, target) pairs on empty cells.
+    :param game_map: The map to draw from
+    :param count: The number of pairs
+    :param seed: Seed for the random generator
+    :param max_distance: Upper bound on the distance between source and target
+    :return: A list of (source, target) tuples
+    """
+    rng = random.Random(seed)
+    max_distance = max_distance or game_map.width
+    queries = []
+    while len(queries) < count:
+        source = Position(rng.randrange(game_map.width), rng.randrange(game_map.height))
+        target = Position(rng.randrange(game_map.width), rng.randrange(game_map.height))
+        if source == target or game_map.calculate_distance(source, target) > max_distance:
+            continue
+        if game_map[target].is_occupied or game_map[target].has_structure:
+            continue
+        queries.append((source, target))
+    return queries
+
+
+def report(title, rows, columns):
+    """
+    Prints a simple aligned table.
+    :param title: Heading printed above the table
+    :param rows: A list of tuples, one per row
+    :param columns: The column names
+    """
+    print(title)
+    print("".join("{:>16}".format(column) for column in columns))
+    for row in rows:
+        print("".join("{:>16.3f}".format(v) if isinstance(v, float) else "{:>16}".format(v) for v in row))
+    print()
@@ -0,0 +1,166 @@
+import numpy as np
+
+
+def linear_assignment(cost):
+    """
+    Solves the minimum cost assignment of rows to columns from scratch.
+    :param cost: A (rows, columns) cost matrix
+    :return: An array holding the assigned column per row, -1 for rows left unassigned
+    """
+    return Assignment().solve(cost)
+
+
+def greedy_assignment(cost):
+    """
+    Gives each row in turn its cheapest column that is still free. Fast, but not optimal.
+    :param cost: A (rows, columns) cost matrix
+    :return: An array holding the assigned column per row, -1 when no column is left
+    """
+    cost = np.array(cost, dtype=float)
+    assignment = np.full(cost.shape[0], -1, dtype=np.int64)
+    for i, row in enumerate(cost):
+        if len(row) == 0 or np.isinf(row.min()):
+            continue
+        assignment[i] = int(np.argmin(row))
+        cost[:, assignment[i]] = np.inf
+    return assignment
+
+
+class Assignment:
+    """
+    Minimum cost assignment of rows (e.g. ships) to columns (e.g. targets).
+
+    Uses the shortest augmenting path form of the Hungarian algorithm (Jonker-Volgenant), with the inner loop
+    vectorized over columns. When rows and columns are given keys, the pairs and column potentials of the previous
+    solve are reused: pairs that are still optimal with respect to the old potentials start out matched, so only
+    the rows whose situation changed have to be augmented.
+    """
+    def __init__(self):
+        self._pairs = {}
+        self._potentials = {}
+        self._transposed = False
+
+    def solve(self, cost, row_keys=None, column_keys=None):
+        """
+        :param cost: A (rows, columns) cost matrix, use a large finite value for forbidden pairs
+        :param row_keys: Optional hashable identity per row, e.g. ship ids, to warm start the next solve
+        :param column_keys: Optional hashable identity per column, e.g. target positions
+        :return: An array holding the assigned column per row, -1 for rows left unassigned
+        """
+        cost = np.asarray(cost, dtype=float)
+        rows, columns = cost.shape
+        if rows == 0 or columns == 0:
+            return np.full(rows, -1, dtype=np.int64)
+
+        keyed = row_keys is not None and column_keys is not None
+        transposed = rows > columns
+        if transposed:
+            cost = cost.T
+            row_keys, column_keys = column_keys, row_keys
+
+        warm_pairs = []
+        potentials = np.zeros(cost.shape[1])
+        if keyed:
+            if transposed != self._transposed:
+                self._pairs = {value: key for key, value in self._pairs.items()}
+                self._potentials = {}
+            column_index = {key: j for j, key in enumerate(column_keys)}
+            for i, key in enumerate(row_keys):
+                j = column_index.get(self._pairs.get(key))
+                if j is not None:
+                    warm_pairs.append((i, j))
+                    potentials[j] = min(0.0, self._potentials.get(column_keys[j], 0.0))
+
+        column_of_row, potentials = _shortest_augmenting_paths(cost, warm_pairs, potentials)
+
+        if keyed:
+            self._transposed = transposed
+            self._pairs = {row_keys[i]: column_keys[j] for i, j in enumerate(column_of_row)}
+            self._potentials = {column_keys[j]: potentials[j] for j in column_of_row}
+
+        if not transposed:
+            return column_of_row
+
+        # column_of_row holds the original row per original column; invert it
+        assignment = np.full(rows, -1, dtype=np.int64)
+        assignment[column_of_row] = np.arange(columns)
+        return assignment
+
+
+def _shortest_augmenting_paths(cost, warm_pairs, v):
+    """
+    :param cost: A (n, m) cost matrix with n <= m
+    :param warm_pairs: (row, column) pairs to start from; only pairs tight under the potentials are kept
+    :param v: Initial column potentials, 0 for columns not in warm_pairs
+    :return: The column per row and the final column potentials
+    """
+    n, m = cost.shape
+    virtual = m
+
+    # The row potentials follow from the column potentials. A warm pair is kept while it is tight; dropping one
+    # resets its column potential, which can loosen others, so repeat until the kept set is stable.
+    kept = []
+    seen_rows, seen_columns = set(), set()
+    for i, j in warm_pairs:
+        if i not in seen_rows and j not in seen_columns:
+            seen_rows.add(i)
+            seen_columns.add(j)
+            kept.append((i, j))
+
+    while True:
+        warm_columns = [j for _, j in kept]
+        reset = np.ones(m, dtype=bool)
+        reset[warm_columns] = False
+        v[reset] = 0.0
+        u = np.min(cost - v[None, :], axis=1)
+        tight = [(i, j) for i, j in kept if cost[i, j] - v[j] - u[i] <= 1e-9]
+        if len(tight) == len(kept):
+            break
+        kept = tight
+
+    row_of_column = np.full(m + 1, -1, dtype=np.int64)
+    matched = np.zeros(n, dtype=bool)
+    for i, j in kept:
+        row_of_column[j] = i
+        matched[i] = True
+
+    v = np.append(v, 0.0)
+    for i in np.flatnonzero(~matched):
+        row_of_column[virtual] = i
+        column = virtual
+        min_slack = np.full(m, np.inf)
+        way = np.full(m, virtual, dtype=np.int64)
+        used = np.zeros(m + 1, dtype=bool)
+
+        while True:
+            used[column] = True
+            row = row_of_column[column]
+            free = ~used[:m]
+
+            slack = cost[row] - u[row] - v[:m]
+            improved = free & (slack < min_slack)
+            min_slack[improved] = slack[improved]
+            way[improved] = column
+
+            candidates = np.where(free, min_slack, np.inf)
+            next_column = int(np.argmin(candidates))
+            delta = candidates[next_column]
+
+            u[row_of_column[used]] += delta
+            v[used] -= delta
+            min_slack[free] -= delta
+
+            column = next_column
+            if row_of_column[column] < 0:
+                break
+
+        # Flip the alternating path ending in the free column
+        while column != virtual:
+            previous = way[column]
+            row_of_column[column] = row_of_column[previous]
+            column = previous
+
+    column_of_row = np.full(n, -1, dtype=np.int64)
+    assigned = np.flatnonzero(row_of_column[:m] >= 0)
+    column_of_row[row_of_column[assigned]] = assigned
+    return column_of_row, v[:m]
@@ -1,11 +1,140 @@
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+
+class FrameReader:
+    """
+    Reads the engine's messages from a binary stream in bulk.
+
+    Input is pulled in large chunks and only complete lines are split into integer tokens, a whole section of a
+    frame at a time, instead of calling input() and split() for every ship and cell. The time spent waiting for
+    the engine is kept apart, so the cost of parsing itself can be measured. Everything read can be copied to a
+    recording, which replays the game's input later, e.g. in benchmarks/bench_turns.py.
+    """
+    def __init__(self, stream=None, chunk_size=1 << 16, record=None):
+        """
+        :param stream: A binary stream, stdin by default
+        :param chunk_size: The number of bytes to request per read
+        :param record: A binary file every byte read is also written to
+        """
+        self._record = record
+        self._stream = stream if stream is not None else sys.stdin.buffer
+        self._read = getattr(self._stream, "read1", self._stream.read)
+        self._chunk_size = chunk_size
+        self._pending = b""
+        self._tokens = []
+        self._position = 0
+        self.wait_time = 0.0
+
+    def _fill(self):
+        """
+        Appends the next chunk of the stream to the pending bytes, exiting when the engine closed the stream.
+        """
+        start = time.perf_counter()
+        chunk = self._read(self._chunk_size)
+        self.wait_time += time.perf_counter() - start
+        if not chunk:
+            if self._record is not None:
+                self._record.close()
+            logging.shutdown()
+            raise SystemExit("EOF")
+        if self._record is not None:
+            self._record.write(chunk)
+            self._record.flush()
+        self._pending += chunk
+
+    def read_line(self):
+        """
+        :return: The next line, without its line ending
+        """
+        while b"\n" not in self._pending:
+            self._fill()
+        line, self._pending = self._pending.split(b"\n", 1)
+        return line.decode().rstrip("\r")
+
+    def read_ints(self, count):
+        """
+        Reads the next count integers, regardless of how they are spread over lines.
+        :param count: The number of integers to read
+        :return: A list of ints
+        """
+        if self._position == len(self._tokens):
+            self._tokens = []
+            self._position = 0
+
+        while len(self._tokens) - self._position < count:
+            end = self._pending.rfind(b"\n")
+            if end < 0:
+                self._fill()
+                continue
+            self._tokens.extend(self._pending[:end].split())
+            self._pending = self._pending[end + 1:]
+
+        start = self._position
+        self._position += count
+        return list(map(int, self._tokens[start:self._position]))
+
+    def read_rows(self, rows, columns):
+        """
+        Reads rows of integers into an array.
+        :param rows: The number of rows
+        :param columns: The number of integers per row
+        :return: A (rows, columns) int64 array
+        """
+        return np.array(self.read_ints(rows * columns), dtype=np.int64).reshape(rows, columns)
+
+    def read_frame(self, num_players):
+        """
+        Reads the state of a single turn.
+        :param num_players: The number of players in the game
+        :return: The turn number, a list of (player id, halite, ships, dropoffs) per player with ships as rows of
+                 (id, x, y, halite) and dropoffs as rows of (id, x, y), and the changed cells as rows of (x, y, halite)
+        """
+        turn_number, = self.read_ints(1)
+        players = []
+        for _ in range(num_players):
+            player_id, num_ships, num_dropoffs, halite = self.read_ints(4)
+            ships = self.read_rows(num_ships, 4)
+            dropoffs = self.read_rows(num_dropoffs, 3)
+            players.append((player_id, halite, ships, dropoffs))
+        num_cells, = self.read_ints(1)
+        return turn_number, players, self.read_rows(num_cells, 3)
+
+
+RECORD_VARIABLE = "HLT_RECORD"
+
+_reader = None
+
+
+def get_reader():
+    """
+    :return: The FrameReader all input is read through, reading stdin unless another one was set. When the
+             HLT_RECORD environment variable names a file, stdin is recorded to it.
+    """
+    global _reader
+    if _reader is None:
+        path = os.environ.get(RECORD_VARIABLE)
+        _reader = FrameReader(record=open(path, "wb") if path else None)
+    return _reader
+
+
+def set_reader(reader):
+    """
+    Makes all input come from the given reader, e.g. an in-memory stream.
+    :param reader: The FrameReader to use
+    """
+    global _reader
+    _reader = reader
+
+
 # Placed here to avoid circular imports
 def read_input():
     """
-    Reads input from stdin, shutting down logging and exiting if an EOFError occurs
+    Reads a line of input, shutting down logging and exiting if the input ended
     :return: input read
     """
-    try:
-        return input()
-    except EOFError as eof:
-        logging.shutdown()
-        raise SystemExit(eof)
+    return get_reader().read_line()
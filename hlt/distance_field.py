@@ -0,0 +1,155 @@
+import heapq
+
+import numpy as np
+
+from . import constants
+from .positionals import Direction, get_position_table
+
+
+class DistanceField:
+    """
+    Distances from every cell of the map to the nearest of a set of source cells, e.g. all friendly structures.
+
+    The wrap-around Manhattan distance is computed up front. The halite-weighted cost of travelling to the
+    nearest source, and the first step of that cheapest route, are computed on first use by a multi-source
+    Dijkstra. Every lookup afterwards is O(1).
+    """
+    def __init__(self, game_map, sources):
+        self.width = game_map.width
+        self.height = game_map.height
+        self.sources = list(sources)
+        self._game_map = game_map
+        self._table = get_position_table(self.width, self.height)
+
+        if self.sources:
+            stacked = np.stack([game_map.distance_array(source) for source in self.sources])
+            # Index into sources of the nearest source, the first source wins ties
+            self.nearest_source = np.argmin(stacked, axis=0)
+            self.distances = np.min(stacked, axis=0)
+        else:
+            self.nearest_source = np.full((self.height, self.width), -1, dtype=np.int64)
+            self.distances = np.full((self.height, self.width), constants.INF, dtype=np.int64)
+
+        self._costs = None
+        self._steps = None
+        self._towards = None
+        self._origins = None
+
+    def distance(self, position):
+        """
+        :param position: The position to look up
+        :return: The Manhattan distance to the nearest source
+        """
+        return int(self.distances[position.y, position.x])
+
+    def nearest(self, position):
+        """
+        :param position: The position to look up
+        :return: The source closest to the position, or None without sources
+        """
+        index = self.nearest_source[position.y, position.x]
+        return self.sources[index] if index >= 0 else None
+
+    def cheapest(self, position):
+        """
+        :param position: The position to look up
+        :return: The source the cheapest route from the position leads to, which need not be the nearest one, or
+                 None without sources
+        """
+        self._ensure_costs()
+        index = self._origins[position.y * self.width + position.x]
+        return self.sources[index] if index >= 0 else None
+
+    def cost(self, position):
+        """
+        :param position: The position to look up
+        :return: The halite spent on move costs along the cheapest route to a source
+        """
+        self._ensure_costs()
+        return self._costs[position.y * self.width + position.x]
+
+    def next_step(self, position):
+        """
+        :param position: The position to look up
+        :return: The Direction of the first move on the cheapest route to a source
+        """
+        self._ensure_costs()
+        index = position.y * self.width + position.x
+        towards = self._towards[index]
+        if towards < 0 or towards == index:
+            return Direction.Still
+        return self._direction(index, towards)
+
+    def downhill(self, position):
+        """
+        All moves that bring a ship closer to a source along cheapest routes, best first.
+        :param position: The position to look up
+        :return: A list of Directions
+        """
+        self._ensure_costs()
+        index = position.y * self.width + position.x
+        here = (self._costs[index], self._steps[index])
+
+        candidates = []
+        for direction, neighbour in zip(Direction.get_all_cardinals(), self._table.cardinal_indices[index]):
+            key = (self._costs[neighbour], self._steps[neighbour])
+            if key < here:
+                candidates.append((key, direction))
+        candidates.sort(key=lambda candidate: candidate[0])
+        return [direction for _, direction in candidates]
+
+    def _direction(self, index, neighbour):
+        for direction, candidate in zip(Direction.get_all_cardinals(), self._table.cardinal_indices[index]):
+            if candidate == neighbour:
+                return direction
+        return Direction.Still
+
+    def _ensure_costs(self):
+        """
+        Runs the multi-source Dijkstra. Leaving a cell costs 1/MOVE_COST_RATIO of its halite; among routes of
+        equal cost the one with the fewest steps wins.
+        """
+        if self._costs is not None:
+            return
+
+        size = self.width * self.height
+        unreached = constants.INF * 32
+        move_cost = (self._game_map.halite // constants.MOVE_COST_RATIO).ravel().tolist()
+        neighbours = self._table.cardinal_indices
+
+        costs = [unreached] * size
+        steps = [unreached] * size
+        towards = [-1] * size
+        # Index into sources of the source each route leads to
+        origins = [-1] * size
+
+        heap = []
+        for i, source in enumerate(self.sources):
+            index = source.y * self.width + source.x
+            costs[index] = 0
+            steps[index] = 0
+            towards[index] = index
+            origins[index] = i
+            heap.append((0, 0, index))
+        heapq.heapify(heap)
+
+        while heap:
+            node_cost, node_steps, node = heapq.heappop(heap)
+            if node_cost > costs[node] or (node_cost == costs[node] and node_steps > steps[node]):
+                continue  # Stale entry
+
+            for neighbour in neighbours[node]:
+                neighbour_cost = node_cost + move_cost[neighbour]
+                neighbour_steps = node_steps + 1
+                if neighbour_cost < costs[neighbour] or \
+                        (neighbour_cost == costs[neighbour] and neighbour_steps < steps[neighbour]):
+                    costs[neighbour] = neighbour_cost
+                    steps[neighbour] = neighbour_steps
+                    towards[neighbour] = node
+                    origins[neighbour] = origins[node]
+                    heapq.heappush(heap, (neighbour_cost, neighbour_steps, neighbour))
+
+        self._costs = costs
+        self._steps = steps
+        self._towards = towards
+        self._origins = origins
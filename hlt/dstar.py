@@ -0,0 +1,128 @@
+import heapq
+
+import numpy as np
+
+from . import constants, pathfinding
+from .positionals import get_position_table
+
+
+class DStarLite:
+    """
+    The cost to go from every cell of a search box to one target, repaired incrementally as travel costs change.
+
+    This is the search of D* Lite: rooted at the target, with a g value and a one-step lookahead rhs value per cell,
+    so when the weights of some cells change only those cells and the cells whose cheapest route runs through them
+    are expanded again, however large the box. Cells that got cheaper and cells that got more expensive are both
+    repaired, so the costs stay exact. Because it is rooted at the target it stays valid while the ship moves.
+    Unlike textbook D* Lite it settles every cell of the box instead of stopping once the ship's cell is consistent,
+    as windowed_astar looks the cost to go up for every cell it expands; that also makes the key modifier for a
+    moving start unnecessary.
+
+    Stepping onto a cell costs one plus its weight, as in windowed_astar. Cells with a weight of INF are never
+    stepped onto, but do get a cost to go themselves. The first search is the plain backward Dijkstra of
+    windowed_astar, which leaves every cell consistent, so only repairs pay for the bookkeeping.
+    """
+    def __init__(self, game_map, target, inside, weight, mode=None):
+        """
+        :param game_map: The game map to search on
+        :param target: Flat index of the target
+        :param inside: The set of flat indices of the search box
+        :param weight: The flat list of the weight of every cell
+        :param mode: Any hashable of the options the weights were made with, kept for the owner to compare
+        """
+        size = game_map.width * game_map.height
+        self.target = target
+        self.inside = inside
+        self.mode = mode
+        self.epoch = game_map.epoch
+        self.expanded = 0
+        self._cells = np.fromiter(inside, dtype=np.int64, count=len(inside))
+        neighbours = get_position_table(game_map.width, game_map.height).cardinal_indices
+        # The neighbours of every cell of the box within the box, so repairs never test membership
+        self._neighbours = {cell: [n for n in neighbours[cell] if n in inside] for cell in inside}
+        self._unreached = constants.INF * 32
+        self._weight = list(weight)
+        self._g = [self._unreached] * size
+        for cell, cost in pathfinding._cost_to_go(neighbours, self._weight, inside, target).items():
+            self._g[cell] = cost
+        self._rhs = list(self._g)
+
+    def __getitem__(self, cell):
+        """
+        :param cell: Flat index of a cell in the box
+        :return: The cost of the cheapest route from the cell to the target within the box
+        """
+        return self._g[cell]
+
+    def update(self, weight, epochs, epoch, max_changed=None):
+        """
+        Repairs the costs to go after the weights changed. Only the cells of the box stamped since the last update
+        are compared, going by the per-cell epochs of the GameMap.
+        :param weight: The flat list of the new weight of every cell
+        :param epochs: Flat arrays of the epoch every cell last changed in, one per kind of change the weights see
+        :param epoch: The epoch of the map now
+        :param max_changed: How many changed cells to repair at most, None for no limit
+        :return: The number of cells in the box whose weight changed, or None when that is over max_changed and
+                 nothing was repaired, which leaves the field to be replaced
+        """
+        touched = np.zeros(len(self._cells), dtype=bool)
+        for cell_epochs in epochs:
+            touched |= cell_epochs[self._cells] > self.epoch
+        changed = [cell for cell in self._cells[touched].tolist() if weight[cell] != self._weight[cell]]
+        if max_changed is not None and len(changed) > max_changed:
+            return None
+        self.epoch = epoch
+        if not changed:
+            return 0
+
+        for cell in changed:
+            self._weight[cell] = weight[cell]
+        # The weight of a cell only matters to the neighbours stepping onto it
+        self._compute({neighbour for cell in changed for neighbour in self._neighbours[cell]})
+        return len(changed)
+
+    def _compute(self, dirty):
+        """
+        Recomputes the lookahead of some cells, then expands the inconsistent cells cheapest first until every cell
+        of the box is consistent again.
+        :param dirty: The cells whose lookahead may have changed
+        """
+        g = self._g
+        rhs = self._rhs
+        weight = self._weight
+        neighbours = self._neighbours
+        target = self.target
+        unreached = self._unreached
+        blocked = constants.INF
+        heap = []
+
+        while True:
+            for cell in dirty:
+                if cell != target:
+                    best = unreached
+                    for neighbour in neighbours[cell]:
+                        if weight[neighbour] < blocked:
+                            cost = g[neighbour] + 1 + weight[neighbour]
+                            if cost < best:
+                                best = cost
+                    rhs[cell] = best
+                if g[cell] != rhs[cell]:
+                    heapq.heappush(heap, (min(g[cell], rhs[cell]), cell))
+            if not heap:
+                return
+
+            key, cell = heapq.heappop(heap)
+            while g[cell] == rhs[cell] or key != min(g[cell], rhs[cell]):
+                # Stale entry
+                if not heap:
+                    return
+                key, cell = heapq.heappop(heap)
+            self.expanded += 1
+
+            if g[cell] > rhs[cell]:
+                g[cell] = rhs[cell]
+                dirty = neighbours[cell] if weight[cell] < blocked else ()
+            else:
+                # Got more expensive: forget the cost and let the lookahead find the new one
+                g[cell] = unreached
+                dirty = [cell] + neighbours[cell] if weight[cell] < blocked else (cell,)
@@ -58,14 +58,18 @@ class Ship(Entity):
     """
     Ship class to house ship entities
     """
-    __ships = {}
-
     def __init__(self, owner, id, position, halite_amount):
         super().__init__(owner, id, position)
         self.halite_amount = halite_amount
         self.task = Task.Gather
         self.next_move = None
 
+        # Space-time plan kept across turns: the positions from now on, and the target they lead to
+        self.plan = []
+        self.plan_target = None
+        # The DStarLite towards the plan's target, kept while travelling far
+        self.cost_to_go = None
+
     def set_task(self, task):
         self.task = task
 
@@ -86,7 +90,7 @@ class Ship(Entity):
         Return a move to move this ship in a direction without
         checking for collisions.
         """
-        logging.debug(f"# {self.id} || {self.position} || {self.next_move} || {self.task}")
+        logging.debug("# %s || %s || %s || %s", self.id, self.position, self.next_move, self.task)
         raw_direction = direction
         if not isinstance(direction, str) or direction not in "nsewo":
             raw_direction = Direction.convert(direction)
@@ -98,30 +102,6 @@ class Ship(Entity):
         """
         return "{} {} {}".format(commands.MOVE, self.id, commands.STAY_STILL)
 
-    @staticmethod
-    def _generate(player_id):
-        """
-        Creates an instance of a ship for a given player given the engine's input.
-        If an instance with the same ship.id has previously been generated, that instance will be returned.
-        :param player_id: The id of the player who owns this ship
-        :return: The ship id and ship object
-        """
-        # Read game engine input
-        ship_id, x_position, y_position, halite = map(int, read_input().split())
-
-        # Check storage to see if ship already exists
-        # If the ship exists, update its position and halite
-        if ship_id in Ship.__ships.keys():    
-            old_ship = Ship.__ships[ship_id]
-            old_ship.position = Position(x_position, y_position)
-            old_ship.halite_amount = halite
-            return ship_id, old_ship
-        else:
-            # Otherwise, create and return a new instance
-            new_ship = Ship(player_id, ship_id, Position(x_position, y_position), halite)
-            Ship.__ships[ship_id] = new_ship
-            return ship_id, new_ship
-
     def __repr__(self):
         return "{}(id={}, {}, cargo={} halite)".format(self.__class__.__name__,
                                                        self.id,
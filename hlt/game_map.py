@@ -1,26 +1,77 @@
 import queue
 import logging
+import time
+from bisect import bisect_left
+from collections import Counter
 from math import floor
 
-from . import constants
+import numpy as np
+
+from . import constants, pathfinding
 from .entity import Entity, Shipyard, Ship, Dropoff
 from .player import Player
-from .positionals import Direction, Position
+from .positionals import Direction, Position, get_position_table
 from .common import read_input
+from .distance_field import DistanceField
+from .dstar import DStarLite
+from .path_cache import PathCache
+from .profiler import Profiler
+from .reservations import ReservationTable
+from .summed_area import SummedAreaTable, diamond_convolution
+from .threat_field import ThreatField
 from .task import Task
 
 class MapCell:
-    """A cell on the game map."""
-    def __init__(self, position, halite_amount):
+    """
+    A cell on the game map.
+
+    A thin view onto the arrays of its GameMap; reading or assigning an attribute reads or writes the map.
+    """
+    __slots__ = ('position', '_map', '_index')
+
+    def __init__(self, position, game_map):
         self.position = position
-        self.halite_amount = halite_amount
-        self.ship = None
-        self.structure = None
-        self.claim = None
+        self._map = game_map
+        self._index = (position.y, position.x)
+
+    @property
+    def halite_amount(self):
+        return int(self._map.halite[self._index])
+
+    @halite_amount.setter
+    def halite_amount(self, amount):
+        self._map._set_halite(self._index, amount)
+
+    @property
+    def ship(self):
+        return self._map.ships[self._index]
+
+    @ship.setter
+    def ship(self, ship):
+        self._map._set_ship(self._index, ship)
+
+    @property
+    def structure(self):
+        return self._map.structures[self._index]
+
+    @structure.setter
+    def structure(self, structure):
+        self._map._set_structure(self._index, structure)
+
+    @property
+    def claim(self):
+        return self._map.claims[self._index]
+
+    @claim.setter
+    def claim(self, claim):
+        self._map.claims[self._index] = claim
+        self._map.claimed[self._index] = claim is not None
+        self._map._touch(self._index, rebuild=False)
+        self._map._apply_claims([self._index[0] * self._map.width + self._index[1]])
 
     @property
     def is_claimed(self):
-        return self.claim is not None
+        return bool(self._map.claimed[self._index])
 
     @property
     def is_empty(self):
@@ -34,14 +85,24 @@ class MapCell:
         """
         :return: Whether this cell has any ships
         """
-        return self.ship is not None
+        return bool(self._map.ship_owner[self._index] != -1)
+
+    @property
+    def is_hostile(self):
+        """
+        :return: Whether this cell holds an opponent ship, or is empty but an opponent ship can move onto it
+        """
+        owner = self._map.ship_owner[self._index]
+        if owner != -1:
+            return bool(owner != self._map.me)
+        return bool(self._map.threat.contested[self._index])
 
     @property
     def has_structure(self):
         """
         :return: Whether this cell has any structures
         """
-        return self.structure is not None
+        return bool(self._map.structure_owner[self._index] != -1)
 
     @property
     def structure_type(self):
@@ -97,15 +158,138 @@ class GameMap:
     Can be indexed by a position, or by a contained entity.
     Coordinates start at 0. Coordinates are normalized for you
     """
-    def __init__(self, cells, width, height, my_id):
+    def __init__(self, halite, width, height, my_id):
         self.width = width
         self.height = height
-        self._cells = cells
+
+        # Structure-of-arrays storage indexed [y, x]; the MapCells are views onto these arrays
+        self.halite = np.array(halite, dtype=np.int64).reshape(height, width)
+        self.ship_owner = np.full((height, width), -1, dtype=np.int64)
+        self.ships = np.full((height, width), None, dtype=object)
+        self.structure_owner = np.full((height, width), -1, dtype=np.int64)
+        self.structures = np.full((height, width), None, dtype=object)
+        self.claimed = np.zeros((height, width), dtype=bool)
+        self.claims = np.full((height, width), None, dtype=object)
+
+        self._positions = get_position_table(width, height).positions
+
+        # Wrapped distance along each axis between any two coordinates, e.g. _wrapped_dx[x1, x2]
+        dx = np.abs(np.arange(width)[:, None] - np.arange(width)[None, :])
+        dy = np.abs(np.arange(height)[:, None] - np.arange(height)[None, :])
+        self._wrapped_dx = np.minimum(dx, width - dx)
+        self._wrapped_dy = np.minimum(dy, height - dy)
+        self._cells = [[MapCell(self._positions[y * width + x], self) for x in range(width)]
+                       for y in range(height)]
 
         self.me = my_id
-        self.max_halite = 0
-        self.total_halite = 0
+
+        # Running statistics, maintained incrementally from the cells that change
+        self.total_halite = int(self.halite.sum())
+        self._halite_counts = Counter(self.halite.ravel().tolist())
+        self.max_halite = max(self._halite_counts)
         self.enemy_dropoffs = []
+        self._enemy_structure_keys = []
+        self._ship_cells = []
+
+        # Per-turn distance fields, built on first use
+        self._friendly_field = None
+        self._enemy_field = None
+
+        # Area sums of halite, rebuilt on first use after the halite changed
+        self._halite_sums = None
+
+        # Opponent ships per cell, and the inspiration and threat maps derived from them on first use each turn
+        self.enemy_ships = np.zeros((height, width), dtype=np.int64)
+        self.enemy_risk = np.zeros((height, width), dtype=np.int64)
+        self._enemy_density = {}
+        self._inspired = None
+        self._effective_extraction = None
+        self._threat = None
+
+        # The cells within one step of my structures, rebuilt when a structure changes
+        self._base_zone = None
+
+        # travel_costs per weighting, as flat lists without and with claims, dropped by
+        # _touch when a cost other than a claim changes
+        self._travel_weights = {}
+
+        # Every change to a cell's travel cost bumps the epoch and stamps the cell with it, so cached routes can tell
+        # whether any of their cells changed since they were found. Changes to halite, claims and structures go to
+        # cell_epochs, changes from opponent ships, which searches ignoring enemies do not see, to enemy_epochs.
+        self.epoch = 0
+        self.cell_epochs = np.zeros((height, width), dtype=np.int64)
+        self.enemy_epochs = np.zeros((height, width), dtype=np.int64)
+        self.path_cache = PathCache()
+
+        # Disabled unless the Game hands over its own
+        self.profiler = Profiler()
+
+        # Where my ships intend to be over the next turns, rebuilt every turn
+        self.reservations = ReservationTable()
+
+    def _set_halite(self, index, amount):
+        """
+        Writes the halite of a single cell, keeping total_halite and max_halite up to date.
+        :param index: The (y, x) index of the cell
+        :param amount: The new halite amount
+        """
+        old_amount = int(self.halite[index])
+        if old_amount == amount:
+            return
+        self.halite[index] = amount
+        self._touch(index)
+        self._halite_sums = None
+        self._effective_extraction = None
+        self.total_halite += amount - old_amount
+
+        counts = self._halite_counts
+        counts[amount] += 1
+        counts[old_amount] -= 1
+        if amount > self.max_halite:
+            self.max_halite = amount
+        elif old_amount == self.max_halite:
+            while counts[self.max_halite] == 0 and self.max_halite > 0:
+                self.max_halite -= 1
+
+    def _set_ship(self, index, ship):
+        """
+        Places a ship on a cell, remembering the cell so the next update only has to clear occupied cells.
+        :param index: The (y, x) index of the cell
+        :param ship: The ship, or None to clear the cell
+        """
+        self.ships[index] = ship
+        # Only opponent ships block cells
+        opponent = self.ship_owner[index] not in (-1, self.me) or (ship is not None and ship.owner != self.me)
+        self._touch(index, self.enemy_epochs, rebuild=opponent)
+        if ship is None:
+            self.ship_owner[index] = -1
+        else:
+            self.ship_owner[index] = ship.owner
+            self._ship_cells.append(index)
+
+    def _set_structure(self, index, structure):
+        """
+        Places a structure on a cell, registering it in enemy_dropoffs when it belongs to an opponent.
+        :param index: The (y, x) index of the cell
+        :param structure: The structure
+        """
+        if self.structures[index] is not structure:
+            self._friendly_field = None
+            self._enemy_field = None
+            self._base_zone = None
+            self._threat = None
+            # A new structure can change the threat anywhere in my base zone, and is rare enough to touch all
+            self._touch(Ellipsis)
+            self._touch(Ellipsis, self.enemy_epochs)
+        self.structures[index] = structure
+        self.structure_owner[index] = -1 if structure is None else structure.owner
+
+        if structure is not None and structure.owner != self.me:
+            keys = self._enemy_structure_keys
+            slot = bisect_left(keys, index)
+            if slot == len(keys) or keys[slot] != index:
+                keys.insert(slot, index)
+                self.enemy_dropoffs.insert(slot, Position(index[1], index[0]))
 
     def __getitem__(self, location):
         """
@@ -114,8 +298,7 @@ class GameMap:
         :return: the contents housing that cell or entity
         """
         if isinstance(location, Position):
-            location = self.normalize(location)
-            return self._cells[location.y][location.x]
+            return self._cells[location.y % self.height][location.x % self.width]
         elif isinstance(location, Entity):
             return self._cells[location.position.y][location.position.x]
         return None
@@ -134,6 +317,33 @@ class GameMap:
         return min(resulting_position.x, self.width - resulting_position.x) + \
             min(resulting_position.y, self.height - resulting_position.y)
 
+    def distance_array(self, position):
+        """
+        Compute the Manhattan distance from a location to every cell of the map.
+        Accounts for wrap-around.
+        :param position: The position from where to calculate
+        :return: A (height, width) array of distances
+        """
+        return self._wrapped_dy[position.y % self.height][:, None] + self._wrapped_dx[position.x % self.width][None, :]
+
+    def pairwise_distances(self, sources, targets):
+        """
+        Compute the Manhattan distance between every source and every target.
+        Accounts for wrap-around.
+        :param sources: A list of positions
+        :param targets: A list of positions, or a (ys, xs) tuple of coordinate arrays
+        :return: A (len(sources), len(targets)) array of distances
+        """
+        source_xs = np.array([source.x for source in sources], dtype=np.int64)
+        source_ys = np.array([source.y for source in sources], dtype=np.int64)
+        if isinstance(targets, tuple):
+            target_ys, target_xs = targets
+        else:
+            target_xs = np.array([target.x for target in targets], dtype=np.int64)
+            target_ys = np.array([target.y for target in targets], dtype=np.int64)
+        return self._wrapped_dx[source_xs[:, None], target_xs[None, :]] + \
+            self._wrapped_dy[source_ys[:, None], target_ys[None, :]]
+
     def normalize(self, position):
         """
         Normalized the position within the bounds of the toroidal map.
@@ -143,7 +353,7 @@ class GameMap:
         :param position: A position object.
         :return: A normalized position object fitting within the bounds of the map
         """
-        return Position(position.x % self.width, position.y % self.height)
+        return self._positions[(position.y % self.height) * self.width + position.x % self.width]
 
     @staticmethod
     def _get_target_direction(source, target):
@@ -193,6 +403,9 @@ class GameMap:
         self[new_position].mark_claimed(ship)
         ship.set_next_move(direction)
 
+        if not self.reservations.holds(ship.id):
+            self.reservations.reserve(ship.id, [self._flat(ship.position), self._flat(new_position)])
+
     def naive_navigate(self, ship, destination):
         """
         Returns a singular safe move towards the destination.
@@ -205,14 +418,182 @@ class GameMap:
         # does that
         for direction in self.get_unsafe_moves(ship.position, destination):
             target_pos = ship.position.directional_offset(direction)
-            if not self[target_pos].is_occupied:
+            if not self[target_pos].is_occupied and not self[target_pos].is_hostile:
                 self[target_pos].mark_unsafe(ship)
                 return direction
 
         return Direction.Still
 
-    def navigate(self, source, target, offset=1, ignore_dropoff=False, cheapest=True, ignore_enemies=False):
-        direction = self.dijkstra_a_to_b(source, target, offset=offset, cheapest=cheapest, ignore_enemies=ignore_enemies)
+    def navigate(self, source, target, offset=1, ignore_dropoff=False, cheapest=True, ignore_enemies=False,
+                 search="dijkstra"):
+        """
+        Returns a move along the cheapest path, reusing the path found on an earlier turn while its cells are
+        unchanged. Lookups are timed as path_hit and path_miss spans in the profiler.
+        :param source: The position of the ship
+        :param target: The position the ship is heading to
+        :param offset: How far the search box extends beyond source and target
+        :param ignore_dropoff: Whether the ship may crash onto structures
+        :param cheapest: Weigh cells by halite (True) or by missing halite (False)
+        :param ignore_enemies: Whether enemy ships block the path
+        :param search: The search finding new paths, "dijkstra" or "astar", see pathfinding.PATH_SEARCHES. Both
+                       find equally cheap paths, A* expands fewer cells to do so
+        :return: A direction.
+        """
+        start = time.perf_counter_ns()
+        mode = (offset, cheapest, ignore_enemies)
+        target_index = self._flat(target)
+        epochs = (self.cell_epochs,) if ignore_enemies else (self.cell_epochs, self.enemy_epochs)
+        path = self.path_cache.get([e.reshape(-1) for e in epochs], self._flat(source), target_index, mode)
+        if path is None:
+            path = pathfinding.PATH_SEARCHES[search](self, source, target, offset=offset, cheapest=cheapest,
+                                                     ignore_enemies=ignore_enemies)
+            if path[-1] == target_index:
+                self.path_cache.put(path, mode, self.epoch)
+            self.profiler.record("path_miss", start)
+        else:
+            self.profiler.record("path_hit", start)
+
+        direction = pathfinding.step_direction(self, path[0], path[1]) if len(path) > 1 else Direction.Still
+        return self._resolve_move(source, target, direction, ignore_dropoff)
+
+    def plan_move(self, ship, target, offset=1, ignore_dropoff=False, cheapest=True, ignore_enemies=False,
+                  window=8, long_haul=None):
+        """
+        Returns a move along a space-time plan that avoids the reservations of my other ships.
+
+        The plan is kept on the ship and followed on later turns as long as it still heads for the same target and
+        its cells are still free, so only ships whose plan broke are searched again. With long_haul set, ships
+        sent at least that far also keep the cost to go towards their target in a DStarLite until they arrive or the
+        target changes. It is repaired where travel costs changed instead of searched again.
+        :param ship: The ship to move
+        :param target: The position the ship is heading to
+        :param offset: How far the search box extends beyond ship and target
+        :param ignore_dropoff: Whether the ship may crash onto structures
+        :param cheapest: Weigh cells by halite (True) or by missing halite (False)
+        :param ignore_enemies: Whether enemy ships block the path
+        :param window: How many turns ahead to plan
+        :param long_haul: The distance from which the cost to go is kept across turns, None to never keep it
+        :return: A direction.
+        """
+        source = ship.position
+        path = self._follow_plan(ship, target, window)
+        if path is None:
+            cost_to_go = None
+            field = ship.cost_to_go
+            if long_haul is not None and (self.calculate_distance(source, target) >= long_haul or
+                                          field is not None and field.target == self._flat(target)):
+                # Kept for the whole trip, also once the ship got closer than long_haul
+                cost_to_go = self._long_haul_cost_to_go(ship, target, offset, cheapest, ignore_enemies)
+            else:
+                ship.cost_to_go = None
+            path = pathfinding.windowed_astar(self, source, target, self.reservations, ship.id, window=window,
+                                              offset=offset, cheapest=cheapest, ignore_enemies=ignore_enemies,
+                                              cost_to_go=cost_to_go)
+
+        ship.plan = [self._positions[cell] for cell in path]
+        ship.plan_target = target
+        self.reservations.release(ship.id)
+        self.reservations.reserve(ship.id, path, hold_until=window if path[-1] == self._flat(target) else None)
+
+        direction = pathfinding.step_direction(self, path[0], path[1]) if len(path) > 1 else Direction.Still
+        resolved = self._resolve_move(source, target, direction, ignore_dropoff)
+
+        if resolved != direction:
+            # Overruled by the safety checks, the plan no longer holds
+            ship.plan = []
+            self.reservations.release(ship.id)
+            self.reservations.reserve(ship.id, [path[0], self._flat(source.directional_offset(resolved))])
+        return resolved
+
+    def _long_haul_cost_to_go(self, ship, target, offset, cheapest, ignore_enemies):
+        """
+        :return: The ship's DStarLite towards the target, repaired for this turn's travel costs, or a new one when
+                 the target or search options changed, the search box outgrew it, or over a quarter of its cells
+                 changed weight, where searching again is cheaper than the repair
+        """
+        start = time.perf_counter_ns()
+        xs = pathfinding.search_window(ship.position.x, target.x, self.width, offset)
+        ys = pathfinding.search_window(ship.position.y, target.y, self.height, offset)
+        inside = {y * self.width + x for x in xs for y in ys}
+        weight = self.travel_weights(cheapest, ignore_enemies, include_claims=False)
+        mode = (offset, cheapest, ignore_enemies)
+
+        field = ship.cost_to_go
+        repaired = None
+        if field is not None and field.target == self._flat(target) and field.mode == mode and \
+                inside <= field.inside:
+            epochs = (self.cell_epochs,) if ignore_enemies else (self.cell_epochs, self.enemy_epochs)
+            repaired = field.update(weight, [e.reshape(-1) for e in epochs], self.epoch, len(field.inside) // 4)
+        if repaired is not None:
+            self.profiler.record("cost_to_go_repair", start)
+        else:
+            field = ship.cost_to_go = DStarLite(self, self._flat(target), inside, weight, mode)
+            self.profiler.record("cost_to_go_build", start)
+        return field
+
+    def _follow_plan(self, ship, target, window):
+        """
+        :return: The remaining cells of the ship's plan if it can be followed this turn, otherwise None
+        """
+        plan = ship.plan
+        if not plan or ship.plan_target != target:
+            return None
+
+        # A ship that was held back is still at the start of its plan, otherwise it is one step further
+        if len(plan) > 1 and plan[1] == ship.position:
+            plan = plan[1:]
+        elif plan[0] != ship.position:
+            return None
+
+        path = [self._flat(position) for position in plan]
+        target_index = self._flat(target)
+        if len(path) == 1 and path[0] != target_index:
+            return None
+        if path[-1] != target_index and len(path) <= window // 2:
+            return None  # Plan ahead again before the horizon runs out
+
+        if len(path) > 1:
+            step = self[plan[1]]
+            if path[1] != path[0] and (step.is_claimed or step.has_structure or step.is_hostile):
+                return None
+        for step in range(len(path) - 1):
+            if not self.reservations.can_move(path[step], path[step + 1], step, ship.id):
+                return None
+        return path
+
+    def _flat(self, position):
+        return (position.y % self.height) * self.width + position.x % self.width
+
+    def navigate_home(self, source, ignore_dropoff=False):
+        """
+        Returns a move towards the nearest friendly structure by following the per-turn friendly_field,
+        instead of searching a path for every returning ship.
+        :param source: The position of the returning ship
+        :param ignore_dropoff: Whether the ship may crash onto the structure (endgame)
+        :return: A direction.
+        """
+        field = self.friendly_field
+        # The structure the field's downhill moves lead to, the nearest one can lie the other way
+        target = field.cheapest(source)
+        if target is None:
+            return Direction.Still
+
+        for direction in field.downhill(source):
+            cell = self[source.directional_offset(direction)]
+            if cell.is_claimed or (cell.is_hostile and not cell.has_structure):
+                continue
+            return self._resolve_move(source, target, direction, ignore_dropoff)
+        return self.safe_greedy_move(source, target)
+
+    def _resolve_move(self, source, target, direction, ignore_dropoff=False):
+        """
+        Checks a planned move against occupied and claimed cells around structures, falling back to a greedy move.
+        :param source: The position of the ship
+        :param target: The position the ship is heading to
+        :param direction: The planned direction
+        :param ignore_dropoff: Whether the ship may crash onto structures
+        :return: A direction.
+        """
         new_position = source.directional_offset(direction)
         # logging.debug(f"#{self[source].ship.id} || source: {source} and target: {target} and new position: {new_position}")
 
@@ -239,30 +620,29 @@ class GameMap:
         for s in structure_positions:
             structure_cardinals.extend(s.get_surrounding_cardinals())
 
-        if self[new_position].is_occupied:
+        # Cells an opponent ship can move onto count as occupied by it
+        hostile = self[new_position].is_hostile
+        if self[new_position].is_occupied or hostile:
           # logging.debug(f"new position is occupied")
 
             if new_position in structure_cardinals:
               # logging.debug(f"new position in structure cardinals")
-                if self[new_position].ship.owner != self.me and not self[new_position].is_claimed:
+                if hostile and not self[new_position].is_claimed:
                   # logging.debug(f"returning same direction")
                     return direction
-                elif self[new_position].ship.owner == self.me and not self[new_position].is_claimed:
+                elif not hostile and not self[new_position].is_claimed:
                   # logging.debug(f"I own the ship there and the position is not yet claimed")
                     return direction
                 else:
                   # logging.debug(f"returning greedy move")
                     return self.safe_greedy_move(source, target)
             else:
-                if self[new_position].ship.owner == self.me and not self[new_position].is_claimed:
+                if not hostile and not self[new_position].is_claimed:
                   # logging.debug(f"I own that ship and the position is NOT claimed")
                     return direction
                 elif self[source].ship.task == Task.EndgameHunt and not self[new_position].is_claimed:
                   # logging.debug(f"Ships task is EngameHunt and the new position is NOT claimed")
                     return direction
-                elif self[new_position].ship.owner == self.me and not self[new_position].is_claimed:
-                  # logging.debug(f"I own the ship there and the position is not yet claimed")
-                    return direction
                 else:
                   # logging.debug(f"Making a safe greedy move")
                     return self.safe_greedy_move(source, target)
@@ -286,99 +666,166 @@ class GameMap:
                     structures.append(structure)
         return structures
 
-    def dijkstra_a_to_b(self, source, target, offset=1, cheapest=True, ignore_enemies=False):
-        if source == target:
-            return Direction.Still
+    @property
+    def friendly_field(self):
+        """
+        :return: The DistanceField towards my structures, computed once per turn
+        """
+        if self._friendly_field is None:
+            self._friendly_field = DistanceField(self, self._structure_positions(self.structure_owner == self.me))
+        return self._friendly_field
 
-        min_x = min(source.x, target.x)
-        max_x = max(source.x, target.x)
+    @property
+    def enemy_field(self):
+        """
+        :return: The DistanceField towards all opponent structures, computed once per turn
+        """
+        if self._enemy_field is None:
+            self._enemy_field = DistanceField(self, self.enemy_dropoffs)
+        return self._enemy_field
+
+    @property
+    def halite_sums(self):
+        """
+        :return: The SummedAreaTable over the halite, for O(1) rectangle, diamond and ring sums
+        """
+        if self._halite_sums is None:
+            self._halite_sums = SummedAreaTable(self.halite)
+        return self._halite_sums
+
+    @property
+    def base_zone(self):
+        """
+        :return: A (height, width) bool array of the cells within one step, diagonals included, of my structures
+        """
+        if self._base_zone is None:
+            friendly = self.structure_owner == self.me
+            zone = np.zeros_like(friendly)
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    zone |= np.roll(friendly, (dy, dx), axis=(0, 1))
+            self._base_zone = zone
+        return self._base_zone
 
-        min_y = min(source.y, target.y)
-        max_y = max(source.y, target.y)
+    @property
+    def threat(self):
+        """
+        :return: The ThreatField of the opponent ships, computed once per turn
+        """
+        if self._threat is None:
+            self._threat = ThreatField(self)
+        return self._threat
 
-        dx = max_x - min_x
-        dy = max_y - min_y
+    @property
+    def hostile(self):
+        """
+        :return: A (height, width) bool array of the cells that are hostile, see MapCell.is_hostile
+        """
+        return np.where(self.ship_owner != -1, self.ship_owner != self.me, self.threat.contested)
 
-        dx_wrapped = self.width - dx
-        dy_wrapped = self.height - dy
+    def enemy_density(self, radius=None):
+        """
+        Counts the opponent ships around every cell, wrapping around the map edges.
+        :param radius: The Manhattan radius to count within, INSPIRATION_RADIUS by default
+        :return: A (height, width) array of opponent ship counts, computed once per turn and radius
+        """
+        if radius is None:
+            radius = constants.INSPIRATION_RADIUS
+        density = self._enemy_density.get(radius)
+        if density is None:
+            density = self._enemy_density[radius] = diamond_convolution(self.enemy_ships, radius)
+        return density
 
-        if dx < dx_wrapped:
-            rx = range(min_x - offset, max_x + offset + 1)
-        else:
-            rx = range(max_x - offset, min_x + self.width + offset + 1)
+    @property
+    def inspired(self):
+        """
+        :return: A (height, width) bool array of the cells where one of my ships would be inspired this turn
+        """
+        if self._inspired is None:
+            if constants.INSPIRATION_ENABLED:
+                self._inspired = self.enemy_density() >= constants.INSPIRATION_SHIP_COUNT
+            else:
+                self._inspired = np.zeros((self.height, self.width), dtype=bool)
+        return self._inspired
 
-        if dy < dy_wrapped:
-            ry = range(min_y - offset, max_y + offset + 1)
-        else:
-            ry = range(max_y - offset, min_y + self.height + offset + 1)
-
-        rx = [x % self.width for x in rx]
-        ry = [y % self.height for y in ry]
-
-        # initialize distances
-        distance_map = {
-            source: {
-                "distance": 0,
-                "previous": None}
-        }
-        queue = [source]
-
-        for x in rx:
-            for y in ry:
-                pos = Position(x, y)
-                if pos == source:
-                    continue
-
-                distance_map[pos] = {
-                    "distance": constants.INF * 32,
-                    "previous": None
-                }
-                queue.append(pos)
-
-        # Dijkstra
-        #   Calculating the cheapest path to each respective node in the grid
-        while len(queue):
-            # Take the item in the queue with the lowest distance and remove it from the queue
-            node = sorted(queue, key=lambda position: distance_map[position]["distance"])[0]
-            queue.pop(queue.index(node))
-
-            # For each neighbouring position
-            for pos in node.get_surrounding_cardinals():
-                # validate cell is within search bounds
-                if pos.x in rx and pos.y in ry:
-                    neighbour = self[pos]
-
-                    # Calculate the cost of traveling to that neighbour
-                    if (neighbour.is_occupied and neighbour.ship.owner != self.me and not ignore_enemies) or \
-                            neighbour.is_claimed or \
-                            neighbour.has_structure:
-                        neighbour_weight = constants.INF
-                    else:
-                        if cheapest:
-                            neighbour_weight = neighbour.halite_amount
-                        else:
-                            neighbour_weight = max(1, constants.MAX_HALITE - neighbour.halite_amount)
-                    # neighbour_weight = neighbour.halite_amount if not game_map[pos].is_occupied else INF
-                    # logging.debug(f"Neighbour: {pos} | {neighbour_weight} | occupied: {game_map[pos].is_occupied} | ship id {game_map[pos].ship}")
-
-                    # Calculate the distance of the path to the neighbour
-                    dist_to_neighbour = distance_map[node]["distance"] + neighbour_weight
-
-                    # If path is shorter than any other current path to that neighbour, then we update the path to that node
-                    if dist_to_neighbour < distance_map[pos]["distance"]:
-                        distance_map[pos]["distance"] = dist_to_neighbour
-                        distance_map[pos]["previous"] = node
-
-        # Traverse from the target to the source by following all "previous" nodes that we calculated
-        path_node = target
-        while path_node != source:
-            prev_path_node = distance_map[path_node]["previous"]
-            if prev_path_node == source:
-                for d in Direction.get_all_cardinals():  # .values():
-                    if source.directional_offset(d) == path_node:
-                        return d
-
-            path_node = prev_path_node
+    def is_inspired(self, position):
+        """
+        :param position: The position to look up
+        :return: Whether one of my ships would be inspired there this turn
+        """
+        position = self.normalize(position)
+        return bool(self.inspired[position.y, position.x])
+
+    @property
+    def effective_extraction(self):
+        """
+        :return: A (height, width) array of the halite one of my ships would collect by staying on each cell this
+                 turn, including the inspiration bonus and ignoring its remaining capacity
+        """
+        if self._effective_extraction is None:
+            inspired = self.inspired
+            ratio = np.where(inspired, constants.INSPIRED_EXTRACT_RATIO, constants.EXTRACT_RATIO)
+            extracted = -(-self.halite // ratio)
+            bonus = (extracted * constants.INSPIRED_BONUS_MULTIPLIER).astype(np.int64) * inspired
+            self._effective_extraction = extracted + bonus
+        return self._effective_extraction
+
+    def _structure_positions(self, mask):
+        return [self._positions[y * self.width + x] for y, x in np.argwhere(mask).tolist()]
+
+    def travel_cost(self, cell, cheapest=True, ignore_enemies=False):
+        """
+        The weight of stepping onto a cell during path finding.
+        :param cell: The MapCell being entered
+        :param cheapest: Weigh by halite (True) or by missing halite (False)
+        :param ignore_enemies: Whether enemy ships are ignored instead of blocking and threatening cells
+        :return: The cost of entering the cell
+        """
+        if (cell.is_occupied and cell.ship.owner != self.me and not ignore_enemies) or \
+                cell.is_claimed or \
+                cell.has_structure:
+            return constants.INF
+        threat = 0 if ignore_enemies else self.threat.cost(cell.position)
+        if cheapest:
+            return cell.halite_amount + threat
+        return max(1, constants.MAX_HALITE - cell.halite_amount) + threat
+
+    def travel_costs(self, cheapest=True, ignore_enemies=False, include_claims=True):
+        """
+        The weight of stepping onto each cell during path finding, see travel_cost.
+        :param cheapest: Weigh by halite (True) or by missing halite (False)
+        :param ignore_enemies: Whether enemy ships are ignored instead of blocking and threatening cells
+        :param include_claims: Whether cells claimed for this turn are blocked
+        :return: A (height, width) array of costs
+        """
+        blocked = self.structure_owner != -1
+        if include_claims:
+            blocked |= self.claimed
+        costs = self.halite if cheapest else np.maximum(1, constants.MAX_HALITE - self.halite)
+        if not ignore_enemies:
+            blocked |= (self.ship_owner != -1) & (self.ship_owner != self.me)
+            costs = costs + self.threat.costs
+        return np.where(blocked, constants.INF, costs)
+
+    def travel_weights(self, cheapest=True, ignore_enemies=False, include_claims=True):
+        """
+        travel_costs for the searches in pathfinding, as a flat list that must not be modified. It is kept until a
+        cost other than a claim changes; claims are written into it as they are made.
+        :param cheapest: Weigh by halite (True) or by missing halite (False)
+        :param ignore_enemies: Whether enemy ships are ignored instead of blocking and threatening cells
+        :param include_claims: Whether cells claimed for this turn are blocked
+        :return: The flat list of costs
+        """
+        key = (cheapest, ignore_enemies)
+        if key not in self._travel_weights:
+            unclaimed = self.travel_costs(cheapest, ignore_enemies, include_claims=False).ravel().tolist()
+            self._travel_weights[key] = unclaimed, list(unclaimed)
+            self._apply_claims(np.flatnonzero(self.claimed).tolist())
+        unclaimed, weights = self._travel_weights[key]
+        return weights if include_claims else unclaimed
+
+    def dijkstra_a_to_b(self, source, target, offset=1, cheapest=True, ignore_enemies=False):
+        return pathfinding.dijkstra(self, source, target, offset=offset, cheapest=cheapest, ignore_enemies=ignore_enemies)
 
     def safe_greedy_move(self, source, target):
         safe_moves = []
@@ -389,9 +836,8 @@ class GameMap:
         # Evaluate if any of the cardinal directions are safe
         for direction in Direction.get_all_cardinals():
             new_position = self.normalize(source.directional_offset(direction))
-            if not self[new_position].is_claimed:
-                if (self[new_position].is_occupied and self[new_position].ship.owner == self.me) or not self[new_position].is_occupied:
-                    safe_moves.append(direction)
+            if not self[new_position].is_claimed and not self[new_position].is_hostile:
+                safe_moves.append(direction)
 
         # The scenario where we are fucked
         if not safe_moves:
@@ -432,24 +878,43 @@ class GameMap:
         return best_value[0]
 
     def reset_claims(self):
-        for y in range(self.height):
-            for x in range(self.width):
-                self[Position(x, y)].release_claim()
-
-    def clear_cheese(self):
-        for y in range(self.height):
-            for x in range(self.width):
-                position = Position(x, y)
-                cell = self[position]
-                if cell.has_structure and cell.structure.owner == self.me:
-                  # logging.debug(f"Found structure of myself!")
-                    surroundings = position.get_3x3()
-                  # logging.debug(f"surroundings: {surroundings}")
-                    for neighbour_pos in surroundings:
-                        neighbour = self[neighbour_pos]
-                        if neighbour.is_occupied and neighbour.ship.owner != self.me:
-                          # logging.debug(f"found ship: {neighbour.ship} || {neighbour.ship.owner} || {self.me}")
-                            neighbour.mark_safe()
+        cells = np.flatnonzero(self.claimed).tolist()
+        self._touch(self.claimed, rebuild=False)
+        self.claims.fill(None)
+        self.claimed.fill(False)
+        self._apply_claims(cells)
+
+    def _apply_claims(self, cells):
+        """
+        Brings the claims of some cells into the flat lists of travel_weights.
+        :param cells: Flat indices of the cells whose claim changed
+        """
+        claimed = self.claimed.ravel()
+        for unclaimed, weights in self._travel_weights.values():
+            for cell in cells:
+                weights[cell] = constants.INF if claimed[cell] else unclaimed[cell]
+
+    def _place_ships(self, ships):
+        """
+        Places the ships of this turn on the map. Opponent ships in my base_zone are left off, so they do not block
+        my base.
+        :param ships: The ships of all players
+        :return: nothing
+        """
+        if not ships:
+            return
+        ys = np.array([ship.position.y for ship in ships])
+        xs = np.array([ship.position.x for ship in ships])
+        owners = np.array([ship.owner for ship in ships])
+        objects = np.empty(len(ships), dtype=object)
+        objects[:] = ships
+
+        placed = (owners == self.me) | ~self.base_zone[ys, xs]
+        ys, xs = ys[placed], xs[placed]
+        self.ships[ys, xs] = objects[placed]
+        self.ship_owner[ys, xs] = owners[placed]
+        self._ship_cells.extend(zip(ys.tolist(), xs.tolist()))
+        self._travel_weights = {}
 
     @staticmethod
     def _generate(my_id):
@@ -458,40 +923,91 @@ class GameMap:
         :return: The map object
         """
         map_width, map_height = map(int, read_input().split())
-        game_map = [[None for _ in range(map_width)] for _ in range(map_height)]
-        for y_position in range(map_height):
-            cells = read_input().split()
-            for x_position in range(map_width):
-                game_map[y_position][x_position] = MapCell(Position(x_position, y_position,
-                                                                    normalize=False),
-                                                           int(cells[x_position]))
-        return GameMap(game_map, map_width, map_height, my_id)
-
-    def _update(self):
-        """
-        Updates this map object from the input given by the game engine
+        halite = [[int(amount) for amount in read_input().split()] for _ in range(map_height)]
+        return GameMap(halite, map_width, map_height, my_id)
+
+    def _update(self, cells):
+        """
+        Updates this map object from the input given by the game engine.
+        Only the cells that held a ship and the cells reported by the engine are touched.
+        :param cells: Rows of (x, y, halite), one per cell that changed this turn
         :return: nothing
         """
         # Mark cells as safe for navigation (will re-mark unsafe cells
         # later)
-        for y in range(self.height):
-            for x in range(self.width):
-                self[Position(x, y)].ship = None
-
-        for _ in range(int(read_input())):
-            cell_x, cell_y, cell_energy = map(int, read_input().split())
-            self[Position(cell_x, cell_y)].halite_amount = cell_energy
-
-        # Recalculating max_halite in field
-        self.max_halite = 0  # Reset
-        self.total_halite = 0  # Reset
-        self.enemy_dropoffs = []
+        if self._ship_cells:
+            ys, xs = zip(*self._ship_cells)
+            self.ships[ys, xs] = None
+            self.ship_owner[ys, xs] = -1
+            self._ship_cells = []
+            # Ships are cleared and placed without stamping epochs, _set_enemy_ships stamps where opponents moved
+            self._travel_weights = {}
+
+        self._friendly_field = None
+        self._enemy_field = None
+        self.reservations.clear()
+        self._enemy_density = {}
+        self._inspired = None
+        self._effective_extraction = None
+        self._threat = None
+
+        if len(cells):
+            self._set_halite_cells(cells[:, 1], cells[:, 0], cells[:, 2])
+
+    def _touch(self, index, epochs=None, rebuild=True):
+        """
+        Stamps cells with a new epoch, see cell_epochs.
+        :param index: Anything that indexes the (height, width) arrays: a (y, x) pair, arrays of both, or a mask
+        :param epochs: The epoch array to stamp, cell_epochs by default
+        :param rebuild: Whether travel_weights has to be rebuilt; not for claims, which it is patched with, nor for
+                        my own ships, which do not change travel costs
+        """
+        self.epoch += 1
+        (self.cell_epochs if epochs is None else epochs)[index] = self.epoch
+        if rebuild:
+            self._travel_weights = {}
 
-        for y in range(self.height):
-            for x in range(self.width):
-                pos = Position(x, y)
-                cell = self[pos]
-                self.max_halite = max(self.max_halite, cell.halite_amount)
-                self.total_halite += cell.halite_amount
-                if cell.has_structure and cell.structure.owner != self.me:
-                    self.enemy_dropoffs.append(pos)
+    def _set_enemy_ships(self, ships):
+        """
+        Counts the opponent ships on every cell, and their risk for the ThreatField, including the ships that are
+        left off the map in my base_zone.
+        :param ships: The ship rows of (id, x, y, halite) of every opponent
+        :return: nothing
+        """
+        previous_ships = self.enemy_ships.copy()
+        previous_risk = self.enemy_risk.copy()
+        self.enemy_ships.fill(0)
+        self.enemy_risk.fill(0)
+        for rows in ships:
+            if len(rows):
+                np.add.at(self.enemy_ships, (rows[:, 2], rows[:, 1]), 1)
+                np.add.at(self.enemy_risk, (rows[:, 2], rows[:, 1]), constants.MAX_HALITE - rows[:, 3])
+        # The threat reaches two moves out from every opponent ship that moved or changed cargo
+        changed = (self.enemy_ships != previous_ships) | (self.enemy_risk != previous_risk)
+        if changed.any():
+            self._touch(diamond_convolution(changed, 2) > 0, self.enemy_epochs)
+        self._enemy_density = {}
+        self._inspired = None
+        self._effective_extraction = None
+        self._threat = None
+
+    def _set_halite_cells(self, ys, xs, amounts):
+        """
+        Writes the halite of many cells at once, see _set_halite. Every cell may appear only once.
+        :param ys: Array of y coordinates
+        :param xs: Array of x coordinates
+        :param amounts: Array of the new halite amounts
+        """
+        old_amounts = self.halite[ys, xs]
+        self.halite[ys, xs] = amounts
+        self._touch((ys, xs))
+        self._halite_sums = None
+        self._effective_extraction = None
+        self.total_halite += int(amounts.sum() - old_amounts.sum())
+
+        counts = self._halite_counts
+        counts.subtract(old_amounts.tolist())
+        counts.update(amounts.tolist())
+        self.max_halite = max(self.max_halite, int(amounts.max()))
+        while counts[self.max_halite] <= 0 and self.max_halite > 0:
+            self.max_halite -= 1
@@ -0,0 +1,147 @@
+import collections
+import logging
+import os
+import sys
+
+LEVEL_VARIABLE = "HLT_LOG_LEVEL"
+CAPACITY_VARIABLE = "HLT_LOG_BUFFER"
+DIRECTORY_VARIABLE = "HLT_LOG_DIR"
+DEFAULT_LEVEL = "DEBUG"
+DEFAULT_CAPACITY = 20000
+
+OFF = "OFF"
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Keeps the most recent log records in memory and only writes them out when a record at flush_level or above
+    comes in, or when logging shuts down at the end of the game.
+
+    Records are stored unformatted, so messages logged with arguments are never formatted unless they are written.
+    When the buffer overflowed since the last flush, the flush starts with a warning saying how many older records
+    were dropped.
+    """
+    def __init__(self, target, capacity=DEFAULT_CAPACITY, flush_level=logging.ERROR):
+        """
+        :param target: The handler the buffered records are written to
+        :param capacity: The number of records kept; older ones are dropped
+        :param flush_level: The level from which a record makes the buffer flush
+        """
+        super().__init__()
+        self.target = target
+        self.records = collections.deque(maxlen=capacity)
+        self.flush_level = flush_level
+        self.dropped = 0
+
+    def emit(self, record):
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+        self.records.append(record)
+        if record.levelno >= self.flush_level:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self.dropped:
+                self.target.handle(logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                                     "%d older log records were dropped from the buffer",
+                                                     (self.dropped,), None))
+                self.dropped = 0
+            while self.records:
+                self.target.handle(self.records.popleft())
+            self.target.flush()
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        self.target.close()
+        super().close()
+
+
+class PlayerDispatchHandler(logging.Handler):
+    """
+    Sends every record to the handler of the player whose turn it is, so bots playing in one process, as in the
+    in-process engine, each get their own buffer and log file. A bot running alone only ever has one player.
+    """
+    def __init__(self):
+        super().__init__()
+        self.handlers = {}
+        self.player_id = None
+        # Whether setup_logging disabled logging because every player has it off
+        self.disabled_logging = False
+
+    def emit(self, record):
+        handler = self.handlers.get(self.player_id)
+        if handler is not None and record.levelno >= handler.level:
+            handler.handle(record)
+
+    def flush(self):
+        for handler in self.handlers.values():
+            if handler is not None:
+                handler.flush()
+
+
+_dispatcher = None
+
+
+def use_player(player_id):
+    """
+    Sends the records logged from now on to the log of this player, see PlayerDispatchHandler.
+    :param player_id: The id of a player set up with setup_logging
+    """
+    if _dispatcher is not None:
+        _dispatcher.player_id = player_id
+
+
+def setup_logging(player_id, level=None, capacity=None):
+    """
+    Sets up logging for a bot, once per player. The level comes from the argument, else from the HLT_LOG_LEVEL
+    environment variable, else DEBUG; OFF disables logging for the player. Records go through a RingBufferHandler
+    to bot-<id>.log, which is only created when something is written, in the directory named by HLT_LOG_DIR or else
+    the working directory. Records are logged for the player set up last, until use_player switches to another.
+    :param player_id: The id of the player, used in the log's filename
+    :param level: A logging level name, or OFF
+    :param capacity: The number of records to buffer, else HLT_LOG_BUFFER, else 20000
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = PlayerDispatchHandler()
+        logging.getLogger().addHandler(_dispatcher)
+
+        previous_hook = sys.excepthook
+
+        def log_uncaught(exc_type, exc_value, traceback):
+            logging.critical("Uncaught exception", exc_info=(exc_type, exc_value, traceback))
+            previous_hook(exc_type, exc_value, traceback)
+
+        sys.excepthook = log_uncaught
+
+    use_player(player_id)
+    if player_id in _dispatcher.handlers:
+        return
+
+    level = (level or os.environ.get(LEVEL_VARIABLE) or DEFAULT_LEVEL).upper()
+    if level == OFF:
+        _dispatcher.handlers[player_id] = None
+    else:
+        capacity = capacity or int(os.environ.get(CAPACITY_VARIABLE, DEFAULT_CAPACITY))
+        directory = os.environ.get(DIRECTORY_VARIABLE, "")
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        target = logging.FileHandler(os.path.join(directory, "bot-{}.log".format(player_id)), mode="w", delay=True)
+        target.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        handler = _dispatcher.handlers[player_id] = RingBufferHandler(target, capacity)
+        handler.setLevel(level)
+
+    levels = [handler.level for handler in _dispatcher.handlers.values() if handler is not None]
+    if levels:
+        logging.getLogger().setLevel(min(levels))
+        if _dispatcher.disabled_logging:
+            logging.disable(logging.NOTSET)
+            _dispatcher.disabled_logging = False
+    elif not _dispatcher.disabled_logging:
+        # Logging calls cost next to nothing while every player has logging off
+        logging.disable(logging.CRITICAL)
+        _dispatcher.disabled_logging = True
@@ -1,23 +1,34 @@
 import json
 import logging
 import sys
+import time
 
-from .common import read_input
+from .common import get_reader, read_input, set_reader
 from . import constants
+from .logs import setup_logging, use_player
+from .profiler import Profiler
 from .game_map import GameMap, Player
-from .positionals import Direction
+from .positionals import Direction, Position
+from .scheduler import TurnScheduler
 
 
 class Game:
     """
     The game object holds all metadata pertinent to the game and all its contents
     """
-    def __init__(self):
+    def __init__(self, reader=None, log_level=None):
         """
         Initiates a game object collecting all start-state instances for the contained items for pre-game.
-        Also sets up basic logging.
+        Also sets up logging.
+        :param reader: The FrameReader to read the engine's messages from, stdin by default
+        :param log_level: A logging level name or OFF, by default taken from the HLT_LOG_LEVEL environment variable
         """
+        if reader is not None:
+            set_reader(reader)
+        self.reader = get_reader()
         self.turn_number = 0
+        self.ingest_time = 0.0
+        self.scheduler = TurnScheduler()
 
         # Grab constants JSON
         raw_constants = read_input()
@@ -25,20 +36,23 @@ class Game:
 
         num_players, self.my_id = map(int, read_input().split())
 
-        logging.basicConfig(
-            filename="bot-{}.log".format(self.my_id),
-            filemode="w",
-            level=logging.DEBUG,
-        )
+        setup_logging(self.my_id, log_level)
+        self.profiler = Profiler.from_environment(self.my_id)
+        self._turn_start = 0
 
         self.players = {}
         for player in range(num_players):
             self.players[player] = Player._generate()
         self.me = self.players[self.my_id]
         self.game_map = GameMap._generate(self.my_id)
+        self.game_map.profiler = self.profiler
 
         constants.set_dimensions(self.game_map.width, self.game_map.height)
 
+        # The map interned all positions; swap the shipyards over to the shared instances
+        for player in self.players.values():
+            player.shipyard.position = Position(player.shipyard.position.x, player.shipyard.position.y)
+
     def ready(self, name):
         """
         Indicate that your bot is ready to play.
@@ -51,39 +65,57 @@ class Game:
         Updates the game object's state.
         :returns: nothing.
         """
-        self.turn_number = int(read_input())
-        logging.info("=============== TURN {:03} ================".format(self.turn_number))
-
-        for _ in range(len(self.players)):
-            player, num_ships, num_dropoffs, halite = map(int, read_input().split())
-            self.players[player]._update(num_ships, num_dropoffs, halite)
-
-        self.game_map._update()
-
-        # Mark cells with ships as unsafe for navigation
-        for player in self.players.values():
-            for ship in player.get_ships():
-                self.game_map[ship.position].mark_unsafe(ship)
-                if ship.owner != self.my_id:
-                    for neighbour_pos in ship.position.get_surrounding_cardinals():
-                        if not self.game_map[neighbour_pos].is_occupied:
-                            self.game_map[neighbour_pos].mark_unsafe(ship)
-
-            self.game_map[player.shipyard.position].structure = player.shipyard
-            for dropoff in player.get_dropoffs():
-                self.game_map[dropoff.position].structure = dropoff
-
-        # Remove enemy ships around my base
-        self.game_map.clear_cheese()
-
-    @staticmethod
-    def end_turn(commands):
+        profiler = self.profiler
+        waited = self.reader.wait_time
+        start = time.perf_counter_ns()
+
+        self.turn_number, players, cells = self.reader.read_frame(len(self.players))
+        use_player(self.my_id)
+        logging.info("=============== TURN %03d ================", self.turn_number)
+
+        # The turn starts once the engine sent the frame, parsing it is the bot's own time
+        self._turn_start = start + int((self.reader.wait_time - waited) * 1e9)
+        profiler.turn = self.turn_number
+        profiler.record("parse", self._turn_start)
+
+        with profiler.span("update"):
+            for player, halite, ships, dropoffs in players:
+                self.players[player]._update(halite, ships, dropoffs)
+
+            self.game_map._update(cells)
+            self.game_map._set_enemy_ships([ships for player, _, ships, _ in players if player != self.my_id])
+
+        # Place structures and ships; the cells enemy ships can reach are covered by game_map.threat
+        with profiler.span("mark"):
+            ships = []
+            for player in self.players.values():
+                self.game_map[player.shipyard.position].structure = player.shipyard
+                for dropoff in player.get_dropoffs():
+                    self.game_map[dropoff.position].structure = dropoff
+                ships.extend(player.get_ships())
+            self.game_map._place_ships(ships)
+
+        # Time spent on reading and applying the frame, without waiting for the engine
+        self.ingest_time = (time.perf_counter_ns() - self._turn_start) / 1e9
+
+        # The turn budget is measured from the moment the frame has been read
+        self.scheduler.start_turn()
+
+    def end_turn(self, commands):
         """
         Method to send all commands to the game engine, effectively ending your turn.
         :param commands: Array of commands to send to engine
         :return: nothing.
         """
-        send_commands(commands)
+        with self.profiler.span("end_turn"):
+            send_commands(commands)
+        self.profiler.record("turn", self._turn_start)
+
+        # The engine may kill the bot right after the last turn, before it gets to exit by itself
+        if self.turn_number == constants.MAX_TURNS:
+            self.profiler.save()
+            for handler in logging.getLogger().handlers:
+                handler.flush()
 
 
 def send_commands(commands):
@@ -0,0 +1,57 @@
+class PathCache:
+    """
+    Routes found by GameMap.navigate, kept across turns.
+
+    A route is stored under (cell, target, mode) for every cell along it, so a ship that moved along its route
+    finds the rest of it again on the next turn. It is reused for as long as none of the cells still ahead of the
+    ship changed since it was found, going by the per-cell epochs of the GameMap. Cells off the route that got
+    cheaper do not invalidate it, so a reused route can be slightly worse than a fresh search.
+    """
+    def __init__(self, capacity=4096):
+        """
+        :param capacity: The number of keys to keep, the oldest routes are dropped first
+        """
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._routes = {}
+
+    def get(self, epochs, source, target, mode):
+        """
+        :param epochs: Flat arrays of the epoch every cell last changed in, one per kind of change the mode sees
+        :param source: Flat index of the cell the ship is on
+        :param target: Flat index of the target
+        :param mode: Any hashable of the search options the route depends on
+        :return: The flat cell indices from source to target, or None when there is no valid route
+        """
+        key = (source, target, mode)
+        entry = self._routes.get(key)
+        if entry is not None:
+            route, start, epoch = entry
+            ahead = route[start + 1:]
+            if all(cell_epochs[ahead].max() <= epoch for cell_epochs in epochs):
+                self.hits += 1
+                return route[start:]
+            del self._routes[key]
+        self.misses += 1
+        return None
+
+    def put(self, route, mode, epoch):
+        """
+        :param route: The flat cell indices from source to target
+        :param mode: The search options the route was found with
+        :param epoch: The epoch of the map when the route was found
+        """
+        target = route[-1]
+        for start, cell in enumerate(route[:-1]):
+            self._routes[(cell, target, mode)] = (route, start, epoch)
+        while len(self._routes) > self.capacity:
+            del self._routes[next(iter(self._routes))]
+
+    @property
+    def hit_rate(self):
+        """
+        :return: The share of lookups that found a valid route
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
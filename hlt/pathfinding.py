@@ -0,0 +1,397 @@
+import heapq
+
+from . import constants
+from .positionals import Direction, get_position_table
+
+
+def search_window(a, b, size, offset):
+    """
+    Returns the coordinates along one axis that lie within the search box around two points,
+    taking the shortest way around the toroid. Coordinates are unique and in search order.
+    :param a: The first coordinate
+    :param b: The second coordinate
+    :param size: The size of the map along this axis
+    :param offset: How far the box extends beyond both points
+    :return: A list of normalized coordinates
+    """
+    low = min(a, b)
+    high = max(a, b)
+
+    if high - low < size - (high - low):
+        span = range(low - offset, high + offset + 1)
+    else:
+        span = range(high - offset, low + size + offset + 1)
+
+    seen = set()
+    window = []
+    for value in span:
+        value %= size
+        if value not in seen:
+            seen.add(value)
+            window.append(value)
+    return window
+
+
+def dijkstra(game_map, source, target, offset=1, cheapest=True, ignore_enemies=False):
+    """
+    Finds the cheapest path from source to target within the box spanned by both positions.
+
+    Uses a binary heap with lazy deletion and flat arrays indexed by y * width + x. Ties are broken
+    in the same order as the original sorted-list implementation, so the chosen paths are identical.
+    :param game_map: The game map to search on
+    :param source: The starting position
+    :param target: The position to reach
+    :param offset: How far the search box extends beyond source and target
+    :param cheapest: Weigh cells by halite (True) or by missing halite (False)
+    :param ignore_enemies: Whether enemy ships block the path
+    :return: The first Direction on the cheapest path
+    """
+    if source == target:
+        return Direction.Still
+    previous = _search(game_map, source, target, offset, cheapest, ignore_enemies)
+    return first_step(game_map, source, previous, target.y * game_map.width + target.x)
+
+
+def dijkstra_path(game_map, source, target, offset=1, cheapest=True, ignore_enemies=False):
+    """
+    Finds the same path as dijkstra, see there for the parameters.
+    :return: The flat cell index per step from source to target, only the source if the target is unreachable
+    """
+    source_index = source.y * game_map.width + source.x
+    target_index = target.y * game_map.width + target.x
+    if source_index == target_index:
+        return [source_index]
+    previous = _search(game_map, source, target, offset, cheapest, ignore_enemies)
+
+    path = [target_index]
+    while path[-1] != source_index:
+        node = previous[path[-1]]
+        if node == -1:
+            return [source_index]
+        path.append(node)
+    path.reverse()
+    return path
+
+
+def _search(game_map, source, target, offset, cheapest, ignore_enemies):
+    """
+    :return: The flat predecessor array of the search, -1 where a cell was not reached
+    """
+    width = game_map.width
+    height = game_map.height
+
+    xs = search_window(source.x, target.x, width, offset)
+    ys = search_window(source.y, target.y, height, offset)
+
+    size = width * height
+    unreached = constants.INF * 32
+    distance = [unreached] * size
+    previous = [-1] * size
+    weight = game_map.travel_weights(cheapest, ignore_enemies)
+
+    # The rank reproduces the queue order of the original search: source first, then column by column.
+    # Cells outside the search box keep a rank of -1.
+    rank = [-1] * size
+    column_length = len(ys)
+    for i, x in enumerate(xs):
+        for j, y in enumerate(ys):
+            rank[y * width + x] = i * column_length + j + 1
+
+    source_index = source.y * width + source.x
+    rank[source_index] = 0
+    distance[source_index] = 0
+
+    neighbours = get_position_table(width, height).cardinal_indices
+
+    heap = [(0, 0, source_index)]
+    while heap:
+        node_distance, _, node = heapq.heappop(heap)
+        if node_distance > distance[node]:
+            continue  # Stale entry
+
+        for neighbour in neighbours[node]:
+            if rank[neighbour] < 0:
+                continue
+
+            dist_to_neighbour = node_distance + weight[neighbour]
+            if dist_to_neighbour < distance[neighbour]:
+                distance[neighbour] = dist_to_neighbour
+                previous[neighbour] = node
+                heapq.heappush(heap, (dist_to_neighbour, rank[neighbour], neighbour))
+
+    return previous
+
+
+def astar(game_map, source, target, offset=1, cheapest=True, ignore_enemies=False):
+    """
+    Finds a path as cheap as the one of dijkstra, searching towards the target instead of the whole box.
+    Equally cheap paths may be broken differently. See dijkstra for the parameters.
+    :return: The first Direction on the cheapest path
+    """
+    path = astar_path(game_map, source, target, offset, cheapest, ignore_enemies)
+    return step_direction(game_map, path[0], path[1]) if len(path) > 1 else Direction.Still
+
+
+def astar_path(game_map, source, target, offset=1, cheapest=True, ignore_enemies=False):
+    """
+    Finds the same path as astar, see dijkstra for the parameters.
+    :return: The flat cell index per step from source to target, only the source if the target is unreachable
+    """
+    source_index = source.y * game_map.width + source.x
+    target_index = target.y * game_map.width + target.x
+    if source_index == target_index:
+        return [source_index]
+    previous, _ = astar_search(game_map, source, target, offset, cheapest, ignore_enemies)
+    if target_index not in previous:
+        return [source_index]
+
+    path = [target_index]
+    while path[-1] != source_index:
+        path.append(previous[path[-1]])
+    path.reverse()
+    return path
+
+
+def astar_search(game_map, source, target, offset=1, cheapest=True, ignore_enemies=False):
+    """
+    A* over the box of dijkstra, see _axis_heuristic for the heuristic. It is consistent, so the search stops as
+    soon as the target is settled.
+    :return: The predecessor of every cell reached, by flat index, and the number of cells expanded
+    """
+    width = game_map.width
+    height = game_map.height
+
+    xs = search_window(source.x, target.x, width, offset)
+    ys = search_window(source.y, target.y, height, offset)
+    weight = game_map.travel_weights(cheapest, ignore_enemies)
+
+    # The cheapest weight of every column and row of the box
+    column_cheapest = [constants.INF] * len(xs)
+    row_cheapest = []
+    for y in ys:
+        row = [weight[y * width + x] for x in xs]
+        row_cheapest.append(min(row))
+        column_cheapest = list(map(min, column_cheapest, row))
+    heuristic_x = _axis_heuristic(xs, column_cheapest, target.x, width)
+    heuristic_y = _axis_heuristic(ys, row_cheapest, target.y, height)
+
+    # The heuristic of every cell by flat index, which doubles as the mask of the box: cells outside keep -1
+    size = width * height
+    remaining = [-1] * size
+    for y, h_y in zip(ys, heuristic_y):
+        row_start = y * width
+        for x, h_x in zip(xs, heuristic_x):
+            remaining[row_start + x] = h_y + h_x
+
+    unreached = constants.INF * 32
+    source_index = source.y * width + source.x
+    target_index = target.y * width + target.x
+    distance = [unreached] * size
+    distance[source_index] = 0
+    previous = {}
+
+    neighbours = get_position_table(width, height).cardinal_indices
+
+    estimate = remaining[source_index]
+    heap = [(estimate, estimate, source_index)]
+    expanded = 0
+    while heap:
+        node_estimate, node_heuristic, node = heapq.heappop(heap)
+        node_distance = node_estimate - node_heuristic
+        if node_distance > distance[node]:
+            continue  # Stale entry
+        expanded += 1
+        if node == target_index:
+            break
+
+        for neighbour in neighbours[node]:
+            neighbour_heuristic = remaining[neighbour]
+            if neighbour_heuristic < 0:
+                continue
+
+            dist_to_neighbour = node_distance + weight[neighbour]
+            if dist_to_neighbour < distance[neighbour]:
+                distance[neighbour] = dist_to_neighbour
+                previous[neighbour] = node
+                # Among equal estimates, the cell closer to the target goes first
+                heapq.heappush(heap, (dist_to_neighbour + neighbour_heuristic, neighbour_heuristic, neighbour))
+
+    return previous, expanded
+
+
+def _axis_heuristic(window, cheapest, target, size):
+    """
+    One axis of the heuristic of astar_search, which is the sum of the values of a cell's column and row.
+
+    A path from column x to the target's column steps onto every column in between, and onto the target's, with
+    a horizontal step at least once, and each of those steps costs at least the cheapest weight of its column.
+    Likewise for the vertical steps and rows. Horizontal and vertical steps are different steps, so the two sums
+    add up to a lower bound on the cost of the path. With all weights one it is the Manhattan distance within the
+    box, and it changes by at most the weight of the cell stepped onto, so it is consistent.
+    :param window: The coordinates of the search box along the axis, in order
+    :param cheapest: The cheapest weight within the box at each of those coordinates
+    :param target: The target's coordinate
+    :param size: The size of the map along the axis
+    :return: A list of the lower bound per coordinate of the window
+    """
+    count = len(window)
+    index = window.index(target)
+    prefix = [0]
+    for value in cheapest:
+        prefix.append(prefix[-1] + value)
+
+    heuristic = []
+    for i in range(count):
+        if i < index:
+            bound = prefix[index + 1] - prefix[i + 1]
+            around = prefix[count] - prefix[index] + prefix[i]
+        else:
+            bound = prefix[i] - prefix[index]
+            around = prefix[count] - prefix[i + 1] + prefix[index + 1]
+        # A box spanning the whole axis can also be crossed the other way around
+        heuristic.append(min(bound, around) if count == size else bound)
+    return heuristic
+
+
+# The searches GameMap.navigate can find new paths with, by name
+PATH_SEARCHES = {"dijkstra": dijkstra_path, "astar": astar_path}
+
+
+def first_step(game_map, source, previous, target_index):
+    """
+    Walks a predecessor array back from the target and returns the first move taken from source.
+    :param game_map: The game map the predecessors were computed on
+    :param source: The starting position
+    :param previous: Flat predecessor array, -1 where no predecessor exists
+    :param target_index: Flat index of the target
+    :return: The Direction leading from source onto the path
+    """
+    width = game_map.width
+    source_index = source.y * width + source.x
+
+    node = target_index
+    while previous[node] != source_index:
+        node = previous[node]
+        if node == -1:
+            return Direction.Still
+
+    return step_direction(game_map, source_index, node)
+
+
+def step_direction(game_map, cell, neighbour):
+    """
+    :param game_map: The game map the indices refer to
+    :param cell: Flat index of the cell moved from
+    :param neighbour: Flat index of the cell moved to
+    :return: The Direction of the move, Still if the cells are not adjacent
+    """
+    cardinals = get_position_table(game_map.width, game_map.height).cardinal_indices[cell]
+    for direction, candidate in zip(Direction.get_all_cardinals(), cardinals):
+        if candidate == neighbour:
+            return direction
+    return Direction.Still
+
+
+def windowed_astar(game_map, source, target, reservations, ship_id, window=8, offset=1, cheapest=True,
+                   ignore_enemies=False, cost_to_go=None):
+    """
+    Finds a path in space and time within the box spanned by both positions, routing around the cells my other
+    ships have reserved (windowed cooperative A*).
+
+    Every step, moving or waiting, costs one plus the weight of the cell occupied after the step. Claims only hold
+    for the next step, the reservations cover the steps after. The heuristic is the exact cost to the target
+    ignoring the reservations, so the search only widens where other ships are in the way. It ends on reaching
+    the target or, for targets further away, after window steps, where the heuristic covers the rest of the way.
+    :param game_map: The game map to search on
+    :param source: The starting position
+    :param target: The position to reach
+    :param reservations: The ReservationTable of this turn
+    :param ship_id: The ship being planned, its own reservations are ignored
+    :param window: How many steps ahead to plan
+    :param offset: How far the search box extends beyond source and target
+    :param cheapest: Weigh cells by halite (True) or by missing halite (False)
+    :param ignore_enemies: Whether enemy ships block the path
+    :param cost_to_go: A DStarLite towards the target over a box containing this one, kept up to date by the caller,
+                       used as the heuristic instead of searching backwards from the target here
+    :return: The flat cell index per step, starting with the source
+    """
+    width = game_map.width
+    height = game_map.height
+    size = width * height
+    source_index = source.y * width + source.x
+    target_index = target.y * width + target.x
+    if source_index == target_index:
+        return [source_index]
+
+    xs = search_window(source.x, target.x, width, offset)
+    ys = search_window(source.y, target.y, height, offset)
+    inside = {y * width + x for x in xs for y in ys}
+
+    next_weight = game_map.travel_weights(cheapest, ignore_enemies)
+    later_weight = game_map.travel_weights(cheapest, ignore_enemies, include_claims=False)
+
+    neighbours = get_position_table(width, height).cardinal_indices
+    heuristic = cost_to_go if cost_to_go is not None else _cost_to_go(neighbours, later_weight, inside, target_index)
+    best = {source_index: 0}
+    parent = {}
+    heap = [(heuristic[source_index], 0, 0, source_index)]
+    goal = None
+    while heap:
+        _, cost, step, cell = heapq.heappop(heap)
+        state = step * size + cell
+        if cost > best[state]:
+            continue  # Stale entry
+        if cell == target_index or step == window:
+            goal = state
+            break
+
+        weight = next_weight if step == 0 else later_weight
+        for neighbour in neighbours[cell] + (cell,):
+            if neighbour not in inside or weight[neighbour] >= constants.INF:
+                continue
+            if not reservations.can_move(cell, neighbour, step, ship_id):
+                continue
+
+            neighbour_cost = cost + 1 + weight[neighbour]
+            neighbour_state = state + size - cell + neighbour
+            if neighbour_cost < best.get(neighbour_state, constants.INF * 32):
+                best[neighbour_state] = neighbour_cost
+                parent[neighbour_state] = state
+                heapq.heappush(heap, (neighbour_cost + heuristic[neighbour], neighbour_cost, step + 1, neighbour))
+
+    if goal is None:
+        return [source_index]
+
+    path = []
+    while goal in parent:
+        path.append(goal % size)
+        goal = parent[goal]
+    path.append(source_index)
+    path.reverse()
+    return path
+
+
+def _cost_to_go(neighbours, weight, inside, target_index):
+    """
+    Runs a Dijkstra backwards from the target over the cells inside the search box.
+    :return: A dict of cell to the cost of the cheapest route from that cell to the target
+    """
+    unreached = constants.INF * 32
+    cost_to_go = dict.fromkeys(inside, unreached)
+    cost_to_go[target_index] = 0
+
+    heap = [(0, target_index)]
+    while heap:
+        cost, cell = heapq.heappop(heap)
+        if cost > cost_to_go[cell]:
+            continue  # Stale entry
+        if weight[cell] >= constants.INF:
+            continue  # Nothing can step onto this cell
+
+        # Entering this cell from any neighbour costs the same
+        step_cost = cost + 1 + weight[cell]
+        for neighbour in neighbours[cell]:
+            if neighbour in inside and step_cost < cost_to_go[neighbour]:
+                cost_to_go[neighbour] = step_cost
+                heapq.heappush(heap, (step_cost, neighbour))
+    return cost_to_go
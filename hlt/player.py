@@ -63,14 +63,30 @@ class Player:
         player, shipyard_x, shipyard_y = map(int, read_input().split())
         return Player(player, Shipyard(player, -1, Position(shipyard_x, shipyard_y, normalize=False)))
 
-    def _update(self, num_ships, num_dropoffs, halite):
+    def _update(self, halite, ships, dropoffs):
         """
         Updates this player object considering the input from the game engine for the current specific turn.
-        :param num_ships: The number of ships this player has this turn
-        :param num_dropoffs: The number of dropoffs this player has this turn
+        Ships and dropoffs seen before keep their instance, so state kept on them survives between turns.
         :param halite: How much halite the player has in total
+        :param ships: Rows of (id, x, y, halite), one per ship this player has this turn
+        :param dropoffs: Rows of (id, x, y), one per dropoff this player has this turn
         :return: nothing.
         """
         self.halite_amount = halite
-        self._ships = {id: ship for (id, ship) in [Ship._generate(self.id) for _ in range(num_ships)]}
-        self._dropoffs = {id: dropoff for (id, dropoff) in [Dropoff._generate(self.id) for _ in range(num_dropoffs)]}
+
+        previous_ships = self._ships
+        self._ships = {}
+        for ship_id, x, y, cargo in ships.tolist():
+            ship = previous_ships.get(ship_id)
+            if ship is None:
+                ship = Ship(self.id, ship_id, Position(x, y), cargo)
+            else:
+                ship.position = Position(x, y)
+                ship.halite_amount = cargo
+            self._ships[ship_id] = ship
+
+        previous_dropoffs = self._dropoffs
+        self._dropoffs = {}
+        for dropoff_id, x, y in dropoffs.tolist():
+            dropoff = previous_dropoffs.get(dropoff_id)
+            self._dropoffs[dropoff_id] = dropoff if dropoff is not None else Dropoff(self.id, dropoff_id, Position(x, y))
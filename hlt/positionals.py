@@ -63,14 +63,34 @@ class Direction:
 
 
 class Position:
-    def __init__(self, x, y, normalize=True):
-        self.x = x
-        self.y = y
+    """
+    A cell coordinate on the toroidal map.
 
+    Normalized positions are interned: once a PositionTable exists for the map, Position(x, y) returns the single
+    shared instance for that cell, whose neighbours are precomputed. Positions must therefore be treated as immutable.
+    """
+    __slots__ = ('x', 'y', '_table', '_index')
+
+    def __new__(cls, x, y, normalize=True):
+        table = _table
+        if table is not None:
+            if normalize:
+                return table.positions[(y % table.height) * table.width + x % table.width]
+            if 0 <= x < table.width and 0 <= y < table.height:
+                return table.positions[y * table.width + x]
+
+        position = object.__new__(cls)
+        position.x = x
+        position.y = y
+        position._table = None
+        position._index = None
         if normalize:
-            self.normalize()
+            position.normalize()
+        return position
 
     def normalize(self):
+        if self._table is not None:
+            return  # Interned positions are normalized by construction
         self.x = self.x % constants.WIDTH
         self.y = self.y % constants.HEIGHT
 
@@ -80,12 +100,18 @@ class Position:
         :param direction: the direction cardinal tuple
         :return: a new position moved in that direction
         """
+        if self._table is not None:
+            slot = _CARDINAL_SLOTS.get(direction)
+            if slot is not None:
+                return self._table.cardinals[self._index][slot]
         return self + Position(*direction)
 
     def get_surrounding_cardinals(self):
         """
         :return: Returns a list of all positions around this specific position in each cardinal direction
         """
+        if self._table is not None:
+            return list(self._table.cardinals[self._index])
         return [self.directional_offset(current_direction) for current_direction in Direction.get_all_cardinals()]
 
     def get_plus_cardinals(self):
@@ -94,6 +120,8 @@ class Position:
         return positions
 
     def get_3x3(self):
+        if self._table is not None:
+            return list(self._table.boxes[self._index])
         positions = self.get_plus_cardinals()
         positions.extend([
             self + Position(-1, -1),
@@ -104,6 +132,8 @@ class Position:
         return positions
 
     def get_offset_ring(self, offset=1):
+        if self._table is not None:
+            return list(self._table.ring(self._index, offset))
         offsets = list(range(-offset, offset + 1))
         ring = [(x, y) for x in offsets for y in offsets if (abs(x) == offset or abs(y) == offset)]
         position_ring = [self + Position(*offset) for offset in ring]
@@ -117,22 +147,16 @@ class Position:
         return Position(self.x - other.x, self.y - other.y)
 
     def __iadd__(self, other):
-        self.x += other.x
-        self.y += other.y
-        self.normalize()
-        return self
+        return self + other
 
     def __isub__(self, other):
-        self.x -= other.x
-        self.y -= other.y
-        self.normalize()
-        return self
+        return self - other
 
     def __abs__(self):
         return Position(abs(self.x), abs(self.y))
 
     def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
+        return self is other or (self.x == other.x and self.y == other.y)
 
     def __ne__(self, other):
         return not self.__eq__(other)
@@ -144,3 +168,81 @@ class Position:
 
     def __hash__(self):
         return hash((self.x, self.y))
+
+
+class PositionTable:
+    """
+    One interned Position per cell of a map, with the neighbours of every cell precomputed.
+    Cells are indexed by y * width + x.
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+        self.positions = []
+        for y in range(height):
+            for x in range(width):
+                position = object.__new__(Position)
+                position.x = x
+                position.y = y
+                position._table = self
+                position._index = y * width + x
+                self.positions.append(position)
+
+        # Neighbour indices in Direction.get_all_cardinals() order: North, South, East, West
+        self.cardinal_indices = [
+            tuple(self.index(x + dx, y + dy) for dx, dy in Direction.get_all_cardinals())
+            for y in range(height) for x in range(width)
+        ]
+        self.cardinals = [tuple(self.positions[i] for i in indices) for indices in self.cardinal_indices]
+
+        diagonals = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+        self.boxes = [
+            (self.positions[i],) + self.cardinals[i] +
+            tuple(self.positions[self.index(self.positions[i].x + dx, self.positions[i].y + dy)] for dx, dy in diagonals)
+            for i in range(width * height)
+        ]
+        self._rings = {}
+
+    def index(self, x, y):
+        """
+        :return: The flat index of a (possibly unnormalized) coordinate
+        """
+        return (y % self.height) * self.width + x % self.width
+
+    def ring(self, index, offset):
+        """
+        The cells at Chebyshev distance offset from a cell, computed once per cell and offset.
+        :param index: The flat index of the centre cell
+        :param offset: The distance of the ring
+        :return: A tuple of positions
+        """
+        rings = self._rings.get(offset)
+        if rings is None:
+            rings = self._rings[offset] = [None] * (self.width * self.height)
+
+        ring = rings[index]
+        if ring is None:
+            centre = self.positions[index]
+            offsets = range(-offset, offset + 1)
+            ring = rings[index] = tuple(self.positions[self.index(centre.x + dx, centre.y + dy)]
+                                        for dx in offsets for dy in offsets
+                                        if abs(dx) == offset or abs(dy) == offset)
+        return ring
+
+
+_table = None
+_CARDINAL_SLOTS = {direction: slot for slot, direction in enumerate(Direction.get_all_cardinals())}
+
+
+def get_position_table(width, height):
+    """
+    Returns the interned position table for a map of the given size, creating it the first time it is requested.
+    :param width: The map width
+    :param height: The map height
+    :return: The PositionTable
+    """
+    global _table
+    if _table is None or _table.width != width or _table.height != height:
+        _table = PositionTable(width, height)
+    return _table
@@ -0,0 +1,148 @@
+import atexit
+import os
+import time
+
+import numpy as np
+
+PROFILE_VARIABLE = "HLT_PROFILE"
+
+
+class _Span:
+    """
+    Context manager timing one span, reused for every span of the same phase.
+    """
+    __slots__ = ("profiler", "code", "start")
+
+    def __init__(self, profiler, code):
+        self.profiler = profiler
+        self.code = code
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler._record(self.code, self.start, time.perf_counter_ns())
+        return False
+
+
+class _NoSpan:
+    """
+    Context manager that does nothing, handed out by a disabled profiler.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Profiler:
+    """
+    Records how long the phases of each turn take.
+
+    Spans are kept as rows of (phase, turn, start, duration) in nanoseconds in a preallocated array, which only
+    grows when a game has more spans than expected. A disabled profiler hands out a no-op span and records nothing.
+    """
+    def __init__(self, filename=None, capacity=1 << 14):
+        """
+        :param filename: The .npz file the profile is saved to; no file means profiling is disabled
+        :param capacity: The number of spans to make room for up front
+        """
+        self.filename = filename
+        self.enabled = filename is not None
+        self.turn = 0
+        self.names = []
+        self._codes = {}
+        self._span_objects = {}
+        self._spans = np.zeros((capacity if self.enabled else 0, 4), dtype=np.int64)
+        self._count = 0
+        self._origin = time.perf_counter_ns()
+
+    @staticmethod
+    def from_environment(player_id):
+        """
+        :param player_id: The id of the player, used in the profile's filename
+        :return: A profiler saving to bot-<id>.npz in the directory named by HLT_PROFILE, or a disabled one
+        """
+        directory = os.environ.get(PROFILE_VARIABLE)
+        if not directory:
+            return Profiler()
+        os.makedirs(directory, exist_ok=True)
+        profiler = Profiler(os.path.join(directory, "bot-{}.npz".format(player_id)))
+        atexit.register(profiler.save)
+        return profiler
+
+    def _code(self, name):
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def _record(self, code, start, end):
+        if self._count == len(self._spans):
+            self._spans = np.concatenate((self._spans, np.zeros_like(self._spans)))
+        self._spans[self._count] = (code, self.turn, start - self._origin, end - start)
+        self._count += 1
+
+    def record(self, name, start):
+        """
+        Records a span that started at the given perf_counter_ns and ends now.
+        :param name: The phase the span belongs to
+        :param start: The time.perf_counter_ns() the span started at
+        """
+        if self.enabled:
+            self._record(self._code(name), start, time.perf_counter_ns())
+
+    def span(self, name):
+        """
+        :param name: The phase to time
+        :return: A context manager timing the code in its with block
+        """
+        if not self.enabled:
+            return _NO_SPAN
+        span = self._span_objects.get(name)
+        if span is None:
+            span = self._span_objects[name] = _Span(self, self._code(name))
+        return span
+
+    def wrap(self, name, function):
+        """
+        :param name: The phase to time
+        :param function: The function to time every call of
+        :return: The function itself when disabled, else a wrapper timing each call
+        """
+        if not self.enabled:
+            return function
+        code = self._code(name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._record(code, start, time.perf_counter_ns())
+        return timed
+
+    def spans(self):
+        """
+        :return: The recorded spans as rows of (phase, turn, start, duration)
+        """
+        return self._spans[:self._count]
+
+    def save(self):
+        """
+        Writes the profile to its file, as the phase names and one column per span field.
+        """
+        if not self.enabled:
+            return
+        spans = self.spans()
+        np.savez_compressed(self.filename, names=np.array(self.names), phase=spans[:, 0].astype(np.int16),
+                            turn=spans[:, 1].astype(np.int16), start=spans[:, 2], duration=spans[:, 3])
@@ -0,0 +1,77 @@
+class ReservationTable:
+    """
+    Space-time reservations of my ships for the current turn.
+
+    Step 0 is the current turn, step 1 the positions after this turn's moves, and so on. A cell can be held by one
+    ship per step, and a ship moving from a to b between two steps also holds that edge, so that no other ship can
+    swap places with it. The table is cleared at the start of every turn; plans that are still valid reserve their
+    remaining steps again.
+    """
+    def __init__(self):
+        self._cells = {}
+        self._edges = {}
+        self._held = {}
+
+    def clear(self):
+        self._cells.clear()
+        self._edges.clear()
+        self._held.clear()
+
+    def holds(self, ship_id):
+        """
+        :return: Whether the ship has reserved anything this turn
+        """
+        return ship_id in self._held
+
+    def reserve(self, ship_id, path, hold_until=None):
+        """
+        Reserves a path of flat cell indices, path[k] being the cell at step k.
+        :param ship_id: The ship the path belongs to
+        :param path: The cells of the path, starting with the ship's current cell
+        :param hold_until: Keep the last cell reserved up to and including this step, e.g. a ship mining its target
+        """
+        held = self._held.setdefault(ship_id, [])
+        for step, cell in enumerate(path):
+            self._cells[(cell, step)] = ship_id
+            held.append((cell, step))
+            if step > 0 and cell != path[step - 1]:
+                self._edges[(path[step - 1], cell, step - 1)] = ship_id
+
+        if hold_until is not None and path:
+            for step in range(len(path), hold_until + 1):
+                self._cells[(path[-1], step)] = ship_id
+                held.append((path[-1], step))
+
+    def release(self, ship_id):
+        """
+        Removes all reservations of a ship.
+        :param ship_id: The ship to release
+        """
+        for key in self._held.pop(ship_id, ()):
+            if self._cells.get(key) == ship_id:
+                del self._cells[key]
+        for key in [key for key, owner in self._edges.items() if owner == ship_id]:
+            del self._edges[key]
+
+    def is_free(self, cell, step, ship_id=None):
+        """
+        :param cell: Flat cell index
+        :param step: Steps from now
+        :param ship_id: The ship asking, its own reservations do not count
+        :return: Whether the cell can be occupied at that step
+        """
+        owner = self._cells.get((cell, step))
+        return owner is None or owner == ship_id
+
+    def can_move(self, source, target, step, ship_id=None):
+        """
+        :param source: Flat index of the cell moved from
+        :param target: Flat index of the cell moved to
+        :param step: The step at which the move starts
+        :param ship_id: The ship asking, its own reservations do not count
+        :return: Whether the move neither ends on a reserved cell nor swaps with another ship
+        """
+        if not self.is_free(target, step + 1, ship_id):
+            return False
+        owner = self._edges.get((target, source, step))
+        return owner is None or owner == ship_id
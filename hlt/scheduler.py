@@ -0,0 +1,107 @@
+import time
+
+
+class AnytimeStage:
+    """
+    An expensive planner paired with a cheap fallback producing the same kind of result.
+
+    The stage keeps a running estimate of how long the planner takes and only runs it when that estimate
+    still fits in the time left this turn; otherwise the fallback answers instead.
+    """
+    def __init__(self, name, planner, fallback):
+        self.name = name
+        self.planner = planner
+        self.fallback = fallback
+        self.estimate = 0.0
+        self.planned = 0
+        self.degraded = 0
+
+    def run(self, scheduler, *args, **kwargs):
+        """
+        Runs the planner when it fits in the remaining budget, the fallback otherwise.
+        :param scheduler: The TurnScheduler holding the budget
+        :return: The result of whichever function ran
+        """
+        if scheduler.available() > self.estimate:
+            start = time.perf_counter()
+            result = self.planner(*args, **kwargs)
+            duration = time.perf_counter() - start
+
+            # Follow slowdowns immediately, speedups gradually
+            self.estimate = max(duration, 0.8 * self.estimate + 0.2 * duration)
+            self.planned += 1
+            return result
+
+        self.degraded += 1
+        return self.fallback(*args, **kwargs)
+
+    def reset_counts(self):
+        self.planned = 0
+        self.degraded = 0
+
+
+class TurnScheduler:
+    """
+    Keeps track of the time left in the current turn.
+
+    The turn starts when Game.update_frame returns. Planners registered as anytime stages fall back to their cheap
+    alternative once the turn limit minus the reserve is close, so the bot always answers in time.
+    """
+    def __init__(self, turn_limit=2.0, reserve=0.3):
+        """
+        :param turn_limit: Seconds the engine allows per turn
+        :param reserve: Seconds kept free for the remaining cheap work and sending the commands
+        """
+        self.turn_limit = turn_limit
+        self.reserve = reserve
+        self._start = time.perf_counter()
+        self._stages = {}
+
+    def start_turn(self):
+        self._start = time.perf_counter()
+        for stage in self._stages.values():
+            stage.reset_counts()
+
+    def elapsed(self):
+        """
+        :return: Seconds since the turn started
+        """
+        return time.perf_counter() - self._start
+
+    def remaining(self):
+        """
+        :return: Seconds left until the turn limit
+        """
+        return self.turn_limit - self.elapsed()
+
+    def available(self):
+        """
+        :return: Seconds left for planners, after setting aside the reserve
+        """
+        return self.remaining() - self.reserve
+
+    def register(self, name, planner, fallback):
+        """
+        Registers an anytime stage.
+        :param name: Name to run the stage by
+        :param planner: The expensive function
+        :param fallback: A cheap function taking the same arguments
+        :return: The AnytimeStage
+        """
+        stage = AnytimeStage(name, planner, fallback)
+        self._stages[name] = stage
+        return stage
+
+    def run(self, name, *args, **kwargs):
+        """
+        Runs a registered stage with the given arguments.
+        :param name: The name the stage was registered by
+        :return: The result of the planner or its fallback
+        """
+        return self._stages[name].run(self, *args, **kwargs)
+
+    def degraded_stages(self):
+        """
+        :return: A dict of stage name to the number of fallbacks taken this turn, for stages that degraded
+        """
+        return {name: stage.degraded for name, stage in self._stages.items() if stage.degraded}
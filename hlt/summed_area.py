@@ -0,0 +1,131 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+def _diamond_mask(height, width, radius):
+    """
+    :return: The cells within the radius of (0, 0); around any other centre the same mask is rolled into place
+    """
+    dx = np.minimum(np.arange(width), width - np.arange(width))
+    dy = np.minimum(np.arange(height), height - np.arange(height))
+    return (dy[:, None] + dx[None, :]) <= radius
+
+
+@lru_cache(maxsize=16)
+def _diamond_kernel(height, width, radius):
+    return np.fft.rfft2(_diamond_mask(height, width, radius))
+
+
+def diamond_convolution(grid, radius):
+    """
+    Sums a toroidal grid over the Manhattan diamond around every cell as one FFT convolution, for any radius.
+    Cheaper than building a SummedAreaTable when only this one map is needed, e.g. for counting ships every turn.
+    :param grid: An array of integers whose last two axes are (height, width), leading axes stack independent grids
+    :param radius: The Manhattan radius
+    :return: An int64 array of the same shape holding the diamond sum around every cell
+    """
+    height, width = grid.shape[-2:]
+    kernel = _diamond_kernel(height, width, radius)
+    return np.rint(np.fft.irfft2(np.fft.rfft2(grid) * kernel, s=(height, width))).astype(np.int64)
+
+
+class SummedAreaTable:
+    """
+    Prefix sums over a toroidal grid, answering rectangle, diamond (Manhattan radius) and ring sums in O(1).
+
+    Rectangles are read from the prefix sums of the grid tiled 2x2, so any rectangle up to the map size is one
+    contiguous block whatever its wrap. Diamonds are read from a second table, built over the grid rotated by 45
+    degrees: with u = x + y and v = x - y the diamond |dx| + |dy| <= r becomes the square |du| <= r, |dv| <= r.
+    That holds for radii up to max_radius, where a diamond does not wrap onto itself yet; larger radii are summed
+    from a distance mask instead, or for a whole map at once as an FFT convolution with that mask.
+
+    All queries take scalar or array coordinates, so a sweep over every cell of the map is one vectorized lookup.
+    """
+    def __init__(self, grid):
+        """
+        :param grid: A (height, width) array
+        """
+        self.height, self.width = grid.shape
+        self.grid = grid
+        self.max_radius = (min(self.width, self.height) - 1) // 2
+
+        self._rect = np.zeros((2 * self.height + 1, 2 * self.width + 1), dtype=np.int64)
+        self._rect[1:, 1:] = np.tile(grid, (2, 2)).cumsum(axis=0).cumsum(axis=1)
+
+        # Pad by max_radius on all sides, so every diamond up to max_radius lies within the padded grid
+        pad = self.max_radius
+        padded = np.pad(grid, pad, mode="wrap")
+        rows, columns = np.indices(padded.shape)
+        self._v_offset = padded.shape[0] - 1
+        rotated = np.zeros((sum(padded.shape) - 1, sum(padded.shape) - 1), dtype=np.int64)
+        rotated[columns + rows, columns - rows + self._v_offset] = padded
+        self._diamond = np.zeros((rotated.shape[0] + 1, rotated.shape[1] + 1), dtype=np.int64)
+        self._diamond[1:, 1:] = rotated.cumsum(axis=0).cumsum(axis=1)
+
+    def rect(self, x, y, width, height):
+        """
+        :param x: Left column, wrapped
+        :param y: Top row, wrapped
+        :param width: Number of columns, at most the map width
+        :param height: Number of rows, at most the map height
+        :return: The sum over the rectangle
+        """
+        x = np.mod(x, self.width)
+        y = np.mod(y, self.height)
+        table = self._rect
+        return table[y + height, x + width] - table[y, x + width] - table[y + height, x] + table[y, x]
+
+    def box(self, x, y, radius):
+        """
+        :return: The sum over the square of cells within Chebyshev distance radius of (x, y)
+        """
+        side = np.minimum(2 * radius + 1, self.width), np.minimum(2 * radius + 1, self.height)
+        return self.rect(np.subtract(x, radius), np.subtract(y, radius), *side)
+
+    def diamond(self, x, y, radius):
+        """
+        :return: The sum over the cells within Manhattan distance radius of (x, y), each counted once
+        """
+        if radius > self.max_radius:
+            return self._diamond_from_mask(x, y, radius)
+        column = np.mod(x, self.width) + self.max_radius
+        row = np.mod(y, self.height) + self.max_radius
+        u = column + row
+        v = column - row + self._v_offset
+        table = self._diamond
+        low_u, high_u = u - radius, u + radius + 1
+        low_v, high_v = v - radius, v + radius + 1
+        return table[high_u, high_v] - table[low_u, high_v] - table[high_u, low_v] + table[low_u, low_v]
+
+    def ring(self, x, y, radius):
+        """
+        :return: The sum over the cells at exactly Manhattan distance radius of (x, y)
+        """
+        if radius == 0:
+            return self.diamond(x, y, 0)
+        return self.diamond(x, y, radius) - self.diamond(x, y, radius - 1)
+
+    def diamond_map(self, radius):
+        """
+        :return: A (height, width) array holding the diamond sum around every cell
+        """
+        if radius > self.max_radius:
+            return diamond_convolution(self.grid, radius)
+        ys, xs = np.indices((self.height, self.width))
+        return self.diamond(xs, ys, radius)
+
+    def ring_map(self, radius):
+        """
+        :return: A (height, width) array holding the ring sum around every cell
+        """
+        ys, xs = np.indices((self.height, self.width))
+        return self.ring(xs, ys, radius)
+
+    def _diamond_from_mask(self, x, y, radius):
+        mask = _diamond_mask(self.height, self.width, radius)
+        xs, ys = np.broadcast_arrays(np.mod(x, self.width), np.mod(y, self.height))
+        sums = np.empty(xs.shape, dtype=np.int64)
+        for index in np.ndindex(xs.shape):
+            sums[index] = self.grid[np.roll(mask, (ys[index], xs[index]), axis=(0, 1))].sum()
+        return sums if sums.ndim else sums[()]
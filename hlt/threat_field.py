@@ -0,0 +1,40 @@
+import numpy as np
+
+from .summed_area import diamond_convolution
+
+
+class ThreatField:
+    """
+    How dangerous every cell of the map is this turn, from the opponent ships that can reach it.
+
+    Every opponent ship threatens the cells it can reach in one move with its risk, and the cells it can reach in
+    two moves with half its risk. The risk is what the opponent has to lose: MAX_HALITE minus its cargo, as an
+    empty ship gives up nothing by colliding while a full one is unlikely to. Both rings are one convolution over
+    all opponent ships at once. Cells within one step of my structures are never threatened, ships waiting there
+    to block my base are simply run into.
+    """
+    def __init__(self, game_map):
+        self.width = game_map.width
+        self.height = game_map.height
+        safe = game_map.base_zone
+
+        near = diamond_convolution(game_map.enemy_risk, 1)
+        far = diamond_convolution(game_map.enemy_risk, 2) - near
+        # The cost of entering a cell, in halite, for navigation
+        self.costs = np.where(safe, 0, near + far // 2)
+        # Cells an opponent ship can move onto this turn, regardless of its cargo
+        self.contested = (game_map.enemy_density(1) > 0) & ~safe
+
+    def cost(self, position):
+        """
+        :param position: The position to look up
+        :return: The threat cost of entering the cell
+        """
+        return int(self.costs[position.y % self.height, position.x % self.width])
+
+    def is_contested(self, position):
+        """
+        :param position: The position to look up
+        :return: Whether an opponent ship can move onto the cell this turn
+        """
+        return bool(self.contested[position.y % self.height, position.x % self.width])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+""" Measures how long a full re-rate takes, on synthetic results or on the results table of a database.
+
+    python3 benchmark_rating.py --games 100000
+    python3 benchmark_rating.py --db db.sqlite3
+"""
+
+import time
+import random
+import sqlite3
+import argparse
+
+import skills
+from skills import trueskill
+
+import player as pl
+import rating
+import util
+
+
+def synthetic_results(num_games, num_players, seed):
+    """ Results rows (game_id, name, finish) of 2 and 4 player games between bots of random strength """
+    rng = random.Random(seed)
+    strength = {"bot%d" % i: rng.gauss(25.0, 5.0) for i in range(num_players)}
+    names = sorted(strength)
+    rows = []
+    for game_id in range(1, num_games + 1):
+        contestants = rng.sample(names, rng.choice([2, 4]))
+        performance = sorted(contestants, key=lambda name: rng.gauss(strength[name], 4.0), reverse=True)
+        rows.extend((game_id, name, performance.index(name) + 1) for name in contestants)
+    return names, rows
+
+
+def legacy_rerate(players, results):
+    """ The per match update the manager used to do: new calculator per game and a linear scan per player """
+    games = 0
+    game_rows = {}
+    for game_id, name, finish in results:
+        game_rows.setdefault(game_id, []).append((name, finish))
+    for rows in game_rows.values():
+        contestants = [next(player for player in players if player.name == name) for name, _ in rows]
+        teams = [skills.Team({player.name: skills.GaussianRating(player.mu, player.sigma)}) for player in contestants]
+        calc = trueskill.FactorGraphTrueSkillCalculator()
+        game_info = trueskill.TrueSkillGameInfo()
+        updated = calc.new_ratings(skills.Match(teams, [finish for _, finish in rows]), game_info)
+        for team in updated:
+            player_name, skill_data = next(iter(team.items()))
+            player = next(player for player in contestants if player.name == str(player_name))
+            player.mu = skill_data.mean
+            player.sigma = skill_data.stdev
+            player.update_skill()
+        games += 1
+    return games
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=100000, help="Number of synthetic games")
+    parser.add_argument("--players", type=int, default=24, help="Number of synthetic bots")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the synthetic results")
+    parser.add_argument("--legacy-games", type=int, default=2000, help="Number of games to time the old update on")
+    parser.add_argument("--db", default="", help="Re-rate the results of this database instead, without writing to it")
+    args = parser.parse_args()
+
+    if args.db:
+        db = sqlite3.connect(args.db)
+        players = [util.parse_player_record(record) for record in db.execute("select * from players")]
+        results = db.execute("select game_id, name, finish from results order by game_id, id").fetchall()
+        db.close()
+        names = [player.name for player in players]
+    else:
+        start = time.perf_counter()
+        names, results = synthetic_results(args.games, args.players, args.seed)
+        print("Generated %d results rows in %.2fs" % (len(results), time.perf_counter() - start))
+
+    service = rating.RatingService([pl.Player(name, "") for name in names])
+    start = time.perf_counter()
+    games = service.rerate(results)
+    elapsed = time.perf_counter() - start
+    print("RatingService: %d games in %.2fs, %.0f games/s" % (games, elapsed, games / elapsed))
+
+    sample = [row for row in results if row[0] <= results[0][0] + args.legacy_games - 1]
+    start = time.perf_counter()
+    legacy_games = legacy_rerate([pl.Player(name, "") for name in names], sample)
+    legacy_elapsed = time.perf_counter() - start
+    rate = legacy_games / legacy_elapsed
+    print("Per match update: %d games in %.2fs, %.0f games/s, about %.0fs for all %d games"
+          % (legacy_games, legacy_elapsed, rate, games / rate, games))
+
+    for player in sorted(service.players.values(), key=lambda player: player.skill, reverse=True)[:10]:
+        print(player)
+
+
+if __name__ == "__main__":
+    main()
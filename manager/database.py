@@ -2,11 +2,22 @@ import sqlite3
 import datetime
 import util
 import os
+from contextlib import contextmanager
 
 class Database:
     def __init__(self, filename):
+        self.connect(filename)
+
+    def connect(self, filename):
         self.db = sqlite3.connect(filename)
+        # WAL lets readers (show_ranks, get_results) run next to the writer, and syncs on checkpoints
+        # instead of on every commit
+        self.db.execute("pragma journal_mode=wal")
+        self.db.execute("pragma synchronous=normal")
+        self.in_transaction = False
         self.recreate()
+        game_id = self.retrieve("SELECT max(game_id) FROM results")[0][0]
+        self.next_game_id = int(game_id) + 1 if game_id else 1
 
     def __del__(self):
         try:
@@ -24,6 +35,26 @@ class Database:
             self.db.commit()
         except:
             pass
+        cursor.execute("create index if not exists results_game_id on results(game_id)")
+        cursor.execute("create index if not exists players_skill on players(skill)")
+        self.db.commit()
+
+    @contextmanager
+    def transaction(self):
+        """ Group all updates inside the with block into a single commit, rolled back if the block raises """
+        if self.in_transaction:
+            yield
+            return
+        self.in_transaction = True
+        try:
+            with self.db:
+                yield
+        finally:
+            self.in_transaction = False
+
+    def commit(self):
+        if not self.in_transaction:
+            self.db.commit()
 
     def update_deferred( self, sql, tup=() ):
         cursor = self.db.cursor()        
@@ -31,12 +62,12 @@ class Database:
         
     def update( self, sql, tup=() ):
         self.update_deferred(sql,tup)
-        self.db.commit()
+        self.commit()
 
     def update_many(self, sql, iterable):
         cursor = self.db.cursor()
         cursor.executemany(sql, iterable)
-        self.db.commit()
+        self.commit()
         
     def retrieve( self, sql, tup=() ):
         cursor = self.db.cursor()        
@@ -44,10 +75,11 @@ class Database:
         return cursor.fetchall()
 
     def add_match( self, match ):
-        sql = 'SELECT max(game_id) FROM results'
-        game_id = self.retrieve(sql)[0][0]
-        game_id = int(game_id) + 1 if game_id else 1
+        # The manager is the only writer, so the next id is kept here instead of asking for max(game_id) each time
+        game_id = self.next_game_id
         self.update_many("INSERT INTO results (game_id, name, finish, num_players, map_width, map_height, map_seed, map_generator, timestamp, logs, replay_file) VALUES (?,?,?,?,?,?,?,?,?,?,?)", [(game_id, player.name, rank, match.num_players, match.map_width, match.map_height, match.map_seed, match.map_generator, self.now(), str(match.logs), str(match.replay_file)) for player, rank in zip(match.players, match.results)])
+        self.next_game_id = game_id + 1
+        return game_id
 
         #for player, rank in zip(match.players, match.results):
         #    print(player, rank)
@@ -89,13 +121,16 @@ class Database:
         self.update("update players set ngames=ngames+1,lastseen=?,skill=?,mu=?,sigma=? where name=?", (self.now(), skill, mu, sigma, name))
 
 
+    def set_player_ratings(self, players):
+        self.update_many("update players set skill=?,mu=?,sigma=?,ngames=? where name=?", [(player.skill, player.mu, player.sigma, player.ngames, player.name) for player in players])
+
+
     def update_player_rank( self, name, rank ):
         self.update("update players set rank=? where name=?", (rank, name))
 
 
     def update_player_ranks(self):
-        for i, p in enumerate(self.retrieve("select name from players order by skill desc",())):
-            self.update_player_rank( p[0], i+1 )
+        self.update("update players set rank = ranked.position from (select id, row_number() over (order by skill desc) as position from players) as ranked where players.id = ranked.id")
 
 
     def activate_player(self, name):
@@ -115,9 +150,10 @@ class Database:
             assert players, 'No players recovered from database?  Reset aborted.'
             # blow out database
             self.db.close()
-            os.remove(filename)
-            self.db = sqlite3.connect(filename)
-            self.recreate()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(filename + suffix):
+                    os.remove(filename + suffix)
+            self.connect(filename)
             for player in players:
                 self.add_player(player.name, player.path, player.active)
 
@@ -12,18 +12,22 @@
 #      See the License for the specific language governing permissions and
 #      limitations under the License.
 
+import os
 import random
 import sys
 import math
+import tempfile
 import argparse
-
-import skills
-from skills import trueskill
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
 from subprocess import call
 
 import match
 import database
 import player as pl
+import profiles
+import rating
+import replay
 import util
 
 
@@ -49,20 +53,54 @@ class Manager:
         self.keep_logs = True
         self.priority_sigma = True
         self.exclude_inactive = False
+        self.jobs = 1
+        self.replay_store = None
+        # Bots only buffer and write log records from this level up, see hlt/logs.py
+        self.bot_log_level = "ERROR"
+        # Directory bots write per-game turn profiles to, see hlt/profiler.py
+        self.profile_dir = None
         self.db = database.Database(db_filename)
+        self.ratings = rating.RatingService(players or ())
 
-    def run_round(self, contestants, width, height, seed):
+    def create_match(self, contestants, width, height, seed):
         m = match.Match(contestants, width, height, seed, max_match_rounds(width, height), self.keep_replays, self.keep_logs)
+        if self.bot_log_level:
+            m.bot_env["HLT_LOG_LEVEL"] = self.bot_log_level
+        # Matches run side by side in the same working directory, so each gets its own directory for bot logs
+        os.makedirs(match.bot_log_dir, exist_ok=True)
+        m.bot_log_dir = tempfile.mkdtemp(prefix="match-", dir=match.bot_log_dir)
+        m.bot_env["HLT_LOG_DIR"] = m.bot_log_dir
+        if self.profile_dir:
+            m.bot_env["HLT_PROFILE"] = profiles.match_directory(self.profile_dir, m)
         print(m)
+        return m
+
+    def play_match(self, m):
+        """ Run a match and, when there is a replay store, decode its replay while still on the worker thread """
+        m.play(self.halite_binary)
+        if self.replay_store is not None and m.keep_replay:
+            try:
+                m.replay_columns = replay.decode_replay_file(m.replay_file)
+            except Exception as e:
+                print("Could not decode replay %s: %s" % (m.replay_file, e))
+
+    def record_match(self, m):
+        """ Store a rated match. Only ever called from the main thread, so the database sees one match at a
+        time, whatever the number of games in flight """
         try:
-            m.run_match(self.halite_binary)
             print(m)
-            self.save_players(contestants)
-            self.db.update_player_ranks()
-            self.db.add_match(m)
+            with self.db.transaction():
+                self.save_players(m.players)
+                self.db.update_player_ranks()
+                game_id = self.db.add_match(m)
+            if m.replay_columns is not None:
+                self.replay_store.add(game_id, m.replay_columns)
+            if self.profile_dir:
+                for name, (p50, p95, longest) in profiles.store_match(self.profile_dir, m, game_id).items():
+                    print("%s turn latency: p50 %.2f ms, p95 %.2f ms, max %.2f ms" % (name, p50, p95, longest))
             self.show_ranks()
         except Exception as e:
-            print("Exception in run_round:")
+            print("Exception in record_match:")
             print(e)
 
     def save_players(self, players):
@@ -108,13 +146,62 @@ class Manager:
     def run_rounds_unix(self, player_dist, map_dist):
         from keyboard_detection import keyboard_detection
         with keyboard_detection() as key_pressed:
-            while not key_pressed() and ((self.rounds < 0) or (self.round_count < self.rounds)):
-                self.setup_round(player_dist, map_dist)
+            self.run_rounds_concurrent(player_dist, map_dist, key_pressed)
 
     def run_rounds_windows(self, player_dist, map_dist):
         import msvcrt
-        while not  msvcrt.kbhit()and ((self.rounds < 0) or (self.round_count < self.rounds)):
-            self.setup_round(player_dist, map_dist)
+        self.run_rounds_concurrent(player_dist, map_dist, msvcrt.kbhit)
+
+    def rounds_left(self):
+        return (self.rounds < 0) or (self.round_count < self.rounds)
+
+    def run_rounds_concurrent(self, player_dist, map_dist, stop_requested):
+        """ Keep self.jobs matches in flight until the rounds run out or a key is pressed. Each worker thread only
+        waits on its own halite process and queues the match with the rating service when it is done; contestants
+        are picked and queued matches are rated and recorded here, so every new slot is filled using the ratings of
+        all games recorded so far """
+        in_flight = set()
+        stopping = False
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while True:
+                stopping = stopping or stop_requested()
+                while not stopping and len(in_flight) < self.jobs and self.rounds_left():
+                    m = self.setup_round(player_dist, map_dist)
+                    future = pool.submit(self.play_match, m)
+                    future.add_done_callback(partial(self.match_finished, m))
+                    in_flight.add(future)
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                in_flight -= done
+                for m in self.ratings.process_finished():
+                    self.record_match(m)
+        # Callbacks of the last matches may only have run once the pool shut down
+        for m in self.ratings.process_finished():
+            self.record_match(m)
+
+    def discard_profiles(self, m):
+        if self.profile_dir:
+            profiles.discard_match(self.profile_dir, m)
+
+    def match_finished(self, m, future):
+        if future.exception() is not None:
+            print("Exception in play_match:")
+            print(future.exception())
+            self.discard_profiles(m)
+        else:
+            self.ratings.submit(m)
+
+    def rerate(self):
+        """ Recompute all ratings by replaying every stored result in game order """
+        players = [util.parse_player_record(player) for player in self.db.retrieve("select * from players")]
+        self.ratings = rating.RatingService(players)
+        games = self.ratings.rerate(self.db.retrieve("select game_id, name, finish from results order by game_id, id"))
+        with self.db.transaction():
+            self.db.set_player_ratings(players)
+            self.db.update_player_ranks()
+        print("Re-rated %d players from %d games" % (len(players), games))
+        self.show_ranks()
 
     def setup_round (self, player_dist, map_dist):
         if self.players_max > 3:
@@ -128,8 +215,8 @@ class Manager:
         size_h = size_w
         seed = random.randint(10000, 2073741824)
         print ("\n------------------- running new match... -------------------\n")
-        self.run_round(contestants, size_w, size_h, seed)
         self.round_count += 1
+        return self.create_match(contestants, size_w, size_h, seed)
 
     def add_player(self, name, path):
         p = self.db.get_player((name,))
@@ -249,6 +336,10 @@ class Commandline:
                                  action = "store", default = "25",
                                  help = "Limit number of results")
 
+        self.parser.add_argument("-j", "--jobs", dest="jobs",
+                                 action = "store", default = 1, type = int,
+                                 help = "Number of matches to run at the same time")
+
         self.parser.add_argument("-n", "--no-replays", dest="deleteReplays",
                                  action = "store_true", default = False,
                                  help = "Do not store replays")
@@ -269,6 +360,30 @@ class Commandline:
                                  action = 'store_true', default = False,
                                  help = 'Delete ALL information in the database, then recreate a new one with existing bot names and paths')
 
+        self.parser.add_argument('--rerate', dest='rerate',
+                                 action = 'store_true', default = False,
+                                 help = 'Recompute all ratings from the stored match results')
+
+        self.parser.add_argument('--bot-log-level', dest='bot_log_level',
+                                 action = 'store', default = 'ERROR',
+                                 help = 'Logging level passed to the bots through HLT_LOG_LEVEL, e.g. DEBUG, ERROR or OFF')
+
+        self.parser.add_argument('--profile', dest='profile_dir',
+                                 action = 'store', default = '',
+                                 help = 'Have the bots profile their turns, and keep the profiles in this directory')
+
+        self.parser.add_argument('--latency', dest='latency',
+                                 action = 'store_true', default = False,
+                                 help = 'Show p50/p95/max turn latency per bot over all profiles kept with --profile')
+
+        self.parser.add_argument('--replay-store', dest='replay_store',
+                                 action = 'store', default = '',
+                                 help = 'Decode the replay of every new match into this columnar replay store')
+
+        self.parser.add_argument('--import-replays', dest='import_replays',
+                                 action = 'store_true', default = False,
+                                 help = 'Decode all stored replays into the replay store given by --replay-store')
+
         self.parser.add_argument('--db','--database', dest='db_filename',
                                  action = "store", default = "db.sqlite3",
                                  help = 'Specify the database filename')
@@ -315,6 +430,8 @@ class Commandline:
             print("use the -h flag to get help")
         else:
             self.manager.players = players
+            for player in players:
+                self.manager.ratings.add_player(player)
             self.manager.rounds = rounds
             self.manager.run_rounds(self.cmds.player_dist, self.cmds.map_dist)
 
@@ -330,6 +447,22 @@ class Commandline:
             print("keep_logs = False")
             self.manager.keep_logs= False
             
+        if self.cmds.jobs > 1:
+            print("jobs = %d" % self.cmds.jobs)
+            self.manager.jobs = self.cmds.jobs
+
+        if self.cmds.bot_log_level:
+            print("bot_log_level = %s" % self.cmds.bot_log_level)
+            self.manager.bot_log_level = self.cmds.bot_log_level
+
+        if self.cmds.profile_dir:
+            print("profile_dir = %s" % self.cmds.profile_dir)
+            self.manager.profile_dir = self.cmds.profile_dir
+
+        if self.cmds.replay_store:
+            print("replay_store = %s" % self.cmds.replay_store)
+            self.manager.replay_store = replay.ReplayStore(self.cmds.replay_store)
+
         if self.cmds.equalPriority:
             print("priority_sigma = False")
             self.manager.priority_sigma = False
@@ -392,9 +525,22 @@ class Commandline:
             self.run_matches(1)
         
         elif self.cmds.forever:
-            print ("Running matches until interrupted. Press any key to exit safely at the end of the current match.")
+            print ("Running matches until interrupted. Press any key to exit safely at the end of the current matches.")
             self.run_matches(-1)
 
+        elif self.cmds.latency:
+            profiles.show_latency_report(self.cmds.profile_dir or "profiles")
+
+        elif self.cmds.import_replays:
+            if self.manager.replay_store is None:
+                print("You must specify the store with --replay-store")
+            else:
+                print("Imported %d replays" % self.manager.replay_store.import_database(self.cmds.db_filename))
+
+        elif self.cmds.rerate:
+            print("Re-rating all bots from stored results...")
+            self.manager.rerate()
+
         elif self.cmds.reset:
             print('You want to reset the database.  This is IRRECOVERABLE.  Make a backup first.')
             print('The existing bots names, paths, and activation status will be saved.')
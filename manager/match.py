@@ -1,30 +1,12 @@
 
 import os
-import copy
 import json
 import shutil
-import skills
-from skills import trueskill
 from subprocess import Popen, PIPE, call
 
 record_dir = "replays"
 error_dir = "error_replays"
-
-def update_skills(players, ranks):
-    """ Update player skills based on ranks from a match """
-    teams = [skills.Team({player.name: skills.GaussianRating(player.mu, player.sigma)}) for player in players]
-    match = skills.Match(teams, ranks)
-    calc = trueskill.FactorGraphTrueSkillCalculator()
-    game_info = trueskill.TrueSkillGameInfo()
-    updated = calc.new_ratings(match, game_info)
-    print ("Updating ranks")
-    for team in updated:
-        player_name, skill_data = next(iter(team.items()))    #in Halite, teams will always be a team of one player
-        player = next(player for player in players if player.name == str(player_name))   #this suggests that players should be a dictionary instead of a list
-        player.mu = skill_data.mean
-        player.sigma = skill_data.stdev
-        player.update_skill()
-        print("skill = %4f  mu = %3f  sigma = %3f  name = %s" % (player.skill, player.mu, player.sigma, str(player_name)))
+bot_log_dir = "bot_logs"
 
 class Match:
     def __init__(self, players, width, height, seed, turn_limit, keep_replays, keep_logs):
@@ -49,6 +31,9 @@ class Match:
         self.logs = None
         self.map_generator = None
         self.bots_terminated = None
+        self.replay_columns = None
+        self.bot_env = {}
+        self.bot_log_dir = None
 
     def __repr__(self):
         title1 = "Match between " + ", ".join([p.name for p in self.players]) + "\n"
@@ -67,21 +52,20 @@ class Match:
         result = [halite_binary, dim_height, dim_width, json]
         return result + self.paths
 
-    def run_match(self, halite_binary):
+    def play(self, halite_binary):
+        """ Run the game and file its replay and logs, leaving the ratings untouched """
         command = self.get_command(halite_binary)
         print("Command = " + str(command))
-        p = Popen(command, stdin=None, stdout=PIPE, stderr=None)
+        env = dict(os.environ, **self.bot_env) if self.bot_env else None
+        p = Popen(command, stdin=None, stdout=PIPE, stderr=None, env=env)
         results, _ = p.communicate(None, self.total_time_limit)
         self.results_string = results.decode('ascii')
         self.return_code = p.returncode
         self.parse_results_string()
-        update_skills(self.players, copy.deepcopy(self.results))
         if self.keep_replay:
             print("Keeping replay\n")
-            if not os.path.exists(record_dir):
-                os.makedirs(record_dir)
-            if not os.path.exists(error_dir):
-                os.makedirs(error_dir)
+            os.makedirs(record_dir, exist_ok=True)
+            os.makedirs(error_dir, exist_ok=True)
             try:
                 if self.bots_terminated:
                     shutil.copy(self.replay_file, error_dir)
@@ -97,10 +81,8 @@ class Match:
 
         if self.keep_logs:
             print("Keeping logs\n")
-            if not os.path.exists(record_dir):
-                os.makedirs(record_dir)
-            if not os.path.exists(error_dir):
-                os.makedirs(error_dir)
+            os.makedirs(record_dir, exist_ok=True)
+            os.makedirs(error_dir, exist_ok=True)
             try:
                 for key, filename in self.logs.items():
                     if (self.bots_terminated != None):
@@ -113,6 +95,8 @@ class Match:
             print("Deleting logs\n")
             for file in self.logs.values():
                 os.remove(file)
+            if self.bot_log_dir:
+                shutil.rmtree(self.bot_log_dir, ignore_errors=True)
 #        self.fix_logs()
 
 #    def fix_logs(self):
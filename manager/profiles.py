@@ -0,0 +1,81 @@
+""" Collects the per-game profiles bots write when HLT_PROFILE is set (see hlt/profiler.py) and aggregates turn
+latency per bot over all stored games.
+
+    python3 profiles.py profiles        # p50/p95/max turn latency per bot
+"""
+
+import os
+import sys
+import shutil
+from collections import defaultdict
+
+import numpy as np
+
+
+def phase_durations(filename, phase="turn"):
+    """ The durations of one phase in a bot's profile
+    :return: The durations in milliseconds, in turn order """
+    with np.load(filename) as data:
+        names = data["names"].tolist()
+        if phase not in names:
+            return np.empty(0)
+        return data["duration"][data["phase"] == names.index(phase)] / 1e6
+
+
+def summarize(durations):
+    """ :return: (p50, p95, max) of the durations, or zeros when there are none """
+    if not len(durations):
+        return 0.0, 0.0, 0.0
+    p50, p95 = np.percentile(durations, [50, 95])
+    return p50, p95, durations.max()
+
+
+def match_directory(directory, m):
+    """ The directory a match's bots write their profiles to while it runs """
+    return os.path.join(directory, "match-%d" % id(m))
+
+
+def store_match(directory, m, game_id):
+    """ Move the profiles of a finished match into the store as <game_id>-<bot name>.npz, one per bot
+    :return: {bot name: (p50, p95, max) turn latency in this game} """
+    source = match_directory(directory, m)
+    summary = {}
+    for index, player in enumerate(m.players):
+        filename = os.path.join(source, "bot-%d.npz" % index)
+        if not os.path.exists(filename):
+            continue
+        target = os.path.join(directory, "%d-%s.npz" % (game_id, player.name))
+        shutil.move(filename, target)
+        summary[player.name] = summarize(phase_durations(target))
+    shutil.rmtree(source, ignore_errors=True)
+    return summary
+
+
+def discard_match(directory, m):
+    shutil.rmtree(match_directory(directory, m), ignore_errors=True)
+
+
+def latency_report(directory, phase="turn"):
+    """ Aggregate a phase's latency per bot over every stored game
+    :return: {bot name: (games, turns, p50, p95, max)} """
+    per_bot = defaultdict(list)
+    for name in os.listdir(directory):
+        if name.endswith(".npz") and "-" in name:
+            per_bot[name[:-4].split("-", 1)[1]].append(phase_durations(os.path.join(directory, name), phase))
+    report = {}
+    for bot, games in per_bot.items():
+        durations = np.concatenate(games)
+        report[bot] = (len(games), len(durations)) + tuple(summarize(durations))
+    return report
+
+
+def show_latency_report(directory, phase="turn"):
+    print("{:<25}{:>8}{:>10}{:>10}{:>10}{:>10}".format("name", "games", "turns", "p50 ms", "p95 ms", "max ms"))
+    report = latency_report(directory, phase)
+    for bot in sorted(report, key=lambda bot: report[bot][3], reverse=True):
+        games, turns, p50, p95, longest = report[bot]
+        print("{:<25}{:>8}{:>10}{:>10.2f}{:>10.2f}{:>10.2f}".format(bot, games, turns, p50, p95, longest))
+
+
+if __name__ == "__main__":
+    show_latency_report(sys.argv[1] if len(sys.argv) > 1 else "profiles", *sys.argv[2:3])
@@ -0,0 +1,185 @@
+import math
+import queue
+import itertools
+
+from skills import trueskill
+
+
+def _pdf(x):
+    return math.exp(-0.5 * x * x) / math.sqrt(2.0 * math.pi)
+
+
+def _cdf(x):
+    return 0.5 * math.erfc(-x / math.sqrt(2.0))
+
+
+def _exceeds_margin(t, e):
+    """ The v and w corrections of skills.trueskill.truncated for a win, sharing one cdf evaluation """
+    denominator = _cdf(t - e)
+    if denominator < 2.222758749e-162:
+        return -t + e, (1.0 if t < 0.0 else 0.0)
+    v = _pdf(t - e) / denominator
+    return v, v * (v + t - e)
+
+
+def _within_margin(t, e):
+    """ The v and w corrections of skills.trueskill.truncated for a draw """
+    t_abs = abs(t)
+    denominator = _cdf(e - t_abs) - _cdf(-e - t_abs)
+    if denominator < 2.222758749e-162:
+        return (-t - e if t < 0.0 else -t + e), 1.0
+    v_abs = (_pdf(-e - t_abs) - _pdf(e - t_abs)) / denominator
+    w = v_abs ** 2 + ((e - t_abs) * _pdf(e - t_abs) - (-e - t_abs) * _pdf(-e - t_abs)) / denominator
+    return (-v_abs if t < 0.0 else v_abs), w
+
+
+def free_for_all(ratings, ranks, game_info, tolerance=1e-6, max_iterations=50):
+    """ TrueSkill update for a free for all game between single player teams, the only kind Halite has.
+
+    This runs expectation propagation on the same factor graph FactorGraphTrueSkillCalculator builds, but on
+    plain floats in precision / precision-adjusted-mean form instead of message and variable objects, which makes
+    it an order of magnitude faster. Ties within the ranks are treated as draws.
+    :param ratings: (mu, sigma) per player
+    :param ranks: The rank each player finished with, lower is better
+    :param game_info: The TrueSkillGameInfo holding beta, tau and the draw margin
+    :return: The new (mu, sigma) per player, in the order they were given """
+    order = sorted(range(len(ratings)), key=lambda i: ranks[i])
+    beta_squared = game_info.beta ** 2
+    tau_squared = game_info.dynamics_factor ** 2
+    epsilon = game_info.draw_margin
+    n = len(order)
+
+    # Skill priors, and the messages they send to the team performances
+    prior_pi = [1.0 / (ratings[i][1] ** 2 + tau_squared) for i in order]
+    prior_tau = [ratings[i][0] * pi for i, pi in zip(order, prior_pi)]
+    perf_pi = [1.0 / (1.0 / pi + beta_squared) for pi in prior_pi]
+    perf_tau = [pi * tau / prior for pi, tau, prior in zip(perf_pi, prior_tau, prior_pi)]
+
+    # Marginals of the performances, and the messages each difference factor sent to its two performances
+    marginal_pi, marginal_tau = perf_pi[:], perf_tau[:]
+    up_pi = [[0.0, 0.0] for _ in range(n - 1)]
+    up_tau = [[0.0, 0.0] for _ in range(n - 1)]
+    draws = [ranks[order[k]] == ranks[order[k + 1]] for k in range(n - 1)]
+
+    def update_difference(k):
+        """ Refine difference k = performance k - performance k+1 against its truncation, return the change """
+        a, b = k, k + 1
+        cavity_a_pi, cavity_a_tau = marginal_pi[a] - up_pi[k][0], marginal_tau[a] - up_tau[k][0]
+        cavity_b_pi, cavity_b_tau = marginal_pi[b] - up_pi[k][1], marginal_tau[b] - up_tau[k][1]
+        mean_a, var_a = cavity_a_tau / cavity_a_pi, 1.0 / cavity_a_pi
+        mean_b, var_b = cavity_b_tau / cavity_b_pi, 1.0 / cavity_b_pi
+
+        # Message into the difference, then the truncated marginal it gets from the comparison
+        c = 1.0 / (var_a + var_b)
+        d = (mean_a - mean_b) * c
+        sqrt_c = math.sqrt(c)
+        t, e = d / sqrt_c, epsilon * sqrt_c
+        v, w = _within_margin(t, e) if draws[k] else _exceeds_margin(t, e)
+        truncated_pi = c / (1.0 - w)
+        truncated_tau = (d + sqrt_c * v) / (1.0 - w)
+        # The comparison's own message: what truncation added to the incoming message
+        message_pi, message_tau = truncated_pi - c, truncated_tau - d
+        message_mean, message_var = message_tau / message_pi, 1.0 / message_pi
+
+        # Send back down: a = difference + b, b = a - difference
+        new_a_pi = 1.0 / (message_var + var_b)
+        new_a_tau = (message_mean + mean_b) * new_a_pi
+        new_b_pi = 1.0 / (message_var + var_a)
+        new_b_tau = (mean_a - message_mean) * new_b_pi
+        delta = abs(new_a_tau / new_a_pi - up_tau[k][0] / up_pi[k][0]) if up_pi[k][0] else float("inf")
+        up_pi[k] = [new_a_pi, new_b_pi]
+        up_tau[k] = [new_a_tau, new_b_tau]
+        marginal_pi[a], marginal_tau[a] = cavity_a_pi + new_a_pi, cavity_a_tau + new_a_tau
+        marginal_pi[b], marginal_tau[b] = cavity_b_pi + new_b_pi, cavity_b_tau + new_b_tau
+        return delta
+
+    for _ in range(max_iterations):
+        delta = 0.0
+        for k in itertools.chain(range(n - 1), reversed(range(n - 1))):
+            delta = max(delta, update_difference(k))
+        if n == 2 or delta < tolerance:
+            break
+
+    # Everything the comparisons said about each performance, passed up through the performance noise to the skill
+    new_ratings = [None] * n
+    for position, i in enumerate(order):
+        likelihood_pi = marginal_pi[position] - perf_pi[position]
+        likelihood_tau = marginal_tau[position] - perf_tau[position]
+        skill_pi, skill_tau = prior_pi[position], prior_tau[position]
+        if likelihood_pi > 0:
+            message_pi = 1.0 / (1.0 / likelihood_pi + beta_squared)
+            skill_pi += message_pi
+            skill_tau += message_pi * likelihood_tau / likelihood_pi
+        new_ratings[i] = (skill_tau / skill_pi, math.sqrt(1.0 / skill_pi))
+    return new_ratings
+
+
+class RatingService:
+    """ Keeps the TrueSkill ratings of all players up to date.
+
+    The game info is built once and players are looked up by name. Finished matches are put on a queue by whoever
+    runs them and rated by a single consumer, in the order they finished. """
+
+    def __init__(self, players=()):
+        self.game_info = trueskill.TrueSkillGameInfo()
+        self.players = {}
+        self.finished = queue.Queue()
+        for player in players:
+            self.add_player(player)
+
+    def add_player(self, player):
+        self.players[player.name] = player
+
+    def rate(self, names, ranks):
+        """ Update the ratings of the named players from the ranks they finished a game with """
+        players = [self.players[name] for name in names]
+        updated = free_for_all([(player.mu, player.sigma) for player in players], ranks, self.game_info)
+        for player, (mu, sigma) in zip(players, updated):
+            player.mu = mu
+            player.sigma = sigma
+            player.update_skill()
+
+    def rate_match(self, match):
+        for player in match.players:
+            self.players.setdefault(player.name, player)
+        self.rate([player.name for player in match.players], match.results)
+        print ("Updating ranks")
+        for player in match.players:
+            print("skill = %4f  mu = %3f  sigma = %3f  name = %s" % (player.skill, player.mu, player.sigma, player.name))
+
+    def submit(self, match):
+        """ Queue a finished match for rating, safe to call from any thread """
+        self.finished.put(match)
+
+    def process_finished(self):
+        """ Rate all queued matches, in the order they were submitted
+        :return: The rated matches """
+        rated = []
+        while True:
+            try:
+                match = self.finished.get_nowait()
+            except queue.Empty:
+                return rated
+            self.rate_match(match)
+            rated.append(match)
+
+    def rerate(self, results):
+        """ Rebuild all ratings from scratch by replaying stored results.
+        :param results: (game_id, name, finish) rows, ordered by game_id
+        :return: The number of games replayed """
+        for player in self.players.values():
+            player.mu = self.game_info.initial_mean
+            player.sigma = self.game_info.initial_stdev
+            player.ngames = 0
+            player.update_skill()
+
+        games = 0
+        for _, rows in itertools.groupby(results, key=lambda row: row[0]):
+            rows = [row for row in rows if row[1] in self.players]
+            if len(rows) < 2:
+                continue
+            self.rate([name for _, name, _ in rows], [finish for _, _, finish in rows])
+            for _, name, _ in rows:
+                self.players[name].ngames += 1
+            games += 1
+        return games
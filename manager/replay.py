@@ -0,0 +1,347 @@
+""" Decodes Halite replays into columnar arrays and keeps them in an append-only store indexed by game_id.
+
+Every replay becomes one set of flat numpy columns: the halite grid at the start and the cells that changed each
+turn, a row per ship per turn, a row per command and a row per event. A question across thousands of games then is
+a scan over concatenated columns instead of parsing thousands of JSON files.
+
+    python3 replay.py --store replay_store --db db.sqlite3     # import all replays the database knows about
+    python3 replay.py --store replay_store some-replay.hlt     # decode and print a summary of one file
+"""
+
+import io
+import os
+import re
+import json
+import sqlite3
+import argparse
+
+import numpy as np
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Codes used in the columns
+MOVE, SPAWN, CONSTRUCT = 0, 1, 2
+SPAWNED, CONSTRUCTED, SHIPWRECK = 0, 1, 2
+DIRECTIONS = "onsew"
+COMMAND_TYPES = {"m": MOVE, "g": SPAWN, "c": CONSTRUCT}
+EVENT_TYPES = {"spawn": SPAWNED, "construct": CONSTRUCTED, "shipwreck": SHIPWRECK}
+
+
+def _open_text(filename):
+    """ Open a replay file as text, compressed or not. Compressed replays need the zstandard package. """
+    f = open(filename, "rb")
+    compressed = f.read(len(ZSTD_MAGIC)) == ZSTD_MAGIC
+    f.seek(0)
+    if compressed:
+        try:
+            import zstandard
+        except ImportError:
+            f.close()
+            raise RuntimeError("%s is compressed, reading it needs the zstandard package" % filename)
+        f = zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+    return io.TextIOWrapper(f, encoding="utf-8")
+
+
+def read_replay(filename, on_frame=None):
+    """ Read a replay file, compressed or not.
+
+    With on_frame, the file is read in chunks and the frames are parsed one at a time and handed to on_frame instead
+    of being kept, so neither the whole text nor all parsed frames are ever in memory. Parsed, a replay takes
+    several times the size of its text.
+    :param filename: Path of the .hlt file
+    :param on_frame: Called with each entry of full_frames, in order
+    :return: The parsed replay, without full_frames when on_frame is given """
+    with _open_text(filename) as f:
+        if on_frame is None:
+            return json.load(f)
+
+        stream = _JsonStream(f)
+        replay = {}
+        stream.expect("{")
+        while stream.peek() != "}":
+            key = stream.value()
+            stream.expect(":")
+            if key == "full_frames":
+                # The engine writes the keys in sorted order, so the frames come before the players and the map
+                stream.expect("[")
+                while stream.peek() != "]":
+                    on_frame(stream.value())
+                    stream.separator("]")
+                stream.expect("]")
+            else:
+                replay[key] = stream.value()
+            stream.separator("}")
+        return replay
+
+
+class _JsonStream:
+    """ Parses the JSON text of a file one value at a time, reading more of the file only when a value needs it """
+
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, f):
+        self.f = f
+        self.text = ""
+        self.position = 0
+        self.done = False
+        self.decoder = json.JSONDecoder()
+
+    def _read_more(self):
+        """ Drop the parsed text and append the next chunk of the file
+        :return: Whether there was more to read """
+        chunk = self.f.read(self.CHUNK_SIZE)
+        if not chunk:
+            self.done = True
+            return False
+        self.text = self.text[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        """ Skip whitespace
+        :return: The next character, or "" at the end of the file """
+        while True:
+            self.position = JSON_WHITESPACE.match(self.text, self.position).end()
+            if self.position < len(self.text) or not self._read_more():
+                return self.text[self.position:self.position + 1]
+
+    def expect(self, character):
+        """ Skip whitespace and the given character """
+        if self.peek() != character:
+            raise ValueError("Expected %r in the replay, found %r" % (character, self.peek()))
+        self.position += 1
+
+    def separator(self, closing):
+        """ Skip the comma after a value, unless the container ends here """
+        if self.peek() != closing:
+            self.expect(",")
+
+    def value(self):
+        """ :return: The next value """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.position)
+                # A number at the very end of the text may go on in the next chunk
+                if end < len(self.text) or self.done:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.done:
+                    raise
+            self._read_more()
+
+
+class _Columns:
+    """ Collects rows for a group of columns, turned into typed arrays at the end """
+
+    def __init__(self, prefix, **dtypes):
+        self.prefix = prefix
+        self.dtypes = dtypes
+        self.values = {name: [] for name in dtypes}
+
+    def add(self, **row):
+        for name, value in row.items():
+            self.values[name].append(value)
+
+    def arrays(self):
+        return {self.prefix + name: np.array(self.values[name], dtype=dtype) for name, dtype in self.dtypes.items()}
+
+
+class _FrameDecoder:
+    """ Turns frames into rows of the columns as they come, and finishes the columns once the rest of the replay is
+    known. The frames come before the players in a replay file, so the per-player values are kept by owner id. """
+
+    def __init__(self):
+        self.turn = 0
+        self.cells = _Columns("cell_", turn=np.int16, x=np.int16, y=np.int16, halite=np.int32)
+        self.ships = _Columns("ship_", turn=np.int16, owner=np.int8, id=np.int32, x=np.int16, y=np.int16,
+                              halite=np.int16, inspired=np.bool_)
+        self.commands = _Columns("command_", turn=np.int16, owner=np.int8, type=np.int8, ship=np.int32,
+                                 direction=np.int8)
+        self.events = _Columns("event_", turn=np.int16, type=np.int8, owner=np.int8, id=np.int32, x=np.int16,
+                               y=np.int16)
+        self.energy = []
+        self.deposited = []
+
+    def add(self, frame):
+        turn = self.turn
+        self.turn += 1
+        for cell in frame.get("cells", ()):
+            self.cells.add(turn=turn, x=cell["x"], y=cell["y"], halite=cell["production"])
+
+        for owner, owned in frame.get("entities", {}).items():
+            for ship_id, ship in owned.items():
+                self.ships.add(turn=turn, owner=int(owner), id=int(ship_id), x=ship["x"], y=ship["y"],
+                               halite=ship["energy"], inspired=ship.get("is_inspired", False))
+
+        for owner, moves in frame.get("moves", {}).items():
+            for move in moves:
+                direction = move.get("direction")
+                self.commands.add(turn=turn, owner=int(owner), type=COMMAND_TYPES[move["type"]],
+                                  ship=move.get("id", -1), direction=DIRECTIONS.index(direction) if direction else -1)
+
+        for event in frame.get("events", ()):
+            location = event["location"]
+            if event["type"] == "shipwreck":
+                for ship_id in event["ships"]:
+                    self.events.add(turn=turn, type=SHIPWRECK, owner=-1, id=ship_id, x=location["x"],
+                                    y=location["y"])
+            else:
+                self.events.add(turn=turn, type=EVENT_TYPES[event["type"]], owner=event["owner_id"], id=event["id"],
+                                x=location["x"], y=location["y"])
+
+        self.energy.append(frame.get("energy", {}))
+        self.deposited.append(frame.get("deposited", {}))
+
+    def columns(self, replay):
+        """ :param replay: The parsed replay, full_frames is not used
+        :return: A dict of numpy arrays """
+        production = replay["production_map"]
+        players = sorted(player["player_id"] for player in replay["players"])
+
+        per_player = []
+        for frames in (self.energy, self.deposited):
+            column = np.zeros((len(frames), len(players)), dtype=np.int32)
+            for turn, values in enumerate(frames):
+                for owner, amount in values.items():
+                    column[turn, players.index(int(owner))] = amount
+            per_player.append(column)
+
+        ranks = np.zeros(len(players), dtype=np.int8)
+        for statistics in replay.get("game_statistics", {}).get("player_statistics", ()):
+            ranks[players.index(statistics["player_id"])] = statistics["rank"]
+
+        columns = {
+            "width": np.int16(production["width"]),
+            "height": np.int16(production["height"]),
+            "seed": np.int64(replay.get("map_generator_seed", -1)),
+            "players": np.array(players, dtype=np.int8),
+            "names": np.array([player["name"] for player in sorted(replay["players"], key=lambda p: p["player_id"])]),
+            "ranks": ranks,
+            "initial_halite": np.array([[cell["energy"] for cell in row] for row in production["grid"]],
+                                       dtype=np.int32),
+            "energy": per_player[0],
+            "deposited": per_player[1],
+        }
+        for group in (self.cells, self.ships, self.commands, self.events):
+            columns.update(group.arrays())
+        return columns
+
+
+def decode_replay(replay):
+    """ Turn a parsed replay into flat columns, one frame at a time.
+    :param replay: The parsed replay, as returned by read_replay
+    :return: A dict of numpy arrays """
+    decoder = _FrameDecoder()
+    for frame in replay["full_frames"]:
+        decoder.add(frame)
+    return decoder.columns(replay)
+
+
+def decode_replay_file(filename):
+    """ Read and decode a replay file, parsing and decoding one frame at a time instead of loading all of them.
+    :param filename: Path of the .hlt file
+    :return: A dict of numpy arrays, the same as decode_replay(read_replay(filename)) """
+    decoder = _FrameDecoder()
+    return decoder.columns(read_replay(filename, on_frame=decoder.add))
+
+
+def halite_at(columns, turn):
+    """ Rebuild the halite grid at the start of a turn from the initial grid and the cell deltas """
+    grid = columns["initial_halite"].copy()
+    changed = columns["cell_turn"] < turn
+    # Later deltas of the same cell overwrite earlier ones, as rows are in turn order
+    grid[columns["cell_y"][changed], columns["cell_x"][changed]] = columns["cell_halite"][changed]
+    return grid
+
+
+class ReplayStore:
+    """ Append-only directory of decoded replays, one compressed .npz per game_id.
+
+    Games are written to a temporary file and renamed into place, so readers never see half a game. """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, game_id):
+        return os.path.join(self.directory, "game-%08d.npz" % game_id)
+
+    def __contains__(self, game_id):
+        return os.path.exists(self.path(game_id))
+
+    def game_ids(self):
+        return sorted(int(name[5:-4]) for name in os.listdir(self.directory)
+                      if name.startswith("game-") and name.endswith(".npz"))
+
+    def add(self, game_id, columns):
+        if game_id in self:
+            raise ValueError("Game %d is already stored" % game_id)
+        temporary = os.path.join(self.directory, ".game-%08d.tmp.npz" % game_id)
+        np.savez_compressed(temporary, **columns)
+        os.replace(temporary, self.path(game_id))
+
+    def add_replay(self, game_id, filename):
+        self.add(game_id, decode_replay_file(filename))
+
+    def load(self, game_id):
+        with np.load(self.path(game_id)) as data:
+            return {name: data[name] for name in data.files}
+
+    def scan(self, names, game_ids=None):
+        """ Concatenate columns over many games, for one vectorized pass over all of them.
+        :param names: The columns to read, all of the same group (e.g. ship_x and ship_halite)
+        :param game_ids: The games to read, all stored games by default
+        :return: A dict with the concatenated columns and a matching game_id column """
+        game_ids = self.game_ids() if game_ids is None else game_ids
+        parts = {name: [] for name in names}
+        ids = []
+        for game_id in game_ids:
+            with np.load(self.path(game_id)) as data:
+                for name in names:
+                    parts[name].append(np.atleast_1d(data[name]))
+                ids.append(np.full(len(parts[names[0]][-1]), game_id, dtype=np.int64))
+        result = {name: np.concatenate(values) if values else np.empty(0) for name, values in parts.items()}
+        result["game_id"] = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+        return result
+
+    def import_database(self, db_filename):
+        """ Decode every replay the manager database knows about and has not been stored yet
+        :return: The number of games added """
+        db = sqlite3.connect(db_filename)
+        rows = db.execute("SELECT game_id, replay_file FROM results GROUP BY game_id ORDER BY game_id").fetchall()
+        db.close()
+        added = 0
+        for game_id, filename in rows:
+            if game_id in self or not filename or not os.path.exists(filename):
+                continue
+            try:
+                self.add_replay(game_id, filename)
+                added += 1
+            except Exception as e:
+                print("Could not import replay %s of game %d: %s" % (filename, game_id, e))
+        return added
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--store", default="replay_store", help="Directory of the replay store")
+    parser.add_argument("--db", default="", help="Import all replays of this manager database")
+    parser.add_argument("files", nargs="*", help="Replay files to decode and summarize")
+    args = parser.parse_args()
+
+    store = ReplayStore(args.store)
+    if args.db:
+        print("Imported %d games into %s" % (store.import_database(args.db), args.store))
+    for filename in args.files:
+        columns = decode_replay_file(filename)
+        print("%s: %dx%d, %d turns, %d ship rows, %d cell deltas, %d commands, %d events, ranks %s"
+              % (filename, columns["width"], columns["height"], len(columns["energy"]), len(columns["ship_id"]),
+                 len(columns["cell_turn"]), len(columns["command_turn"]), len(columns["event_turn"]),
+                 columns["ranks"].tolist()))
+
+
+if __name__ == "__main__":
+    main()
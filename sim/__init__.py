@@ -0,0 +1 @@
+from .engine import Engine, GameResult, ModuleBot, generate_map, play_game
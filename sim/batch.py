@@ -0,0 +1,391 @@
+"""
+Many independent Halite III games stepped in lockstep on stacked NumPy arrays.
+
+Map halite is held as (games, height, width) and ships as (games, players, slots) arrays, so extraction, move costs,
+inspiration, collisions and deposits are computed for all games at once. The rules match sim.engine, except that
+ships cannot build dropoffs. Decisions come from a vectorized policy instead of bot scripts; ThresholdPolicy mirrors
+the thresholds of MyBot, with its parameters set per game and player for tuning.
+
+    python3 -m sim.batch --games 256 --deposit-ratio 0.8 0.9 0.95 --spawn-halite 3000 4000 5000
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from hlt.summed_area import diamond_convolution
+
+from .engine import DEFAULT_CONSTANTS, generate_map, max_turns
+
+# Direction codes used by the batch simulator: still, north, south, east, west
+STILL, NORTH, SOUTH, EAST, WEST = range(5)
+DX = np.array([0, 0, 0, 1, -1])
+DY = np.array([0, -1, 1, 0, 0])
+
+
+class BatchSimulator:
+    """
+    The state of games identical in size and player count, differing in their maps and decisions.
+    """
+    def __init__(self, num_games, width=32, num_players=2, seeds=None, turn_limit=None, max_ships=64,
+                 game_constants=None):
+        """
+        :param num_games: The number of games to play at once
+        :param width: The width and height of every map
+        :param num_players: 1, 2 or 4 players per game
+        :param seeds: One map seed per game, 0..num_games-1 by default
+        :param turn_limit: The number of turns, by default the official number for the map size
+        :param max_ships: Ship slots per player, spawns are skipped while all slots are taken
+        :param game_constants: Overrides of DEFAULT_CONSTANTS
+        """
+        self.constants = dict(DEFAULT_CONSTANTS, **(game_constants or {}))
+        self.num_games = num_games
+        self.num_players = num_players
+        self.width = self.height = width
+        self.max_turns = turn_limit or max_turns(width, width)
+        self.turn_number = 0
+
+        seeds = range(num_games) if seeds is None else seeds
+        maps = [generate_map(width, width, num_players, seed) for seed in seeds]
+        self.halite = np.stack([halite for halite, _ in maps])
+        shipyards = maps[0][1]
+        self.shipyard_x = np.array([x for x, _ in shipyards])
+        self.shipyard_y = np.array([y for _, y in shipyards])
+        self.structure_owner = np.full((width, width), -1, dtype=np.int64)
+        self.structure_owner[self.shipyard_y, self.shipyard_x] = np.arange(num_players)
+
+        shape = (num_games, num_players, max_ships)
+        self.alive = np.zeros(shape, dtype=bool)
+        self.x = np.zeros(shape, dtype=np.int64)
+        self.y = np.zeros(shape, dtype=np.int64)
+        self.cargo = np.zeros(shape, dtype=np.int64)
+        self.inspired = np.zeros(shape, dtype=bool)
+        self.bank = np.full((num_games, num_players), self.constants['INITIAL_ENERGY'], dtype=np.int64)
+        self.playing = np.ones((num_games, num_players), dtype=bool)
+        self.last_turn = np.zeros((num_games, num_players), dtype=np.int64)
+
+        self._games = np.arange(num_games)[:, None, None]
+        self._players = np.arange(num_players)[None, :, None]
+
+    def cells(self, x=None, y=None):
+        """
+        :return: The halite under every ship slot, (games, players, slots)
+        """
+        return self.halite[self._games, self.y if y is None else y, self.x if x is None else x]
+
+    def run(self, policy):
+        """
+        Plays all games to the end.
+        :param policy: Called with the simulator every turn, returns (directions, spawn)
+        :return: The final halite per game and player, (games, players)
+        """
+        while self.turn_number < self.max_turns:
+            self.step(*policy(self))
+        return self.bank
+
+    def ranks(self):
+        """
+        :return: The rank of every player per game, 1 is the winner and ties go to the lowest player id
+        """
+        first_player = np.broadcast_to(-np.arange(self.num_players), self.bank.shape)
+        order = np.lexsort((first_player, self.bank, self.last_turn))[..., ::-1]
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, self.num_players + 1)[None, :], axis=1)
+        return ranks
+
+    def win_shares(self):
+        """
+        Splits every game's win evenly between the players tied for first, which ranks would hand to the lowest
+        player id. With a deterministic policy on mirrored maps such ties are common.
+        :return: Each player's share of the win per game, (games, players), summing to 1 per game
+        """
+        survived = self.last_turn == self.last_turn.max(axis=1, keepdims=True)
+        bank = np.where(survived, self.bank, -1)
+        winners = survived & (bank == bank.max(axis=1, keepdims=True))
+        return winners / winners.sum(axis=1, keepdims=True)
+
+    def step(self, directions, spawn):
+        """
+        Applies one turn to every game.
+        :param directions: Direction code per ship slot, (games, players, slots)
+        :param spawn: Whether each player builds a ship, (games, players)
+        """
+        self.turn_number += 1
+        constants = self.constants
+        alive = self.alive
+        acting = self.playing[..., None]
+
+        # Moves, paid for with a tenth of the cell left
+        ratio = np.where(self.inspired, constants['INSPIRED_MOVE_COST_RATIO'], constants['MOVE_COST_RATIO'])
+        cost = self.cells() // ratio
+        moved = alive & acting & (directions != STILL) & (self.cargo >= cost)
+        self.cargo -= np.where(moved, cost, 0)
+        self.x = (self.x + DX[directions] * moved) % self.width
+        self.y = (self.y + DY[directions] * moved) % self.height
+
+        # Spawns take the first free slot
+        free = ~alive
+        spawning = spawn & self.playing & (self.bank >= constants['NEW_ENTITY_ENERGY_COST']) & free.any(axis=2)
+        slot = np.argmax(free, axis=2)
+        games, players = np.nonzero(spawning)
+        slots = slot[games, players]
+        alive[games, players, slots] = True
+        self.x[games, players, slots] = self.shipyard_x[players]
+        self.y[games, players, slots] = self.shipyard_y[players]
+        self.cargo[games, players, slots] = 0
+        self.inspired[games, players, slots] = False
+        moved[games, players, slots] = True  # A new ship does not mine on the turn it is built
+        self.bank -= spawning * constants['NEW_ENTITY_ENERGY_COST']
+
+        self._resolve_collisions()
+        self._deposit()
+        self._update_inspiration()
+        self._mine(alive & ~moved)
+
+        living = self.alive.any(axis=2) | (self.bank >= constants['NEW_ENTITY_ENERGY_COST'])
+        self.last_turn[self.playing] = self.turn_number
+        self.playing &= living
+
+    def _cell_keys(self):
+        return (self._games * self.height + self.y) * self.width + self.x
+
+    def _resolve_collisions(self):
+        """
+        Sinks every ship sharing a cell with another. Their cargo goes to the owner of a structure on that cell,
+        otherwise into the sea.
+        """
+        keys = self._cell_keys()[self.alive]
+        counts = np.bincount(keys, minlength=self.halite.size)
+        sinking = self.alive.copy()
+        sinking[self.alive] = counts[keys] >= 2
+        if not sinking.any():
+            return
+
+        games, _, _ = np.nonzero(sinking)
+        xs = self.x[sinking]
+        ys = self.y[sinking]
+        cargo = self.cargo[sinking]
+        owner = self.structure_owner[ys, xs]
+        on_structure = owner >= 0
+        np.add.at(self.bank, (games[on_structure], owner[on_structure]), cargo[on_structure])
+        np.add.at(self.halite, (games[~on_structure], ys[~on_structure], xs[~on_structure]), cargo[~on_structure])
+
+        self.alive &= ~sinking
+        self.cargo[sinking] = 0
+
+    def _deposit(self):
+        home = self.alive & (self.structure_owner[self.y, self.x] == self._players)
+        self.bank += np.where(home, self.cargo, 0).sum(axis=2)
+        self.cargo[home] = 0
+
+    def _update_inspiration(self):
+        """
+        Marks ships with at least INSPIRATION_SHIP_COUNT opponent ships within INSPIRATION_RADIUS as inspired.
+        """
+        if not self.constants['INSPIRATION_ENABLED']:
+            self.inspired[:] = False
+            return
+
+        occupancy = np.zeros((self.num_games, self.num_players, self.height, self.width), dtype=np.int16)
+        games, players, _ = np.nonzero(self.alive)
+        np.add.at(occupancy, (games, players, self.y[self.alive], self.x[self.alive]), 1)
+        opponents = occupancy.sum(axis=1, keepdims=True) - occupancy
+        nearby = diamond_convolution(opponents, self.constants['INSPIRATION_RADIUS'])
+        count = nearby[self._games, self._players, self.y, self.x]
+        self.inspired = self.alive & (count >= self.constants['INSPIRATION_SHIP_COUNT'])
+
+    def _mine(self, staying):
+        """
+        Every ship that did not move collects a quarter of its cell, rounded up, and inspired ships a bonus on top.
+        """
+        staying &= self.structure_owner[self.y, self.x] < 0
+        capacity = self.constants['MAX_ENERGY']
+        ratio = np.where(self.inspired, self.constants['INSPIRED_EXTRACT_RATIO'], self.constants['EXTRACT_RATIO'])
+        cell = self.cells()
+        extracted = np.where(staying, np.minimum(-(-cell // ratio), capacity - self.cargo), 0)
+
+        games, _, _ = np.nonzero(staying)
+        # After collisions every cell holds at most one ship, so the writes never overlap
+        self.halite[games, self.y[staying], self.x[staying]] -= extracted[staying]
+        bonus = (extracted * self.constants['INSPIRED_BONUS_MULTIPLIER']).astype(np.int64) * self.inspired
+        self.cargo += extracted
+        self.cargo += np.minimum(bonus, capacity - self.cargo)
+
+
+def _per_player(value, num_games, num_players):
+    """
+    Broadcasts a parameter given as a scalar, per game (games,) or per game and player (games, players).
+    """
+    value = np.asarray(value, dtype=float)
+    if value.ndim == 1:
+        value = value[:, None]
+    return np.broadcast_to(value, (num_games, num_players))
+
+
+class ThresholdPolicy:
+    """
+    The decision rules of MyBot reduced to array operations: ships mine cells above a minimum, otherwise step
+    towards the richest neighbourhood, return home once their cargo passes deposit_ratio of the capacity, and
+    head home for good when the game is about to end. A ship is built while the map holds more than
+    spawn_halite_per_ship per ship. Ships of one player never move onto the same cell, except onto the shipyard at
+    the end of the game.
+    """
+    def __init__(self, deposit_ratio=0.95, spawn_halite_per_ship=4000, spawn_until=0.66, minimum_halite=50,
+                 look_radius=2):
+        """
+        Every parameter is a scalar, an array per game (games,) or an array per game and player (games, players).
+        :param deposit_ratio: Fraction of MAX_HALITE at which ships return to deposit
+        :param spawn_halite_per_ship: Map halite per ship above which a new ship is built
+        :param spawn_until: Fraction of the game after which no more ships are built
+        :param minimum_halite: Cell halite below which ships move on, halved while the map average is below it
+        :param look_radius: Manhattan radius of the neighbourhood used to pick the direction to gather in
+        """
+        self.deposit_ratio = deposit_ratio
+        self.spawn_halite_per_ship = spawn_halite_per_ship
+        self.spawn_until = spawn_until
+        self.minimum_halite = minimum_halite
+        self.look_radius = look_radius
+        self._returning = None
+
+    def __call__(self, sim):
+        shape = (sim.num_games, sim.num_players)
+        if self._returning is None:
+            self._returning = np.zeros_like(sim.alive)
+        capacity = sim.constants['MAX_ENERGY']
+        alive = sim.alive
+
+        # Toroidal offsets towards each player's shipyard
+        home_dx = (sim.shipyard_x[None, :, None] - sim.x + sim.width // 2) % sim.width - sim.width // 2
+        home_dy = (sim.shipyard_y[None, :, None] - sim.y + sim.height // 2) % sim.height - sim.height // 2
+        home_distance = np.abs(home_dx) + np.abs(home_dy)
+
+        ships = alive.sum(axis=2)
+        turns_left = sim.max_turns - sim.turn_number
+        endgame = alive & (home_distance + 6 + np.ceil(ships / 9)[..., None] >= turns_left)
+
+        deposit_ratio = _per_player(self.deposit_ratio, *shape)[..., None]
+        self._returning |= alive & (sim.cargo >= deposit_ratio * capacity)
+        self._returning &= alive & (sim.cargo > 0)
+        returning = self._returning | endgame
+
+        # Every ship ranks all five moves; a ship held back by another falls through to its next choice
+        target_x = (sim.x[None] + DX[:, None, None, None]) % sim.width
+        target_y = (sim.y[None] + DY[:, None, None, None]) % sim.height
+
+        # Returning ships prefer any move closer to home, then standing still, then the sideways moves
+        after_dx = (sim.shipyard_x[None, None, :, None] - target_x + sim.width // 2) % sim.width - sim.width // 2
+        after_dy = (sim.shipyard_y[None, None, :, None] - target_y + sim.height // 2) % sim.height - sim.height // 2
+        home_score = -(np.abs(after_dx) + np.abs(after_dy)).astype(float)
+        home_score[STILL] -= 0.5
+
+        # Gatherers stay on rich cells and otherwise step towards the richest neighbourhood
+        cells = sim.cells()
+        average = sim.halite.reshape(sim.num_games, -1).mean(axis=1)
+        minimum = _per_player(self.minimum_halite, *shape)
+        halvings = np.where(average[:, None] <= minimum,
+                            np.floor(np.log2(minimum / np.maximum(average[:, None], 1e-9))) + 1, 0)
+        minimum = (minimum / 2 ** np.minimum(halvings, 30))[..., None]
+
+        neighbourhood = diamond_convolution(sim.halite, self.look_radius)
+        gather_score = neighbourhood[sim._games[None], target_y, target_x].astype(float)
+        gather_score[STILL] = np.where((cells >= minimum) & (sim.cargo < capacity), np.inf, -np.inf)
+
+        scores = np.where(returning[None], home_score, gather_score)
+        stuck = ~alive | (sim.cargo < cells // sim.constants['MOVE_COST_RATIO'])
+        scores[STILL][stuck] = np.inf
+
+        # Stable sort, so ties go to the lowest direction code
+        options = np.argsort(-scores, axis=0, kind="stable")
+        directions = self._avoid_own_collisions(sim, options, endgame)
+
+        # Build while the map is rich enough and the shipyard stays free
+        targets_x = (sim.x + DX[directions]) % sim.width
+        targets_y = (sim.y + DY[directions]) % sim.height
+        onto_shipyard = (alive & (targets_x == sim.shipyard_x[None, :, None]) &
+                         (targets_y == sim.shipyard_y[None, :, None])).any(axis=2)
+        spawn_halite = _per_player(self.spawn_halite_per_ship, *shape)
+        spawn_until = _per_player(self.spawn_until, *shape)
+        total = sim.halite.reshape(sim.num_games, -1).sum(axis=1)[:, None]
+        spawn = ((total / np.maximum(ships, 1) > spawn_halite) &
+                 (sim.turn_number <= np.ceil(spawn_until * sim.max_turns)) & ~onto_shipyard)
+        return directions, spawn
+
+    @staticmethod
+    def _avoid_own_collisions(sim, options, endgame, rounds=12):
+        """
+        Picks a move per ship such that no two ships of a player end on the same cell. Ships standing still keep
+        their cell, otherwise the lowest slot wins; the others try their next option, which can in turn collide,
+        hence the rounds. Options are exhausted at standing still.
+        :param options: The five direction codes per ship slot in order of preference, (5, games, players, slots)
+        :param endgame: Ships allowed to crash onto their own shipyard
+        :return: A direction code per ship slot
+        """
+        alive = sim.alive
+        slots = np.broadcast_to(np.arange(alive.shape[2]), alive.shape).ravel()
+        game_player = sim._games * sim.num_players + sim._players
+        cells = sim.height * sim.width
+        unique = -1 - np.arange(alive.size).reshape(alive.shape)
+        choice = np.zeros(alive.shape, dtype=np.int64)
+
+        for _ in range(rounds):
+            directions = np.take_along_axis(options, choice[None], axis=0)[0]
+            target_x = (sim.x + DX[directions]) % sim.width
+            target_y = (sim.y + DY[directions]) % sim.height
+            crash_home = endgame & (sim.structure_owner[target_y, target_x] == sim._players)
+
+            # Ships that are gone or may crash get a negative key of their own, so they never conflict
+            keys = np.where(alive & ~crash_home, game_player * cells + target_y * sim.width + target_x, unique)
+            flat_keys = keys.ravel()
+            order = np.lexsort((slots, (directions != STILL).ravel(), flat_keys))
+            sorted_keys = flat_keys[order]
+            losers = order[1:][(sorted_keys[1:] == sorted_keys[:-1]) & (sorted_keys[1:] >= 0)]
+            losers = losers[directions.ravel()[losers] != STILL]
+            if not len(losers):
+                return directions
+            choice.ravel()[losers] += 1
+
+        # Out of rounds: whoever is still in conflict stands still
+        directions = np.take_along_axis(options, choice[None], axis=0)[0]
+        directions.ravel()[losers] = STILL
+        return directions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep ThresholdPolicy parameters with batched games")
+    parser.add_argument("--games", type=int, default=128, help="Games per parameter combination")
+    parser.add_argument("--size", type=int, default=32, help="Width and height of the maps")
+    parser.add_argument("--players", type=int, default=2, choices=(2, 4))
+    parser.add_argument("--deposit-ratio", type=float, nargs="+", default=[0.95])
+    parser.add_argument("--spawn-halite", type=float, nargs="+", default=[4000])
+    args = parser.parse_args()
+
+    combinations = list(itertools.product(args.deposit_ratio, args.spawn_halite))
+    num_games = args.games * len(combinations)
+
+    # Player 0 plays each combination, the other players keep MyBot's defaults
+    deposit_ratio = np.full((num_games, args.players), 0.95)
+    spawn_halite = np.full((num_games, args.players), 4000.0)
+    for i, (ratio, halite) in enumerate(combinations):
+        deposit_ratio[i * args.games:(i + 1) * args.games, 0] = ratio
+        spawn_halite[i * args.games:(i + 1) * args.games, 0] = halite
+
+    start = time.perf_counter()
+    sim = BatchSimulator(num_games, args.size, args.players, seeds=[i % args.games for i in range(num_games)])
+    bank = sim.run(ThresholdPolicy(deposit_ratio=deposit_ratio, spawn_halite_per_ship=spawn_halite))
+    duration = time.perf_counter() - start
+    shares = sim.win_shares()
+    # Player 0's halite over the mean of the others, per game
+    lead = bank[:, 0] - bank[:, 1:].mean(axis=1)
+
+    print("{} games of {} turns in {:.1f} s".format(num_games, sim.max_turns, duration))
+    print("{:>14}{:>14}{:>14}{:>14}{:>14}".format("deposit ratio", "spawn halite", "mean halite", "mean lead",
+                                                  "win share"))
+    for i, (ratio, halite) in enumerate(combinations):
+        games = slice(i * args.games, (i + 1) * args.games)
+        print("{:>14.2f}{:>14.0f}{:>14.0f}{:>14.0f}{:>14.2f}".format(ratio, halite, bank[games, 0].mean(),
+                                                                     lead[games].mean(), shares[games, 0].mean()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+"""
+A headless Halite III engine that runs bots in-process.
+
+The engine implements the rules the hlt constants describe: extraction, move costs, inspiration, collisions,
+spawning, dropoffs and deposits. Bots are driven through the regular hlt.Game: the engine writes the same text
+protocol as the halite binary into an in-memory stream per bot, so the bot code runs unchanged.
+
+A bot is any object with setup(game) and play_turn(game) returning its list of commands. ModuleBot loads a bot
+script such as MyBot.py that defines those two functions.
+
+    python3 -m sim MyBot.py MyBot.py --size 32 --games 10 --seed 1
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+from hlt import commands
+from hlt.common import FrameReader
+from hlt.networking import Game
+
+DEFAULT_CONSTANTS = {
+    'NEW_ENTITY_ENERGY_COST': 1000,
+    'DROPOFF_COST': 4000,
+    'MAX_ENERGY': 1000,
+    'INITIAL_ENERGY': 5000,
+    'MAX_TURNS': 400,
+    'EXTRACT_RATIO': 4,
+    'MOVE_COST_RATIO': 10,
+    'INSPIRATION_ENABLED': True,
+    'INSPIRATION_RADIUS': 4,
+    'INSPIRATION_SHIP_COUNT': 2,
+    'INSPIRED_EXTRACT_RATIO': 4,
+    'INSPIRED_BONUS_MULTIPLIER': 2.0,
+    'INSPIRED_MOVE_COST_RATIO': 10,
+}
+
+MOVES = {
+    commands.NORTH: (0, -1),
+    commands.SOUTH: (0, 1),
+    commands.EAST: (1, 0),
+    commands.WEST: (-1, 0),
+    commands.STAY_STILL: (0, 0),
+}
+
+
+def max_turns(width, height):
+    """
+    :return: The number of turns the official engine plays on a map of this size, 400 at 32x32 up to 500 at 64x64
+    """
+    return 300 + 25 * max(width, height) // 8
+
+
+def generate_map(width, height, num_players, seed=None):
+    """
+    Generates a symmetric map: smooth random halite on one tile, mirrored so that every player gets the same.
+    :param width: The map width
+    :param height: The map height
+    :param num_players: 1, 2 or 4 players
+    :param seed: Seed for the random generator
+    :return: A (height, width) int64 halite array and the list of (x, y) shipyard positions
+    """
+    rng = np.random.default_rng(seed)
+    tile_width = width // 2 if num_players > 1 else width
+    tile_height = height // 2 if num_players > 2 else height
+
+    # Sum of noise at a few scales, squared to get rich patches on a poor background
+    field = np.zeros((tile_height, tile_width))
+    for scale, weight in ((1, 0.15), (2, 0.25), (4, 0.35), (8, 0.25)):
+        coarse = rng.random((-(-tile_height // scale), -(-tile_width // scale)))
+        field += weight * np.kron(coarse, np.ones((scale, scale)))[:tile_height, :tile_width]
+    field = field ** 3
+    field *= rng.uniform(140, 220) / field.mean()
+    tile = np.clip(field, 0, DEFAULT_CONSTANTS['MAX_ENERGY']).astype(np.int64)
+
+    halite = tile
+    if num_players > 1:
+        halite = np.hstack([tile, tile[:, ::-1]])
+    if num_players > 2:
+        halite = np.vstack([halite, halite[::-1, :]])
+
+    if num_players == 1:
+        shipyards = [(width // 2, height // 2)]
+    elif num_players == 2:
+        shipyards = [(width // 4, height // 2), (width - 1 - width // 4, height // 2)]
+    else:
+        shipyards = [(width // 4, height // 4), (width - 1 - width // 4, height // 4),
+                     (width // 4, height - 1 - height // 4), (width - 1 - width // 4, height - 1 - height // 4)]
+    for x, y in shipyards:
+        halite[y, x] = 0
+    return halite, shipyards
+
+
+class Pipe:
+    """
+    An in-memory stand-in for a bot's stdin: the engine writes, the bot's FrameReader reads.
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(data)
+
+    def read1(self, size=-1):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+    read = read1
+
+
+class ModuleBot:
+    """
+    A bot script loaded as a fresh module, so that several copies of the same bot keep separate state.
+    The script has to define setup(game) and play_turn(game), and only start its own game loop under __main__.
+    """
+    _loaded = 0
+
+    def __init__(self, path, name=None):
+        """
+        :param path: Path to the bot script, e.g. MyBot.py
+        :param name: Name used in the results, the script's file name by default
+        """
+        self.path = os.path.abspath(path)
+        self.name = name or os.path.splitext(os.path.basename(path))[0]
+        ModuleBot._loaded += 1
+        spec = importlib.util.spec_from_file_location("sim_bot_{}".format(ModuleBot._loaded), self.path)
+        self.module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.module)
+
+    def setup(self, game):
+        self.module.setup(game)
+
+    def play_turn(self, game):
+        return self.module.play_turn(game)
+
+
+class EngineShip:
+    __slots__ = ('owner', 'id', 'x', 'y', 'halite', 'inspired')
+
+    def __init__(self, owner, ship_id, x, y):
+        self.owner = owner
+        self.id = ship_id
+        self.x = x
+        self.y = y
+        self.halite = 0
+        self.inspired = False
+
+
+class EnginePlayer:
+    def __init__(self, player_id, bot, shipyard):
+        self.id = player_id
+        self.bot = bot
+        self.shipyard = shipyard
+        self.halite = 0
+        self.ships = {}
+        self.dropoffs = {}
+        self.alive = True
+        self.last_turn = 0
+        self.ships_spawned = 0
+        self.dropoffs_built = 0
+        self.collisions = 0
+        self.pipe = Pipe()
+        self.game = None
+
+
+class GameResult:
+    """
+    The outcome of a game: rank (1 is the winner), final halite and some statistics per player.
+    """
+    def __init__(self, players, turns, seed, duration):
+        ordered = sorted(players, key=lambda player: (player.last_turn, player.halite), reverse=True)
+        self.ranks = {player.id: ordered.index(player) + 1 for player in players}
+        self.names = {player.id: player.bot.name for player in players}
+        self.halite = {player.id: player.halite for player in players}
+        self.ships_spawned = {player.id: player.ships_spawned for player in players}
+        self.dropoffs_built = {player.id: player.dropoffs_built for player in players}
+        self.collisions = {player.id: player.collisions for player in players}
+        self.turns = turns
+        self.seed = seed
+        self.duration = duration
+
+    def __repr__(self):
+        rows = ["{} {} {} halite".format(self.ranks[i], self.names[i], self.halite[i])
+                for i in sorted(self.ranks, key=self.ranks.get)]
+        return "GameResult(seed={}, turns={}: {})".format(self.seed, self.turns, ", ".join(rows))
+
+
+class Engine:
+    """
+    Plays a single game between the given bots.
+    """
+    def __init__(self, bots, width=32, height=None, seed=None, turn_limit=None, game_constants=None, record=None):
+        """
+        :param bots: One bot per player, 1, 2 or 4 of them
+        :param width: The map width
+        :param height: The map height, equal to the width by default
+        :param seed: Seed for the map generator
+        :param turn_limit: The number of turns, by default the official number for the map size
+        :param game_constants: Overrides of DEFAULT_CONSTANTS
+        :param record: A binary file the input of player 0 is recorded to
+        """
+        if len(bots) not in (1, 2, 4):
+            raise ValueError("Halite is played by 1, 2 or 4 players, not {}".format(len(bots)))
+
+        self.width = width
+        self.height = height or width
+        self.seed = seed
+        self.record = record
+        self.constants = dict(DEFAULT_CONSTANTS, **(game_constants or {}))
+        self.constants['MAX_TURNS'] = turn_limit or max_turns(self.width, self.height)
+        self.constants['map_width'] = self.width
+        self.constants['map_height'] = self.height
+
+        self.halite, shipyards = generate_map(self.width, self.height, len(bots), seed)
+        self.players = [EnginePlayer(i, bot, shipyard) for i, (bot, shipyard) in enumerate(zip(bots, shipyards))]
+        for player in self.players:
+            player.halite = self.constants['INITIAL_ENERGY']
+        self.structures = {player.shipyard: player.id for player in self.players}
+        self.turn_number = 0
+        self._next_ship_id = 0
+        self._next_dropoff_id = 0
+        self._changed_cells = set()
+
+    def run(self):
+        """
+        Plays the game to the end.
+        :return: The GameResult
+        """
+        start = time.perf_counter()
+        self._start_bots()
+        for turn in range(1, self.constants['MAX_TURNS'] + 1):
+            self.turn_number = turn
+            frame = self._frame()
+            moves = {}
+            for player in self.players:
+                if player.alive:
+                    player.pipe.write(frame)
+                    player.game.update_frame()
+                    moves[player.id] = player.bot.play_turn(player.game)
+            self.process_turn(moves)
+            if not any(player.alive for player in self.players):
+                break
+        return GameResult(self.players, self.turn_number, self.seed, time.perf_counter() - start)
+
+    def _start_bots(self):
+        lines = [json.dumps(self.constants)]
+        lines.append("")  # Placeholder for "num_players my_id"
+        for player in self.players:
+            lines.append("{} {} {}".format(player.id, *player.shipyard))
+        lines.append("{} {}".format(self.width, self.height))
+        lines.extend(" ".join(map(str, row)) for row in self.halite.tolist())
+
+        for player in self.players:
+            lines[1] = "{} {}".format(len(self.players), player.id)
+            player.pipe.write(("\n".join(lines) + "\n").encode())
+            player.game = Game(FrameReader(player.pipe, record=self.record if player.id == 0 else None))
+            player.bot.setup(player.game)
+
+    def _frame(self):
+        lines = [str(self.turn_number)]
+        for player in self.players:
+            lines.append("{} {} {} {}".format(player.id, len(player.ships), len(player.dropoffs), player.halite))
+            lines.extend("{} {} {} {}".format(ship.id, ship.x, ship.y, ship.halite) for ship in player.ships.values())
+            lines.extend("{} {} {}".format(dropoff_id, x, y) for dropoff_id, (x, y) in player.dropoffs.items())
+        lines.append(str(len(self._changed_cells)))
+        lines.extend("{} {} {}".format(x, y, self.halite[y, x]) for x, y in sorted(self._changed_cells))
+        self._changed_cells = set()
+        return ("\n".join(lines) + "\n").encode()
+
+    def _set_halite(self, x, y, amount):
+        self.halite[y, x] = amount
+        self._changed_cells.add((x, y))
+
+    def process_turn(self, moves):
+        """
+        Applies one turn of commands.
+        :param moves: Player id to the list of command strings that player sent
+        """
+        moved = set()
+        spawns = []
+
+        for player_id, player_commands in moves.items():
+            player = self.players[player_id]
+            seen = set()
+            for command in player_commands:
+                parts = command.split()
+                if not parts:
+                    continue
+                if parts[0] == commands.GENERATE:
+                    if player.halite >= self.constants['NEW_ENTITY_ENERGY_COST'] and player not in spawns:
+                        spawns.append(player)
+                    continue
+
+                ship = player.ships.get(int(parts[1])) if len(parts) > 1 else None
+                if ship is None or ship.id in seen:
+                    logging.debug("Player %s sent an invalid command: %s", player_id, command)
+                    continue
+                seen.add(ship.id)
+
+                if parts[0] == commands.CONSTRUCT:
+                    self._construct(player, ship)
+                elif parts[0] == commands.MOVE and len(parts) == 3 and parts[2] in MOVES:
+                    if self._move(ship, parts[2]):
+                        moved.add(ship.id)
+
+        for player in spawns:
+            player.halite -= self.constants['NEW_ENTITY_ENERGY_COST']
+            ship = EngineShip(player.id, self._next_ship_id, *player.shipyard)
+            self._next_ship_id += 1
+            player.ships[ship.id] = ship
+            player.ships_spawned += 1
+            moved.add(ship.id)  # A new ship does not mine on the turn it is built
+
+        self._resolve_collisions()
+        self._deposit()
+        self._update_inspiration()
+        self._mine(moved)
+
+        for player in self.players:
+            if player.alive:
+                player.last_turn = self.turn_number
+                if not player.ships and player.halite < self.constants['NEW_ENTITY_ENERGY_COST']:
+                    player.alive = False
+
+    def _construct(self, player, ship):
+        if (ship.x, ship.y) in self.structures:
+            return
+        available = player.halite + ship.halite + int(self.halite[ship.y, ship.x])
+        if available < self.constants['DROPOFF_COST']:
+            return
+
+        player.halite = available - self.constants['DROPOFF_COST']
+        self._set_halite(ship.x, ship.y, 0)
+        del player.ships[ship.id]
+        player.dropoffs[self._next_dropoff_id] = (ship.x, ship.y)
+        self._next_dropoff_id += 1
+        player.dropoffs_built += 1
+        self.structures[(ship.x, ship.y)] = player.id
+
+    def _move(self, ship, direction):
+        """
+        Moves a ship if it can pay the move cost.
+        :return: Whether the ship left its cell
+        """
+        dx, dy = MOVES[direction]
+        if dx == 0 and dy == 0:
+            return False
+
+        ratio = self.constants['INSPIRED_MOVE_COST_RATIO' if ship.inspired else 'MOVE_COST_RATIO']
+        cost = int(self.halite[ship.y, ship.x]) // ratio
+        if ship.halite < cost:
+            return False
+
+        ship.halite -= cost
+        ship.x = (ship.x + dx) % self.width
+        ship.y = (ship.y + dy) % self.height
+        return True
+
+    def _resolve_collisions(self):
+        """
+        Sinks every ship sharing a cell with another. Their cargo goes to the owner of a structure on that cell,
+        otherwise into the sea.
+        """
+        cells = {}
+        for player in self.players:
+            for ship in player.ships.values():
+                cells.setdefault((ship.x, ship.y), []).append(ship)
+
+        for (x, y), ships in cells.items():
+            if len(ships) < 2:
+                continue
+            cargo = sum(ship.halite for ship in ships)
+            owner = self.structures.get((x, y))
+            if owner is not None:
+                self.players[owner].halite += cargo
+            elif cargo:
+                self._set_halite(x, y, int(self.halite[y, x]) + cargo)
+            for ship in ships:
+                self.players[ship.owner].collisions += 1
+                del self.players[ship.owner].ships[ship.id]
+
+    def _deposit(self):
+        for player in self.players:
+            for ship in player.ships.values():
+                if ship.halite and self.structures.get((ship.x, ship.y)) == player.id:
+                    player.halite += ship.halite
+                    ship.halite = 0
+
+    def _update_inspiration(self):
+        """
+        Marks ships with at least INSPIRATION_SHIP_COUNT opponent ships within INSPIRATION_RADIUS as inspired.
+        """
+        ships = [ship for player in self.players for ship in player.ships.values()]
+        if not ships:
+            return
+        if not self.constants['INSPIRATION_ENABLED']:
+            for ship in ships:
+                ship.inspired = False
+            return
+
+        xs = np.array([ship.x for ship in ships])
+        ys = np.array([ship.y for ship in ships])
+        owners = np.array([ship.owner for ship in ships])
+        dx = np.abs(xs[:, None] - xs[None, :])
+        dy = np.abs(ys[:, None] - ys[None, :])
+        distance = np.minimum(dx, self.width - dx) + np.minimum(dy, self.height - dy)
+        nearby = (distance <= self.constants['INSPIRATION_RADIUS']) & (owners[:, None] != owners[None, :])
+        inspired = nearby.sum(axis=1) >= self.constants['INSPIRATION_SHIP_COUNT']
+        for ship, is_inspired in zip(ships, inspired.tolist()):
+            ship.inspired = is_inspired
+
+    def _mine(self, moved):
+        """
+        Every ship that did not move collects a quarter of its cell, rounded up, and inspired ships a bonus on top.
+        """
+        capacity = self.constants['MAX_ENERGY']
+        for player in self.players:
+            for ship in player.ships.values():
+                if ship.id in moved or (ship.x, ship.y) in self.structures:
+                    continue
+                cell = int(self.halite[ship.y, ship.x])
+                ratio = self.constants['INSPIRED_EXTRACT_RATIO' if ship.inspired else 'EXTRACT_RATIO']
+                extracted = min(-(-cell // ratio), capacity - ship.halite)
+                if extracted <= 0:
+                    continue
+                self._set_halite(ship.x, ship.y, cell - extracted)
+                ship.halite += extracted
+                if ship.inspired:
+                    bonus = int(extracted * self.constants['INSPIRED_BONUS_MULTIPLIER'])
+                    ship.halite += min(bonus, capacity - ship.halite)
+
+
+def play_game(bot_paths, width=32, seed=None, turn_limit=None, record=None):
+    """
+    Plays one game between bot scripts.
+    :param bot_paths: The paths of the bot scripts, one per player
+    :param width: The map width and height
+    :param seed: Seed for the map generator
+    :param turn_limit: The number of turns, the official number for the map size by default
+    :param record: A binary file the input of player 0 is recorded to
+    :return: The GameResult
+    """
+    bots = [ModuleBot(path) for path in bot_paths]
+    return Engine(bots, width, seed=seed, turn_limit=turn_limit, record=record).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Halite III games in-process")
+    parser.add_argument("bots", nargs="+", help="Paths of the bot scripts, one per player")
+    parser.add_argument("--size", type=int, default=32, help="Width and height of the map")
+    parser.add_argument("--games", type=int, default=1, help="Number of games to play")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the first map, the next games count up")
+    parser.add_argument("--turns", type=int, default=None, help="Turn limit, the official one by default")
+    parser.add_argument("--log", action="store_true", help="Keep the bots' logging enabled")
+    args = parser.parse_args()
+
+    if not args.log:
+        logging.disable(logging.CRITICAL)
+
+    wins = {}
+    for game in range(args.games):
+        seed = None if args.seed is None else args.seed + game
+        result = play_game(args.bots, args.size, seed, args.turns)
+        print("{} in {:.1f} s".format(result, result.duration))
+        winner = min(result.ranks, key=result.ranks.get)
+        wins[winner] = wins.get(winner, 0) + 1
+    print("Wins per player: {}".format(wins))